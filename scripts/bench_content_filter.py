@@ -0,0 +1,79 @@
+"""
+Micro-benchmark du ContentFilter
+Mesure le coût par appel de filter_output / filter_input sur des narrations
+typiques (500 à 2000 caractères), propres ou contenant une violation.
+Les scans sont mesurés hors cache de résultats; la ligne "cache" mesure un
+texte déjà filtré.
+
+Usage:
+    python scripts/bench_content_filter.py [--number 2000]
+"""
+
+import argparse
+import statistics
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from jdvlh_ia_game.services.content_filter import ContentFilter  # noqa: E402
+
+SENTENCES = [
+    "Le vent se lève sur les remparts d'Absalom tandis que la cloche sonne.",
+    "Une silhouette encapuchonnée vous observe depuis l'ombre d'une arche.",
+    "Le marchand gobelin compte ses pièces avec un sourire édenté.",
+    "Au loin, les tambours des orcs résonnent dans la vallée brumeuse.",
+    "Votre épée brille d'une lueur bleutée lorsque le dragon approche.",
+    "La prêtresse de Sarenrae murmure une prière et la blessure se referme.",
+    "Des traces de pas mènent vers une crypte oubliée sous la colline.",
+    "Le capitaine de la garde vous tend une carte couverte de symboles.",
+]
+
+
+def narrative(length: int, violation: str = "") -> str:
+    text = ""
+    i = 0
+    while len(text) < length:
+        text += SENTENCES[i % len(SENTENCES)] + " "
+        i += 1
+    if violation:
+        middle = len(text) // 2
+        text = text[:middle] + f" {violation} " + text[middle:]
+    return text[: length + len(violation) + 2]
+
+
+def bench(func, text: str, number: int, repeat: int = 5) -> float:
+    """Meilleur temps moyen par appel, en microsecondes"""
+    timings = timeit.repeat(lambda: func(text), number=number, repeat=repeat)
+    return min(timings) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    content_filter = ContentFilter()
+    scan_output = content_filter._filter_content
+    cases = [
+        ("output propre", scan_output, ""),
+        ("output violence", scan_output, "torturé longuement"),
+        ("output blacklist", scan_output, "un nazi"),
+        ("input propre", content_filter._scan_input, ""),
+        ("output cache", content_filter.filter_output, ""),
+    ]
+
+    print(f"{'cas':<20}{'longueur':>10}{'µs/appel':>12}")
+    results = []
+    for name, func, violation in cases:
+        for length in (500, 1000, 2000):
+            text = narrative(length, violation)
+            cost = bench(func, text, args.number)
+            results.append(cost)
+            print(f"{name:<20}{len(text):>10}{cost:>12.1f}")
+    print(f"\nMédiane: {statistics.median(results):.1f} µs/appel")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark du démarrage d'un worker
+Dans un process neuf: profil `-X importtime` de core.game_server (modules
+les plus coûteux, cumulés), puis temps jusqu'à "prêt à accepter les
+sockets" (import + services construits par le startup FastAPI).
+Les composants lourds (détection des modèles, contenu PF2e, traducteur,
+client ollama/httpx) sont hors du chemin critique: ils sont chargés par la
+tâche de warm-up ou au premier appel.
+
+Usage:
+    python scripts/bench_import_time.py [--runs 5] [--top 15]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import contextlib, io, json, sys, time
+sys.path.insert(0, "src")
+start = time.perf_counter()
+from jdvlh_ia_game.core import game_server
+imported = time.perf_counter() - start
+with contextlib.redirect_stdout(io.StringIO()):
+    game_server.get_state_manager()
+    game_server.get_cache_service()
+    game_server.get_narrative_service()
+    game_server.get_session_manager()
+    game_server.get_parental_control()
+ready = time.perf_counter() - start
+print(json.dumps({
+    "import_s": imported,
+    "ready_s": ready,
+    "heavy_modules": [m for m in ("bs4", "ollama", "httpx",
+                                  "jdvlh_ia_game.services.translation.pf2e_translator")
+                      if m in sys.modules],
+}))
+"""
+
+
+def run_child(importtime: bool = False) -> subprocess.CompletedProcess:
+    flags = ["-X", "importtime"] if importtime else []
+    return subprocess.run(
+        [sys.executable, *flags, "-c", CHILD],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def parse_importtime(stderr: str) -> list:
+    """(cumulé µs, module) pour chaque ligne `import time:`"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        rows.append((int(cumulative), module.strip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    profile = parse_importtime(run_child(importtime=True).stderr)
+    print(f"{'module':<55}{'cumulé (ms)':>12}")
+    for cumulative, module in sorted(profile, reverse=True)[: args.top]:
+        print(f"{module[:54]:<55}{cumulative / 1000:>12.1f}")
+
+    runs = [
+        json.loads(run_child().stdout.strip().splitlines()[-1])
+        for _ in range(args.runs)
+    ]
+    print(
+        f"\nimport game_server: {statistics.median(r['import_s'] for r in runs) * 1000:.0f} ms"
+    )
+    print(
+        f"prêt (startup):     {statistics.median(r['ready_s'] for r in runs) * 1000:.0f} ms"
+    )
+    print(f"modules lourds chargés: {runs[-1]['heavy_modules'] or 'aucun'}")
+
+
+if __name__ == "__main__":
+    main()
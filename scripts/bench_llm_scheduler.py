@@ -0,0 +1,91 @@
+"""
+Benchmark de l'ordonnanceur LLM sous rafale
+Simule un serveur Ollama qui traite `--parallel` générations à la fois
+(les suivantes se partagent le temps de calcul), puis envoie en même temps
+une pré-génération massive et une rafale de tours interactifs.
+Compare la latence des tours (p50/p99) sans coordination et avec
+l'ordonnanceur.
+
+Usage:
+    python scripts/bench_llm_scheduler.py [--players 20] [--pregen 40]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from jdvlh_ia_game.services.llm_client import LLMClient  # noqa: E402
+from jdvlh_ia_game.services.llm_scheduler import LLMScheduler, Priority  # noqa: E402
+
+
+class SimulatedOllama:
+    """Débit fixe: au-delà de `parallel` requêtes, chacune ralentit"""
+
+    def __init__(self, parallel: int, seconds: float):
+        self.parallel = parallel
+        self.seconds = seconds
+        self.active = 0
+
+    async def generate(self, **kwargs):
+        self.active += 1
+        try:
+            remaining = self.seconds
+            while remaining > 0:
+                step = 0.005
+                await asyncio.sleep(step)
+                remaining -= step * min(1.0, self.parallel / self.active)
+            return {"response": "{}"}
+        finally:
+            self.active -= 1
+
+
+async def burst(client: LLMClient, players: int, pregen: int) -> list:
+    async def turn(player_id: str) -> float:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await client.generate("mistral", "tour", player_id=player_id)
+        return loop.time() - start
+
+    background = [
+        asyncio.create_task(
+            client.generate("mistral", "lieu", priority=Priority.PREGENERATION)
+        )
+        for _ in range(pregen)
+    ]
+    await asyncio.sleep(0.01)
+    latencies = await asyncio.gather(*(turn(f"p{i}") for i in range(players)))
+    await asyncio.gather(*background)
+    return sorted(latencies)
+
+
+def run(scheduled: bool, args) -> list:
+    client = LLMClient(timeout=600)
+    client._client = SimulatedOllama(args.parallel, args.seconds)
+    client.scheduler = LLMScheduler(
+        max_in_flight=args.parallel if scheduled else 10**6,
+        max_wait={"interactive": None},
+    )
+    return asyncio.run(burst(client, args.players, args.pregen))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--players", type=int, default=20)
+    parser.add_argument("--pregen", type=int, default=40)
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=0.1)
+    args = parser.parse_args()
+
+    print(f"{'mode':<16}{'tour p50 (s)':>14}{'tour p99 (s)':>14}")
+    for name, scheduled in (("sans file", False), ("ordonnanceur", True)):
+        latencies = run(scheduled, args)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{name:<16}{statistics.median(latencies):>14.2f}{p99:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark démarrage du contenu PF2e: JSON vs snapshot binaire
+Chaque mesure tourne dans un process neuf (démarrage à froid côté Python):
+temps de construction de PF2eContent et pic RSS du process; la mémoire
+Python allouée (tracemalloc) est mesurée dans un run séparé car le traçage
+ralentit le chargement.
+
+Usage:
+    python scripts/bench_pf2e_startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import contextlib, io, json, resource, sys, time, tracemalloc
+sys.path.insert(0, "src")
+from jdvlh_ia_game.services.pf2e_content import PF2eContent
+
+if {trace}:
+    tracemalloc.start()
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    content = PF2eContent(use_snapshot={use_snapshot})
+    content.get_spell_by_name("boule de feu")
+elapsed = time.perf_counter() - start
+current, _ = tracemalloc.get_traced_memory()
+print(json.dumps({{
+    "seconds": elapsed,
+    "python_mb": current / 1e6,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+
+def measure(use_snapshot: bool, trace: bool = False) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(use_snapshot=use_snapshot, trace=trace)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # Construit (ou rafraîchit) le snapshot avant de mesurer
+    measure(use_snapshot=True)
+
+    print(
+        f"{'mode':<10}{'démarrage (ms)':>16}{'mémoire Python (MB)':>22}{'RSS max (MB)':>14}"
+    )
+    for name, use_snapshot in (("json", False), ("snapshot", True)):
+        runs = [measure(use_snapshot) for _ in range(args.runs)]
+        traced = measure(use_snapshot, trace=True)
+        print(
+            f"{name:<10}"
+            f"{statistics.median(r['seconds'] for r in runs) * 1000:>16.0f}"
+            f"{traced['python_mb']:>22.1f}"
+            f"{statistics.median(r['max_rss_mb'] for r in runs):>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
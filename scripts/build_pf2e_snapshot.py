@@ -0,0 +1,33 @@
+"""
+Compile le contenu PF2e (JSON traduits + SRD brut) en snapshot binaire
+À lancer après une mise à jour des traductions ou au build de l'image;
+sinon le snapshot est reconstruit au premier démarrage du serveur.
+
+Usage:
+    python scripts/build_pf2e_snapshot.py [--language fr] [--data-dir data/pf2e]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from jdvlh_ia_game.services.pf2e_content import PF2eContent  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--language", default="fr")
+    parser.add_argument("--data-dir", type=Path, default=Path("data/pf2e"))
+    args = parser.parse_args()
+
+    snapshot_path = args.data_dir / "snapshot" / f"{args.language}.bin"
+    snapshot_path.unlink(missing_ok=True)
+    content = PF2eContent(data_dir=args.data_dir, language=args.language)
+    size_mb = content.snapshot_path.stat().st_size / 1e6
+    print(f"✅ Snapshot: {content.snapshot_path} ({size_mb:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
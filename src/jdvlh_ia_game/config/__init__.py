@@ -0,0 +1,21 @@
+"""
+Configuration JDVLH IA Game
+
+config.yaml est lu une seule fois par process: tous les modules partagent
+le même dict via get_config().
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict
+
+import yaml
+
+CONFIG_PATH = Path(__file__).parent / "config.yaml"
+
+
+@lru_cache(maxsize=None)
+def get_config(path: Path = CONFIG_PATH) -> Dict[str, Any]:
+    """Config parsée (mise en cache par chemin)"""
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
@@ -1,22 +1,23 @@
 import asyncio
-from typing import Any, Dict, List
-from pathlib import Path
+from functools import lru_cache
+from typing import Any, Coroutine, Dict, List, Set
 
-import yaml
 from fastapi import Depends, FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
+from ..config import get_config
+
 # from ..middleware.security import security_middleware  # Temporary comment
-from ..services.cache import CacheService
 from ..services.event_bus import EventBus
-from ..services.narrative import NarrativeService
 from ..services.state_manager import StateManager
 from ..services.combat_engine import CombatEngine
 from ..services.inventory_manager import InventoryManager
 from ..services.quest_manager import QuestManager
 from ..services.character_progression import CharacterProgression
 from ..services.i18n import get_i18n
+from ..services.llm_client import get_llm_client
+from ..services.persistence import close_engines
 from ..services import get_content_filter, get_parental_control, get_session_manager
 from ..models.game_entities import (
     Player,
@@ -26,15 +27,32 @@ from ..models.game_entities import (
     Race,
     CharacterClass,
     EnemyType,
+    CombatState,
 )
 
-# Chemin absolu vers config.yaml
-CONFIG_PATH = Path(__file__).parent.parent / "config" / "config.yaml"
-with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-    config = yaml.safe_load(f)
+config = get_config()
 
 app = FastAPI(title="JDVLH IA Game Server")
 
+# Tâches de fond en cours: la boucle ne garde qu'une référence faible aux
+# tâches, sans celle-ci une tâche peut être collectée avant sa fin
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def _spawn(coro: Coroutine) -> asyncio.Task:
+    """Lance une tâche de fond suivie (référence gardée, erreur affichée)"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    task.add_done_callback(_report_failure)
+    return task
+
+
+def _report_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[!] Tâche de fond échouée: {task.exception()!r}")
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -66,14 +84,23 @@ class ExportRequest(BaseModel):
     parent_email: str
 
 
-def get_narrative_service() -> NarrativeService:
+# Services sans état par connexion: construits une fois, au premier usage
+# (modules lourds importés ici plutôt qu'à l'import du serveur)
+@lru_cache(maxsize=None)
+def get_narrative_service():
+    from ..services.narrative import NarrativeService
+
     return NarrativeService()
 
 
-def get_cache_service() -> CacheService:
+@lru_cache(maxsize=None)
+def get_cache_service():
+    from ..services.cache import CacheService
+
     return CacheService()
 
 
+@lru_cache(maxsize=None)
 def get_state_manager() -> StateManager:
     return StateManager()
 
@@ -106,44 +133,70 @@ def get_character_progression() -> CharacterProgression:
     return CharacterProgression()
 
 
+async def warm_up():
+    """Initialise en arrière-plan les composants lents (contenu PF2e)"""
+    narrative_service = get_narrative_service()
+    await asyncio.to_thread(lambda: narrative_service.pf2e)
+
+
 @app.on_event("startup")
 async def startup_event():
     state_manager = get_state_manager()
     cache_service = get_cache_service()
     session_manager = get_session_manager()
-    asyncio.create_task(cache_service.pregenerate())
-    asyncio.create_task(state_manager.cleanup_inactive())
-    asyncio.create_task(session_manager.cleanup_inactive())
-    if state_manager.get_active_count() >= config["server"]["max_players"]:
+    parental_control = get_parental_control()
+    _spawn(warm_up())
+    # Découverte des modèles en continu (préchargés avant d'être routés)
+    _spawn(get_narrative_service().router.run_discovery())
+    _spawn(cache_service.pregenerate())
+    _spawn(state_manager.cleanup_inactive())
+    _spawn(state_manager.run_flusher())
+    _spawn(state_manager.run_invalidation_listener())
+    _spawn(session_manager.cleanup_inactive())
+    _spawn(session_manager.run_broadcast_listener())
+    _spawn(parental_control.event_log.run_flusher())
+    _spawn(parental_control.run_invalidation_listener())
+    if await session_manager.reconcile() >= config["server"]["max_players"]:
         print("Attention: limite max_players atteinte")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in list(_background_tasks):
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    await get_llm_client().close()
+    get_parental_control().event_log.flush()
+    get_state_manager().flush()
+    close_engines()
+
+
 @app.websocket("/ws/{player_id}")
 async def websocket_endpoint(
     websocket: WebSocket,
     player_id: str,
-    narrative_service: NarrativeService = Depends(get_narrative_service),
-    cache_service: CacheService = Depends(get_cache_service),
+    narrative_service=Depends(get_narrative_service),
+    cache_service=Depends(get_cache_service),
     state_manager: StateManager = Depends(get_state_manager),
     event_bus: EventBus = Depends(get_event_bus),
     parental_control=Depends(get_parental_control),
     content_filter=Depends(get_content_filter),
     session_manager=Depends(get_session_manager),
 ):
-    if state_manager.get_active_count() >= config["server"]["max_players"]:
+    if session_manager.get_active_count() >= config["server"]["max_players"]:
         await websocket.close(code=503, reason="Serveur plein")
         return
 
     await websocket.accept()
 
     # Vérifier contrôle parental
-    allowed, msg = parental_control.check_session_allowed(player_id)
+    allowed, msg = await parental_control.check_session_allowed(player_id)
     if not allowed:
         await websocket.close(code=403, reason=msg)
         return
 
-    parental_control.start_session(player_id)
-    parental_control.log_event(player_id, "websocket_connect")
+    await parental_control.start_session(player_id)
+    await parental_control.log_event(player_id, "websocket_connect")
 
     # Créer session multi-device
     await session_manager.create_session(
@@ -156,7 +209,7 @@ async def websocket_endpoint(
 
     await session_manager.add_socket(player_id, websocket)
 
-    state = state_manager.load_state(player_id)
+    state = await state_manager.load_state_async(player_id)
     i18n = get_i18n("fr")  # TODO: Get from user preferences
 
     loc_data = cache_service.get_location_data(state["current_location"])
@@ -171,38 +224,76 @@ async def websocket_endpoint(
     }
     await websocket.send_json(welcome)
 
+    # Streaming token par token: ?stream=1 ou config ollama.stream
+    stream_default = str(config["ollama"].get("stream", False))
+    stream_mode = websocket.query_params.get("stream", stream_default).lower() in (
+        "1",
+        "true",
+    )
+
+    # Lecture continue de la socket: détecte la déconnexion pendant une génération
+    messages: asyncio.Queue = asyncio.Queue()
+    reader = asyncio.create_task(_pump_messages(websocket, messages))
+
     try:
         while True:
-            choice = await websocket.receive_text()
+            choice = await messages.get()
+            if choice is None:
+                raise WebSocketDisconnect()
+            # Relu à chaque tour: un autre worker a pu écrire l'état du joueur
+            state = await state_manager.load_state_async(player_id)
 
-            parental_control.log_event(
+            await parental_control.log_event(
                 player_id, "player_choice", {"choice": choice[:50]}
             )
 
             blacklist = config.get("blacklist_words", [])
-            response = await narrative_service.generate(
-                state["context"], state["history"], choice, blacklist
-            )
+            if stream_mode:
+                generation = _stream_narrative(
+                    websocket,
+                    narrative_service.generate_stream(
+                        state["context"],
+                        state["history"],
+                        choice,
+                        blacklist,
+                        player_id=player_id,
+                        state=state,
+                    ),
+                )
+            else:
+                generation = narrative_service.generate(
+                    state["context"],
+                    state["history"],
+                    choice,
+                    blacklist,
+                    player_id=player_id,
+                    state=state,
+                )
+            response = await _run_until_disconnect(generation, reader)
             state["history"].append(f"Joueur: {choice}")
             state["history"].append(f"MJ: {response['narrative']}")
             if len(state["history"]) > 30:
                 state["history"] = state["history"][-20:]
             state["current_location"] = response["location"]
-            state_manager.save_state(player_id, state)
+            await state_manager.save_state_async(player_id, state)
             loc_data = cache_service.get_location_data(state["current_location"])
             full_response = {**response, **loc_data}
 
-            # Filtrer contenu avec ContentFilter
-            filter_result = content_filter.filter_output(full_response["narrative"])
-            full_response["narrative"] = filter_result.filtered_text
-            full_response["filter_result"] = filter_result.to_dict()
+            # Déjà filtré par NarrativeService (étage unique); les réponses de
+            # secours n'ont pas de résultat et passent par le cache du filtre
+            if "filter_result" not in full_response:
+                filter_result = content_filter.filter_output(full_response["narrative"])
+                full_response["narrative"] = filter_result.filtered_text
+                full_response["filter_result"] = filter_result.to_dict()
 
-            parental_control.log_event(
+            await parental_control.log_event(
                 player_id,
                 "ai_response",
                 {
                     "length": len(full_response["narrative"]),
-                    "filter_violations": len(filter_result.violations),
+                    "filter_violations": full_response["filter_result"][
+                        "violation_count"
+                    ],
                 },
             )
 
@@ -214,9 +305,12 @@ async def websocket_endpoint(
             event_bus.emit("narrative_generated", full_response)
     except WebSocketDisconnect:
         await session_manager.remove_socket(player_id, websocket)
-        parental_control.end_session(player_id)
-        parental_control.log_event(player_id, "session_end")
+        await parental_control.end_session(player_id)
+        await parental_control.log_event(player_id, "session_end")
+        await state_manager.flush_async([player_id])
         print(f"Joueur {player_id} déconnecté")
+    finally:
+        reader.cancel()
 
 
 @app.post("/reset/{player_id}")
@@ -237,7 +331,19 @@ async def reset_game(
 @app.get("/health")
 async def health_check():
     """Health check endpoint for Docker/monitoring"""
-    return {"status": "healthy", "service": "jdvlh-ia-game"}
+    narrative = get_narrative_service()
+    response_cache = narrative.response_cache
+    return {
+        "status": "healthy",
+        "service": "jdvlh-ia-game",
+        "llm_queue": get_llm_client().scheduler.get_stats(),
+        "response_cache": response_cache.get_stats() if response_cache else None,
+        "prompt_context": (
+            narrative.contexts.get_stats() if narrative.contexts else None
+        ),
+        "narrative_output": narrative.output_stats,
+        "location_cache": get_cache_service().get_stats(),
+    }
 
 
 # ===== PARENTAL CONTROL ENDPOINTS =====
@@ -248,7 +354,7 @@ async def set_parental_pin(
     parental_control=Depends(get_parental_control_dep),
 ):
     """Set parental control PIN (4 digits)"""
-    success = parental_control.set_pin(player_id, request.pin)
+    success = await parental_control.set_pin(player_id, request.pin)
     if success:
         return {"success": True, "message": "PIN défini avec succès"}
     return {"success": False, "message": "PIN invalide (4 chiffres requis)"}
@@ -261,7 +367,7 @@ async def verify_parental_pin(
     parental_control=Depends(get_parental_control_dep),
 ):
     """Verify parental control PIN"""
-    valid = parental_control.verify_pin(player_id, request.pin)
+    valid = await parental_control.verify_pin(player_id, request.pin)
     return {"valid": valid}
 
 
@@ -272,7 +378,9 @@ async def update_parental_settings(
     parental_control=Depends(get_parental_control_dep),
 ):
     """Update parental control settings (requires PIN verification)"""
-    success = parental_control.update_settings(player_id, request.settings, request.pin)
+    success = await parental_control.update_settings(
+        player_id, request.settings, request.pin
+    )
     if success:
         return {"success": True, "message": "Paramètres mis à jour"}
     return {"success": False, "message": "PIN invalide ou erreur"}
@@ -283,7 +391,7 @@ async def get_parental_logs(
     player_id: str, parental_control=Depends(get_parental_control_dep)
 ):
     """Get session logs for parental review"""
-    logs = parental_control.get_session_logs(player_id)
+    logs = await parental_control.get_session_logs(player_id)
     return {"logs": logs}
 
 
@@ -294,7 +402,7 @@ async def export_parental_logs(
     parental_control=Depends(get_parental_control_dep),
 ):
     """Export logs to parent email"""
-    success = parental_control.export_logs(player_id, request.parent_email)
+    success = await parental_control.export_logs(player_id, request.parent_email)
     if success:
         return {"success": True, "message": f"Rapport envoyé à {request.parent_email}"}
     return {"success": False, "message": "Erreur lors de l'export"}
@@ -322,6 +430,8 @@ async def combat_websocket(
     - combat_start: {type, combat_id, intro, enemies, player}
     - combat_result: {type, narrative, damages, animations, states}
     - combat_end: {type, victory, narrative, loot, rewards}
+    - combat_narration: {type, combat_id, narrative} narration IA des moments
+      clés (début, critique, ennemi vaincu, fin), envoyée après coup
     """
     await websocket.accept()
     active_combat = None
@@ -360,6 +470,7 @@ async def combat_websocket(
                         },
                     }
                 )
+                _follow_up_combat_narration(websocket, combat_engine, combat_state)
 
             elif action in ["attack", "cast_spell", "use_item", "defend"]:
                 if not active_combat:
@@ -378,7 +489,8 @@ async def combat_websocket(
                     item_id=message.get("item_id"),
                 )
 
-                result = await combat_engine.execute_turn(active_combat, combat_action)
+                combat_state = active_combat
+                result = await combat_engine.execute_turn(combat_state, combat_action)
 
                 # Send result
                 response = {
@@ -411,11 +523,37 @@ async def combat_websocket(
                     _save_player(player, state_manager)
 
                 await websocket.send_json(response)
+                _follow_up_combat_narration(websocket, combat_engine, combat_state)
 
     except WebSocketDisconnect:
         print(f"Combat WebSocket disconnected: {player_id}")
 
 
+def _follow_up_combat_narration(
+    websocket: WebSocket, combat_engine: CombatEngine, combat_state: CombatState
+):
+    """Narration IA des moments clés, envoyée dès que générée sans bloquer le tour"""
+    if not (combat_engine.follow_up and combat_engine.has_highlights(combat_state)):
+        return
+
+    async def send():
+        narrative = await combat_engine.narrate_highlights(combat_state)
+        if not narrative:
+            return
+        try:
+            await websocket.send_json(
+                {
+                    "type": "combat_narration",
+                    "combat_id": combat_state.combat_id,
+                    "narrative": narrative,
+                }
+            )
+        except Exception as e:
+            print(f"Narration de combat non envoyée: {e}")
+
+    _spawn(send())
+
+
 # ===== INVENTORY WEBSOCKET =====
 @app.websocket("/ws/inventory/{player_id}")
 async def inventory_websocket(
@@ -716,6 +854,35 @@ async def character_websocket(
 
 
 # ===== HELPER FUNCTIONS =====
+async def _pump_messages(websocket: WebSocket, queue: asyncio.Queue):
+    """Lit la socket en continu; None dans la file signale la déconnexion"""
+    try:
+        while True:
+            await queue.put(await websocket.receive_text())
+    except (WebSocketDisconnect, RuntimeError):
+        await queue.put(None)
+
+
+async def _stream_narrative(websocket: WebSocket, frames) -> Dict[str, Any]:
+    """Envoie les frames narrative_delta au fil de l'eau, retourne la frame finale"""
+    async for frame in frames:
+        if frame["type"] == "narrative_delta":
+            await websocket.send_json(frame)
+        else:
+            return frame
+    raise RuntimeError("Flux narratif terminé sans frame finale")
+
+
+async def _run_until_disconnect(coro, reader: asyncio.Task):
+    """Exécute une génération, annulée si le lecteur de socket se termine"""
+    generation = asyncio.ensure_future(coro)
+    await asyncio.wait({generation, reader}, return_when=asyncio.FIRST_COMPLETED)
+    if generation.done():
+        return generation.result()
+    generation.cancel()
+    raise WebSocketDisconnect()
+
+
 def _load_or_create_player(player_id: str, state_manager: StateManager) -> Player:
     """Load player from state or create a new one"""
     state = state_manager.load_state(player_id)
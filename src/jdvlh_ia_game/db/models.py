@@ -1,14 +1,11 @@
-import yaml
-from pathlib import Path
 from sqlalchemy import Column, Float, Integer, String, create_engine
 from sqlalchemy.dialects.sqlite import JSON
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-# Chemin absolu vers config.yaml
-CONFIG_PATH = Path(__file__).parent.parent / "config" / "config.yaml"
-with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-    config = yaml.safe_load(f)
+from ..config import get_config
+
+config = get_config()
 
 DB_URL = "sqlite:///game.db"
 
@@ -27,10 +24,19 @@ class GameStateModel(Base):
     history_length = Column(Integer, default=0)  # For auto-save tracking
 
 
-Base.metadata.create_all(bind=engine)
+_initialized = False
+
+
+def init_db():
+    """Crée les tables au premier usage (et non à l'import)"""
+    global _initialized
+    if not _initialized:
+        Base.metadata.create_all(bind=engine)
+        _initialized = True
 
 
 def get_db():
+    init_db()
     db = SessionLocal()
     try:
         yield db
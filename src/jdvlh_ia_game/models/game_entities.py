@@ -517,6 +517,7 @@ class CombatState:
     turn: int = 1
     player_turn: bool = True
     intro_text: str = ""
+    location: str = ""
 
     # Cooldowns
     spell_cooldowns: Dict[str, int] = field(default_factory=dict)
@@ -1,4 +1,23 @@
-from .cache import CacheService  # noqa: F401
-from .content_filter import get_content_filter  # noqa: F401
-from .parental_control import get_parental_control  # noqa: F401
-from .session_manager import get_session_manager  # noqa: F401
+"""
+Services JDVLH IA Game
+
+Réexports chargés au premier accès: importer un service (ou le serveur) ne
+charge pas tous les autres
+"""
+
+from importlib import import_module
+
+_EXPORTS = {
+    "CacheService": ".cache",
+    "get_content_filter": ".content_filter",
+    "get_parental_control": ".parental_control",
+    "get_session_manager": ".session_manager",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(_EXPORTS[name], __name__), name)
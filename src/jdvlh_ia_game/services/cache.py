@@ -1,80 +1,297 @@
+"""
+Cache des descriptions de lieux, à deux niveaux
+
+- Mémoire: LRU borné dans le process, échéance (TTL) suivie en mémoire;
+  une consultation par tour n'est qu'un accès dict
+- Disque: magasin de contenu SQLite (espace "locations", partagé entre
+  workers, taille bornée), lu une seule fois par lieu et par process; les
+  anciens fichiers JSON de `cache.dir` y sont importés au démarrage
+
+Stale-while-revalidate: une entrée expirée est encore servie pendant qu'une
+tâche de fond la régénère (priorité PREGENERATION); un lieu inconnu reçoit la
+description par défaut et est généré en arrière-plan (lieux canoniques
+seulement).
+
+Les lieux renvoyés par le modèle (texte libre) sont ramenés au lieu canonique
+de la config par LocationIndex avant la consultation.
+
+Pré-génération (pregenerate): quelques lieux à la fois (`concurrency`),
+reprise possible (les entrées encore fraîches sont sautées), échecs
+réessayés avec backoff; la même file sert aux lieux découverts en jeu.
+"""
+
 import json
+import logging
 import os
 import time
 import asyncio
-import ollama
-from typing import Any, Dict
-from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 
-import yaml
+from ..config import get_config
+from .llm_client import get_llm_client
+from .llm_scheduler import Priority
+from .content_store import ContentStore, get_content_store
+from .location_index import LocationIndex
 
-# Chemin absolu vers config.yaml
-CONFIG_PATH = Path(__file__).parent.parent / "config" / "config.yaml"
-with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-    config = yaml.safe_load(f)
+config = get_config()
+logger = logging.getLogger(__name__)
 
 CACHE_DIR = config["cache"]["dir"]
-os.makedirs(CACHE_DIR, exist_ok=True)
+NAMESPACE = "locations"
+
+DEFAULT_LOCATION = {
+    "description": "Lieu mystérieux...",
+    "background": "default",
+    "animation_trigger": "none",
+    "sfx": "ambient",
+}
+
+
+def _safe_name(location: str) -> str:
+    return location.replace(" ", "_").replace("é", "e").replace("'", "")
 
 
 class CacheService:
-    def __init__(self):
-        self.ttl = config["cache"]["ttl"]
+    def __init__(self, store: Optional[ContentStore] = None):
+        cache_config = config["cache"]
+        self.ttl = cache_config["ttl"]
+        self.max_entries = cache_config.get("memory_entries", 256)
+        # Délai avant nouvel essai quand une régénération échoue
+        self.retry_after = cache_config.get("retry_after", 60)
+        self.generate_missing = cache_config.get("generate_missing", True)
+        pregeneration = cache_config.get("pregeneration", {})
+        self.concurrency = pregeneration.get("concurrency", 2)
+        self.max_attempts = pregeneration.get("max_attempts", 3)
+        self.retry_backoff = pregeneration.get("retry_backoff", 5)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.progress = {"total": 0, "done": 0, "failed": 0, "skipped": 0}
         self.locations = config["locations"]
+        self.location_index = LocationIndex(self.locations)
+        self.llm = get_llm_client()
+        self.store = store or get_content_store()
+        # clé -> (données, échéance time.time()); None = absent du disque
+        self._memory: "OrderedDict[str, Tuple[Optional[Dict[str, Any]], float]]" = (
+            OrderedDict()
+        )
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "disk_reads": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "write_errors": 0,
+            "evictions": 0,
+        }
+        self._import_legacy()
 
-    async def pregenerate(self):
-        print("🟡 Pré-génération cache...")
-        for loc in self.locations:
-            safe_loc = loc.replace(" ", "_").replace("é", "e").replace("'", "")
-            cache_file = os.path.join(CACHE_DIR, f"{safe_loc}.json")
-            if not os.path.exists(cache_file):
-                prompt = (
-                    f"Décris brièvement {loc} en 1-2 phrases immersives "
-                    f"pour enfants de 10 ans dans l'univers "
-                    f"du Seigneur des Anneaux."
-                )
-                try:
-                    resp = ollama.generate(
-                        model=config["ollama"]["model"],
-                        prompt=prompt,
-                        options={"temperature": 0.3, "num_predict": 80},
-                    )["response"].strip()
-                except Exception as e:
-                    print(f"⚠️ Erreur génération cache {loc}: {e}")
-                    resp = f"Un lieu épique et mystérieux dans {loc} !"
-                data = {
-                    "description": resp,
-                    "background": loc.lower()
-                    .replace(" ", "_")
-                    .replace("'", "")
-                    .replace("é", "e"),
-                    "animation_trigger": "ambient_start",
-                    "sfx": "wind" if "forêt" in loc.lower() else "echo",
-                }
-                with open(cache_file, "w", encoding="utf-8") as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-                await asyncio.sleep(0.5)  # Rate limit Ollama
-        print("🟢 Cache lieux pré-généré!")
+    async def pregenerate(self, locations: Optional[List[str]] = None):
+        """
+        Pré-génère les lieux (config `locations` par défaut) sans bloquer
+
+        Les entrées encore fraîches sont sautées: relancer après une
+        interruption reprend là où le travail s'était arrêté.
+        """
+        started = time.monotonic()
+        locations = self.locations if locations is None else locations
+        targets = [loc for loc in locations if not self._is_fresh(loc)]
+        self.progress["skipped"] += len(locations) - len(targets)
+        print(
+            f"🟡 Pré-génération cache: {len(targets)} lieux "
+            f"({len(locations) - len(targets)} déjà à jour)..."
+        )
+        self.schedule_pregeneration(targets)
+        tasks = [
+            self._refreshing[key]
+            for key in {_safe_name(loc) for loc in targets}
+            if key in self._refreshing
+        ]
+        await asyncio.gather(*tasks, return_exceptions=True)
+        print(
+            f"🟢 Cache lieux pré-généré! ({self.progress['done']}/"
+            f"{self.progress['total']}, {self.progress['failed']} échecs, "
+            f"{time.monotonic() - started:.1f}s)"
+        )
+
+    def schedule_pregeneration(self, locations: List[str]):
+        """Met des lieux (ex: découverts en jeu) dans la file de pré-génération"""
+        for location in locations:
+            self._schedule_refresh(location)
 
     def get_location_data(self, location: str) -> Dict[str, Any]:
-        safe_loc = location.replace(" ", "_").replace("é", "e").replace("'", "")
-        cache_file = os.path.join(CACHE_DIR, f"{safe_loc}.json")
-        if os.path.exists(cache_file):
-            mtime = os.path.getmtime(cache_file)
-            if time.time() - mtime > self.ttl:
-                os.remove(cache_file)
-                return {
-                    "description": "Lieu mystérieux...",
-                    "background": "default",
-                    "animation_trigger": "none",
-                    "sfx": "ambient",
-                }
-            with open(cache_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data
+        """
+        Données du lieu (mémoire, sinon disque); jamais de génération bloquante
+
+        Seuls les lieux canoniques (résolus par l'index) sont générés ou
+        régénérés en arrière-plan: le texte libre du modèle ne peut pas
+        remplir la file de pré-génération.
+        """
+        resolved = self.location_index.resolve(location)
+        location = resolved or location
+        key = _safe_name(location)
+        entry = self._memory.get(key)
+        if entry is None:
+            entry = self._load(key, location)
+        else:
+            self._memory.move_to_end(key)
+
+        data, expires = entry
+        if data is None:
+            self.stats["misses"] += 1
+            if self.generate_missing and resolved is not None:
+                self._schedule_refresh(location)
+            return dict(DEFAULT_LOCATION)
+
+        if time.time() >= expires:
+            self.stats["stale_hits"] += 1
+            if resolved is not None:
+                self._schedule_refresh(location)
+        else:
+            self.stats["hits"] += 1
+        return dict(data)
+
+    async def refresh(self, location: str) -> Optional[Dict[str, Any]]:
+        """Régénère la description du lieu (disque puis mémoire); None si échec"""
+        self.stats["refreshes"] += 1
+        description = await self._generate_description(location)
+        if description is None:
+            self.stats["refresh_errors"] += 1
+            return None
+
+        data = {
+            "description": description,
+            "background": location.lower()
+            .replace(" ", "_")
+            .replace("'", "")
+            .replace("é", "e"),
+            "animation_trigger": "ambient_start",
+            "sfx": "wind" if "forêt" in location.lower() else "echo",
+        }
+        key = _safe_name(location)
+        try:
+            await self.store.aput(NAMESPACE, key, data, self.ttl)
+        except Exception as e:
+            # Description servie par ce worker quand même; réécrite au
+            # prochain rafraîchissement
+            self.stats["write_errors"] += 1
+            logger.warning(f"Écriture cache {location} échouée: {e}")
+        self._remember(key, data, time.time() + self.ttl)
+        return data
+
+    async def _pregenerate_one(self, location: str):
+        """Une entrée, avec places limitées et nouveaux essais espacés"""
+        key = _safe_name(location)
+        try:
+            if self._slots is None:
+                self._slots = asyncio.Semaphore(self.concurrency)
+            self.progress["total"] += 1
+            for attempt in range(self.max_attempts):
+                if attempt:
+                    await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+                async with self._slots:
+                    if await self.refresh(location) is not None:
+                        self.progress["done"] += 1
+                        return
+
+            self.progress["failed"] += 1
+            # Garder l'ancienne description (sinon un texte générique, non
+            # écrit sur disque) et réessayer plus tard
+            data = self._memory.get(key, (None, 0))[0] or {
+                **DEFAULT_LOCATION,
+                "description": f"Un lieu épique et mystérieux dans {location} !",
+            }
+            self._remember(key, data, time.time() + self.retry_after)
+        finally:
+            self._refreshing.pop(key, None)
+
+    def _is_fresh(self, location: str) -> bool:
+        key = _safe_name(location)
+        data, expires = self._memory.get(key) or self._load(key, location)
+        return data is not None and time.time() < expires
+
+    async def _generate_description(self, location: str) -> Optional[str]:
+        prompt = (
+            f"Décris brièvement {location} en 1-2 phrases immersives "
+            f"pour enfants de 10 ans dans l'univers "
+            f"du Seigneur des Anneaux."
+        )
+        try:
+            return (
+                await self.llm.generate(
+                    model=config["ollama"]["model"],
+                    prompt=prompt,
+                    options={"temperature": 0.3, "num_predict": 80},
+                    priority=Priority.PREGENERATION,
+                    coalesce=True,
+                )
+            )["response"].strip()
+        except Exception as e:
+            print(f"⚠️ Erreur génération cache {location}: {e}")
+            return None
+
+    def _schedule_refresh(self, location: str):
+        """Régénération en arrière-plan (une seule à la fois par lieu)"""
+        key = _safe_name(location)
+        if key in self._refreshing:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Appel hors boucle (scripts): pas de tâche de fond
+        self._refreshing[key] = loop.create_task(self._pregenerate_one(location))
+
+    def _load(self, key: str, location: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Premier accès au lieu dans ce process: lecture disque unique"""
+        self.stats["disk_reads"] += 1
+        entry = self.store.get_entry(NAMESPACE, key)
+        if entry is None:
+            return self._remember(key, None, 0.0)
+        data, expires = entry
+        return self._remember(key, data, float("inf") if expires is None else expires)
+
+    def _remember(
+        self, key: str, data: Optional[Dict[str, Any]], expires: float
+    ) -> Tuple[Optional[Dict[str, Any]], float]:
+        entry = self._memory[key] = (data, expires)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+        return entry
+
+    def _import_legacy(self):
+        """Importe les JSON de l'ancien cache (un fichier par lieu), sans écraser"""
+        if not os.path.isdir(CACHE_DIR):
+            return
+        now = time.time()
+        entries = []
+        for name in os.listdir(CACHE_DIR):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(CACHE_DIR, name)
+            try:
+                ttl = os.path.getmtime(path) + self.ttl - now
+                with open(path, "r", encoding="utf-8") as f:
+                    entries.append((name[: -len(".json")], json.load(f), ttl))
+            except (OSError, ValueError):
+                continue
+        if entries:
+            self.store.put_many(NAMESPACE, entries, replace=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"]
         return {
-            "description": "Lieu mystérieux...",
-            "background": "default",
-            "animation_trigger": "none",
-            "sfx": "ambient",
+            **self.stats,
+            "entries": len(self._memory),
+            "refreshing": len(self._refreshing),
+            "pregeneration": dict(self.progress),
+            "location_index": self.location_index.get_stats(),
+            "store": self.store.get_stats(),
+            "hit_rate": (
+                (self.stats["hits"] + self.stats["stale_hits"]) / lookups
+                if lookups
+                else 0.0
+            ),
         }
@@ -1,11 +1,14 @@
 """
 Combat Engine - Tactical combat system for JDR narratif
 Handles turn-based combat with AI enemies, damage calculation, and loot distribution
+
+Routine turns are narrated from the CombatNarrator phrase bank; the LLM only
+narrates key moments (combat start, crits, kills, victory/defeat), either
+inline or as a follow-up frame sent once generated (`combat_narration` config).
 """
 
 import random
-from typing import List, Dict, Any, Tuple
-import ollama
+from typing import List, Dict, Any, Optional, Tuple
 
 from ..models.game_entities import (
     Player,
@@ -18,7 +21,16 @@ from ..models.game_entities import (
     ItemType,
     ItemRarity,
 )
+from ..config import get_config
+from .combat_narration import CombatNarrator
+from .llm_client import get_llm_client
+from .llm_scheduler import Priority
 from .model_router import get_router, TaskType
+from .shared_state import get_shared_state
+
+config = get_config()
+
+COMBAT_TTL = 3600
 
 
 class CombatEngine:
@@ -26,7 +38,16 @@ class CombatEngine:
 
     def __init__(self):
         self.router = get_router()
+        self.llm = get_llm_client()
         self.active_combats: Dict[str, CombatState] = {}
+        # Résumé des combats visible par tous les workers (synchro multi-device)
+        self.shared = get_shared_state()
+        self.narrator = CombatNarrator()
+        narration = config.get("combat_narration", {})
+        self.llm_key_moments = narration.get("llm_key_moments", True)
+        self.follow_up = narration.get("follow_up", True)
+        # combat_id -> key moments awaiting LLM narration
+        self._highlights: Dict[str, List[str]] = {}
 
     async def start_combat(
         self, player: Player, enemies: List[Enemy], location: str
@@ -46,31 +67,28 @@ class CombatEngine:
         # Generate combat ID
         combat_id = f"combat_{player.player_id}_{random.randint(1000, 9999)}"
 
-        # Generate epic intro narrative
-        enemy_names = ", ".join([e.name for e in enemies])
-        model, options = self.router.select_model(
-            prompt=f"Un combat épique commence à {location}",
-            context="",
-            task_type=TaskType.EPIC_ACTION,
-        )
-
-        intro_prompt = f"""Décris en 2-3 phrases le début d'un combat épique à {location}.
-Le joueur {player.name} (niveau {player.level}) fait face à : {enemy_names}.
-Adapté pour enfants 10-14 ans, ton excitant mais pas violent."""
-
-        intro_narrative = await self._generate_narrative(
-            model=model, prompt=intro_prompt, options=options
-        )
-
-        # Create combat state
+        # Create combat state, with an instant intro from the phrase bank
         combat_state = CombatState(
             combat_id=combat_id,
             player=player,
             enemies=enemies,
-            intro_text=intro_narrative,
+            intro_text=self.narrator.intro(player, enemies, location),
+            location=location,
         )
 
+        # Epic intro by the LLM (key moment)
+        enemy_names = ", ".join([e.name for e in enemies])
+        self._highlight(
+            combat_state,
+            f"{player.name} (niveau {player.level}) fait face à : {enemy_names}",
+        )
+        if not self.follow_up:
+            combat_state.intro_text = (
+                await self.narrate_highlights(combat_state) or combat_state.intro_text
+            )
+
         self.active_combats[combat_id] = combat_state
+        await self._publish_combat(combat_state)
 
         return combat_state
 
@@ -131,6 +149,11 @@ Adapté pour enfants 10-14 ans, ton excitant mais pas violent."""
         target_enemy = combat_state.enemies[action.target_index]
         if not target_enemy.is_alive():
             result.narrative += f"\n\n💀 {target_enemy.name} est vaincu !"
+            if result.player_damage:
+                self._highlight(
+                    combat_state,
+                    f"{combat_state.player.name} terrasse {target_enemy.name}",
+                )
 
         # Check for victory
         if combat_state.is_victory():
@@ -146,12 +169,14 @@ Adapté pour enfants 10-14 ans, ton excitant mais pas violent."""
             result.narrative += (
                 f"\n\n🏆 Victoire ! Vous gagnez {xp} XP et {gold} pièces d'or !"
             )
+            self._highlight(
+                combat_state, f"{combat_state.player.name} remporte le combat"
+            )
 
             # Remove from active combats
-            if combat_state.combat_id in self.active_combats:
-                del self.active_combats[combat_state.combat_id]
+            await self._end_combat(combat_state)
 
-            return result
+            return await self._narrate_inline(combat_state, result)
 
         # Enemy turn (if combat not over)
         combat_state.next_turn()
@@ -162,15 +187,86 @@ Adapté pour enfants 10-14 ans, ton excitant mais pas violent."""
         if combat_state.is_defeat():
             result.is_defeat = True
             result.narrative += "\n\n💀 Vous êtes vaincu... L'aventure s'arrête ici."
+            self._highlight(
+                combat_state,
+                f"{combat_state.player.name} tombe, vaincu par ses ennemis",
+            )
 
             # Remove from active combats
-            if combat_state.combat_id in self.active_combats:
-                del self.active_combats[combat_state.combat_id]
+            await self._end_combat(combat_state)
 
         combat_state.next_turn()  # Back to player turn
+        if combat_state.combat_id in self.active_combats:
+            await self._publish_combat(combat_state)
 
+        return await self._narrate_inline(combat_state, result)
+
+    def _highlight(self, combat_state: CombatState, moment: str):
+        """Queue a key moment for LLM narration"""
+        if self.llm_key_moments:
+            self._highlights.setdefault(combat_state.combat_id, []).append(moment)
+
+    def has_highlights(self, combat_state: CombatState) -> bool:
+        return bool(self._highlights.get(combat_state.combat_id))
+
+    async def narrate_highlights(self, combat_state: CombatState) -> Optional[str]:
+        """
+        LLM narration of the key moments queued since the last call
+
+        Returns None when there is nothing to narrate or generation failed
+        (the phrase-bank text already sent stands on its own).
+        """
+        moments = self._highlights.pop(combat_state.combat_id, None)
+        if not moments:
+            return None
+
+        model, options = self.router.select_model(
+            prompt=f"Un moment épique de combat à {combat_state.location}",
+            context="",
+            task_type=TaskType.EPIC_ACTION,
+        )
+        prompt = f"""Raconte en 2-3 phrases ce moment clé d'un combat à {combat_state.location}.
+{". ".join(moments)}.
+Adapté pour enfants 10-14 ans, ton excitant mais pas violent."""
+
+        return await self._generate_narrative(
+            model, prompt, options, combat_state.player.player_id, fallback=None
+        )
+
+    async def _narrate_inline(
+        self, combat_state: CombatState, result: CombatResult
+    ) -> CombatResult:
+        """Without follow-up frames, append the key-moment narration to the turn"""
+        if not self.follow_up:
+            narration = await self.narrate_highlights(combat_state)
+            if narration:
+                result.narrative += f"\n\n{narration}"
         return result
 
+    async def _publish_combat(self, combat_state: CombatState):
+        """Share a combat summary (HP, turn) with the other workers"""
+        await self.shared.set(
+            "combats",
+            combat_state.player.player_id,
+            {
+                "combat_id": combat_state.combat_id,
+                "turn": combat_state.turn,
+                "player": {
+                    "hp": combat_state.player.hp,
+                    "max_hp": combat_state.player.max_hp,
+                },
+                "enemies": [
+                    {"name": e.name, "hp": e.hp, "max_hp": e.max_hp}
+                    for e in combat_state.enemies
+                ],
+            },
+            ttl=COMBAT_TTL,
+        )
+
+    async def _end_combat(self, combat_state: CombatState):
+        self.active_combats.pop(combat_state.combat_id, None)
+        await self.shared.delete("combats", combat_state.player.player_id)
+
     async def _execute_attack(
         self, combat_state: CombatState, target_index: int
     ) -> Tuple[int, str]:
@@ -180,7 +276,7 @@ Adapté pour enfants 10-14 ans, ton excitant mais pas violent."""
         enemy = combat_state.enemies[target_index]
 
         # Calculate damage
-        damage = self._calculate_damage(
+        damage, crit = self._calculate_damage(
             attacker_strength=player.strength,
             weapon_damage=self._get_equipped_weapon_damage(player),
             defender_armor=enemy.armor,
@@ -189,16 +285,16 @@ Adapté pour enfants 10-14 ans, ton excitant mais pas violent."""
         # Apply damage
         enemy.take_damage(damage)
 
-        # Generate narrative
-        model, options = self.router.select_model(
-            prompt="action combat rapide", context="", task_type=TaskType.QUICK_RESPONSE
+        # Routine turn: phrase bank, no model round-trip
+        weapon = player.equipped.get("weapon_main")
+        narrative = self.narrator.attack(
+            player, enemy, damage, crit, weapon.name if weapon else None
         )
-
-        narrative_prompt = f"""En 1 phrase courte: {player.name} attaque {enemy.name} et "
-            f"inflige {damage} dégâts.\nTon excitant adapté enfants. "
-            f"HP restant ennemi: {enemy.hp}/{enemy.max_hp}."""
-
-        narrative = await self._generate_narrative(model, narrative_prompt, options)
+        if crit:
+            self._highlight(
+                combat_state,
+                f"Coup critique de {player.name} sur {enemy.name} ({damage} dégâts)",
+            )
 
         return damage, narrative
 
@@ -224,20 +320,7 @@ Adapté pour enfants 10-14 ans, ton excitant mais pas violent."""
         damage = int(base_damage * random.uniform(0.8, 1.2))
         enemy.take_damage(damage)
 
-        # Generate narrative
-        model, options = self.router.select_model(
-            prompt="sort magique épique", context="", task_type=TaskType.EPIC_ACTION
-        )
-
-        narrative_prompt = (
-            f"""En 2 phrases: {player.name} lance un sort de feu puissant """
-            f"""sur {enemy.name} !\n{damage} dégâts infligés. Ton épique """
-            f"""adapté enfants."""
-        )
-
-        narrative = await self._generate_narrative(model, narrative_prompt, options)
-
-        return damage, narrative
+        return damage, self.narrator.spell(player, enemy, spell_id, damage)
 
     async def _execute_item_use(self, combat_state: CombatState, item_id: str) -> str:
         """Execute item use (potion, etc.)"""
@@ -275,7 +358,7 @@ Adapté pour enfants 10-14 ans, ton excitant mais pas violent."""
             action = self._decide_enemy_action(enemy, combat_state)
 
             if action == "attack":
-                damage = self._calculate_damage(
+                damage, _ = self._calculate_damage(
                     attacker_strength=enemy.strength,
                     weapon_damage=enemy.damage,
                     defender_armor=self._get_player_total_armor(combat_state.player),
@@ -302,7 +385,7 @@ Adapté pour enfants 10-14 ans, ton excitant mais pas violent."""
 
     def _calculate_damage(
         self, attacker_strength: int, weapon_damage: int, defender_armor: int
-    ) -> int:
+    ) -> Tuple[int, bool]:
         """Calculate damage with armor reduction and critical hits"""
 
         # Base damage
@@ -313,13 +396,14 @@ Adapté pour enfants 10-14 ans, ton excitant mais pas violent."""
         damage = int(base_damage * damage_multiplier)
 
         # Critical hit (10% chance)
-        if random.random() < 0.1:
+        crit = random.random() < 0.1
+        if crit:
             damage = int(damage * 2)
 
         # Random variance (±10%)
         damage = int(damage * random.uniform(0.9, 1.1))
 
-        return max(1, damage)  # Minimum 1 damage
+        return max(1, damage), crit  # Minimum 1 damage
 
     def _get_equipped_weapon_damage(self, player: Player) -> int:
         """Get damage from equipped weapon"""
@@ -371,17 +455,29 @@ Adapté pour enfants 10-14 ans, ton excitant mais pas violent."""
         return items, total_gold, total_xp
 
     async def _generate_narrative(
-        self, model: str, prompt: str, options: Dict[str, Any]
-    ) -> str:
-        """Generate narrative text using Ollama"""
+        self,
+        model: str,
+        prompt: str,
+        options: Dict[str, Any],
+        player_id: Optional[str] = None,
+        fallback: Optional[str] = "Le combat continue de manière intense...",
+    ) -> Optional[str]:
+        """Generate narrative text using Ollama (identical in-flight prompts share one call)"""
 
         try:
-            response = ollama.generate(model=model, prompt=prompt, options=options)
+            response = await self.llm.generate(
+                model=model,
+                prompt=prompt,
+                options=options,
+                priority=Priority.COMBAT,
+                player_id=player_id,
+                coalesce=True,
+            )
             return response["response"].strip()
 
         except Exception as e:
             print(f"Narrative generation failed: {e}")
-            return "Le combat continue de manière intense..."
+            return fallback
 
 
 # ============================================================================
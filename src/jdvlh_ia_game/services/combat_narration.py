@@ -0,0 +1,228 @@
+"""
+Combat Narration - template-first phrase bank for routine combat turns
+
+Routine hits are rendered from a precompiled, parameterised phrase bank
+(enemy type, damage band, critical hit, kill) in microseconds; the LLM is
+kept for key moments (combat start, crits, kills, victory/defeat), see
+CombatEngine.narrate_highlights.
+"""
+
+import random
+from string import Template
+from typing import Dict, List, Optional
+
+from ..models.game_entities import Enemy, Player
+
+# Damage as a fraction of the target's max HP -> band
+DAMAGE_BANDS = ((0.15, "light"), (0.35, "solid"), (float("inf"), "heavy"))
+
+SPELL_NAMES = {
+    "fireball": "une boule de feu",
+    "ice_shard": "un éclat de glace",
+    "lightning_bolt": "un éclair",
+}
+
+_HIT = {
+    "light": [
+        "$player frappe $enemy avec $weapon : $damage dégâts. $reaction",
+        "$player effleure $enemy d'un coup de $weapon ($damage dégâts). $reaction",
+        "Un coup rapide de $weapon ! $enemy perd $damage PV. $reaction",
+    ],
+    "solid": [
+        "$player touche $enemy de plein fouet avec $weapon : $damage dégâts ! $reaction",
+        "Un coup précis de $weapon ! $enemy encaisse $damage dégâts. $reaction",
+        "$player enchaîne les attaques, $enemy perd $damage PV ! $reaction",
+    ],
+    "heavy": [
+        "$player abat $weapon de toutes ses forces : $damage dégâts ! $reaction",
+        "Un coup dévastateur ! $enemy vacille sous $damage dégâts. $reaction",
+        "$weapon s'abat sur $enemy : $damage dégâts ! $reaction",
+    ],
+}
+
+_CRIT = [
+    "COUP CRITIQUE ! $player trouve la faille : $damage dégâts sur $enemy ! $reaction",
+    "Critique ! $weapon frappe au point faible de $enemy : $damage dégâts ! $reaction",
+]
+
+_SPELL = {
+    "light": [
+        "$player lance $spell sur $enemy : $damage dégâts. $reaction",
+        "$spell jaillit des mains de $player et touche $enemy ($damage dégâts). $reaction",
+    ],
+    "solid": [
+        "$player lance $spell ! $enemy subit $damage dégâts. $reaction",
+        "Les runes brillent : $spell frappe $enemy pour $damage dégâts ! $reaction",
+    ],
+    "heavy": [
+        "$player libère $spell, $enemy est submergé : $damage dégâts ! $reaction",
+        "Une puissance immense ! $spell inflige $damage dégâts à $enemy ! $reaction",
+    ],
+}
+
+# Enemy reactions per enemy type and damage band ("kill" when the enemy falls)
+_REACTIONS = {
+    "orc": {
+        "light": ["L'orc grogne, à peine gêné.", "L'orc ricane et resserre sa garde."],
+        "solid": ["L'orc rugit de rage !", "L'orc recule d'un pas en grondant."],
+        "heavy": ["L'orc titube, sonné !", "L'orc pose un genou à terre !"],
+        "kill": ["L'orc s'effondre dans un dernier grognement."],
+    },
+    "gobelin": {
+        "light": [
+            "Le gobelin glapit et sautille hors de portée.",
+            "Le gobelin ricane.",
+        ],
+        "solid": [
+            "Le gobelin couine de douleur !",
+            "Le gobelin roule au sol et se relève.",
+        ],
+        "heavy": [
+            "Le gobelin est projeté en arrière !",
+            "Le gobelin lâche presque son arme !",
+        ],
+        "kill": ["Le gobelin détale... puis s'écroule."],
+    },
+    "troll": {
+        "light": [
+            "Le troll ne semble rien sentir.",
+            "La peau du troll se referme déjà.",
+        ],
+        "solid": ["Le troll mugit et frappe le sol.", "Le troll recule, furieux."],
+        "heavy": ["Le troll chancelle comme un arbre sous la tempête !"],
+        "kill": ["Le troll s'abat dans un fracas qui fait trembler le sol."],
+    },
+    "loup-garou": {
+        "light": ["Le loup-garou gronde, babines retroussées."],
+        "solid": [
+            "Le loup-garou hurle de douleur !",
+            "Le loup-garou bondit en arrière.",
+        ],
+        "heavy": ["Le loup-garou gémit et vacille !"],
+        "kill": ["Le loup-garou pousse un dernier hurlement et s'effondre."],
+    },
+    "dragon": {
+        "light": [
+            "Les écailles du dragon encaissent le coup.",
+            "Le dragon plisse les yeux.",
+        ],
+        "solid": ["Le dragon rugit, faisant trembler la caverne !"],
+        "heavy": ["Le dragon rugit de douleur, ses ailes battent l'air !"],
+        "kill": ["Le dragon s'écrase dans un nuage de poussière et de braises."],
+    },
+    "araignée": {
+        "light": ["L'araignée siffle et recule sur ses longues pattes."],
+        "solid": ["L'araignée se tord en crissant !"],
+        "heavy": ["L'araignée perd l'équilibre, ses pattes s'emmêlent !"],
+        "kill": ["L'araignée se recroqueville, immobile."],
+    },
+    "spectre": {
+        "light": ["Le spectre ondule, à peine troublé."],
+        "solid": ["Le spectre pousse un cri glaçant !"],
+        "heavy": ["Le spectre se déchire en lambeaux de brume !"],
+        "kill": ["Le spectre se dissipe dans un long soupir."],
+    },
+}
+
+_DEFAULT_REACTIONS = {
+    "light": ["$enemy serre les dents."],
+    "solid": ["$enemy recule sous le choc !"],
+    "heavy": ["$enemy vacille dangereusement !"],
+    "kill": ["$enemy s'effondre."],
+}
+
+_INTRO = [
+    "À $location, $enemies surgissent devant $player ! Le combat commence !",
+    "$player dégaine : $enemies barrent la route à $location !",
+    "Un cri retentit à $location : $enemies attaquent $player !",
+]
+
+
+def _compile(phrases: List[str]) -> List[Template]:
+    return [Template(phrase) for phrase in phrases]
+
+
+HIT_PHRASES = {band: _compile(phrases) for band, phrases in _HIT.items()}
+CRIT_PHRASES = _compile(_CRIT)
+SPELL_PHRASES = {band: _compile(phrases) for band, phrases in _SPELL.items()}
+REACTIONS = {
+    enemy_type: {band: _compile(phrases) for band, phrases in bands.items()}
+    for enemy_type, bands in _REACTIONS.items()
+}
+DEFAULT_REACTIONS = {band: _compile(p) for band, p in _DEFAULT_REACTIONS.items()}
+INTRO_PHRASES = _compile(_INTRO)
+
+
+def damage_band(damage: int, max_hp: int) -> str:
+    """light / solid / heavy, relative to the target's max HP"""
+    ratio = damage / max(1, max_hp)
+    return next(band for limit, band in DAMAGE_BANDS if ratio < limit)
+
+
+class CombatNarrator:
+    """
+    Renders routine combat lines from the phrase bank
+
+    Usage:
+        narrator = CombatNarrator()
+        text = narrator.attack(player, enemy, damage=12, crit=False)
+    """
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng or random.Random()
+        self.stats = {"rendered": 0}
+
+    def intro(self, player: Player, enemies: List[Enemy], location: str) -> str:
+        """Instant combat opening line"""
+        return self._render(
+            INTRO_PHRASES,
+            player=player.name,
+            enemies=", ".join(enemy.name for enemy in enemies),
+            location=location or "l'horizon",
+        )
+
+    def attack(
+        self,
+        player: Player,
+        enemy: Enemy,
+        damage: int,
+        crit: bool = False,
+        weapon: Optional[str] = None,
+    ) -> str:
+        """Weapon attack line (critical hit and kill variants)"""
+        band = damage_band(damage, enemy.max_hp)
+        phrases = CRIT_PHRASES if crit else HIT_PHRASES[band]
+        return self._render(
+            phrases,
+            player=player.name,
+            enemy=enemy.name,
+            weapon=weapon or "ses poings",
+            damage=damage,
+            reaction=self._reaction(enemy, band),
+        )
+
+    def spell(self, player: Player, enemy: Enemy, spell_id: str, damage: int) -> str:
+        """Offensive spell line"""
+        band = damage_band(damage, enemy.max_hp)
+        return self._render(
+            SPELL_PHRASES[band],
+            player=player.name,
+            enemy=enemy.name,
+            spell=SPELL_NAMES.get(spell_id, spell_id.replace("_", " ")),
+            damage=damage,
+            reaction=self._reaction(enemy, band),
+        )
+
+    def _reaction(self, enemy: Enemy, band: str) -> str:
+        if not enemy.is_alive():
+            band = "kill"
+        enemy_type = getattr(enemy.type, "value", enemy.type)
+        phrases = REACTIONS.get(enemy_type, DEFAULT_REACTIONS)[band]
+        return self.rng.choice(phrases).safe_substitute(enemy=enemy.name)
+
+    def _render(self, phrases: List[Template], **values) -> str:
+        self.stats["rendered"] += 1
+        return self.rng.choice(phrases).safe_substitute(**values)
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
@@ -16,6 +16,8 @@ Sources:
 """
 
 import re
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Dict, List, Optional, Set, Tuple
@@ -83,18 +85,31 @@ class ContentFilter:
     - Discrimination always filtered
     """
 
-    def __init__(self, target_age: int = 16, strict_mode: bool = True):
+    def __init__(
+        self, target_age: int = 16, strict_mode: bool = True, cache_size: int = 1024
+    ):
         """
         Initialize content filter
 
         Args:
             target_age: Target audience age (default 10)
             strict_mode: If True, err on side of caution
+            cache_size: Number of filter results kept (LRU)
         """
         self.target_age = target_age
         self.strict_mode = strict_mode
         self._init_patterns()
         self._init_word_lists()
+        self._build_matchers()
+
+        # Result cache: identical text is never scanned twice for the same
+        # filter configuration (bumped by add_blacklist_words)
+        self.version = 0
+        self.cache_size = cache_size
+        self._results: "OrderedDict[Tuple[int, bool, str], FilterResult]" = (
+            OrderedDict()
+        )
+        self.stats = {"hits": 0, "misses": 0, "scan_time": 0.0}
 
     def _init_patterns(self):
         """Initialize regex patterns for detection - PEGI 16 (permissive)"""
@@ -142,6 +157,16 @@ class ContentFilter:
             r"\b(antisémit\w*|xénophob\w*)\b",
         ]
 
+        # Prompt injection attempts (player input only)
+        self.injection_patterns = [
+            r"ignore.*instructions",
+            r"oublie.*règles",
+            r"tu es maintenant",
+            r"nouveau.*rôle",
+            r"système.*prompt",
+            r"</?(system|user|assistant)",
+        ]
+
         # Compile all patterns
         self._compiled_patterns = {
             ContentCategory.VIOLENCE: [
@@ -200,6 +225,70 @@ class ContentFilter:
             "porno": "contenu adulte",
         }
 
+    def _build_matchers(self):
+        """
+        Build the combined matchers once (category patterns + blacklist)
+
+        `_detector` is a single alternation where every category pattern and
+        the blacklist is a named group (`_groups` maps group name -> category
+        and source pattern). One scan tells whether a text needs filtering
+        at all, the common case for AI narratives; on a hit the same matcher
+        yields the category violations (`match.lastgroup`) and applies the
+        replacements in a single `sub` pass.
+
+        `sub` only sees the leftmost alternative at each position, so a word
+        also covered by a category pattern (e.g. "pédophile") would never
+        reach the blacklist group: `_blacklist_detector` is checked on its
+        own on every hit so blacklisted words are always reported as HIGH.
+        """
+        self._groups: Dict[str, Tuple[Optional[ContentCategory], str]] = {}
+        alternatives = []
+        for category, patterns in self._compiled_patterns.items():
+            for pattern in patterns:
+                name = f"p{len(self._groups)}"
+                self._groups[name] = (category, pattern.pattern)
+                alternatives.append(f"(?P<{name}>{pattern.pattern})")
+
+        words = sorted(self.blacklist, key=len, reverse=True)
+        self._blacklist_detector = None
+        if words:
+            blacklist = rf"\b(?P<blacklist>{'|'.join(map(re.escape, words))})\b"
+            self._blacklist_detector = re.compile(blacklist, re.IGNORECASE)
+            self._groups["blacklist"] = (None, "blacklist")
+            alternatives.append(blacklist)
+        self._detector = (
+            re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+        )
+
+        self._injection_groups = {
+            f"i{index}": pattern
+            for index, pattern in enumerate(self.injection_patterns)
+        }
+        self._injection_detector = re.compile(
+            "|".join(f"(?P<{name}>{p})" for name, p in self._injection_groups.items()),
+            re.IGNORECASE,
+        )
+
+    def add_blacklist_words(self, words: List[str]) -> bool:
+        """
+        Merge extra blacklist words (e.g. config `blacklist_words`)
+
+        Rebuilds the matchers and invalidates cached results only when a new
+        word is actually added.
+
+        Returns:
+            True if the blacklist changed
+        """
+        new_words = {w.strip().lower() for w in words if w.strip()} - self.blacklist
+        if not new_words:
+            return False
+        self.blacklist |= new_words
+        self._build_matchers()
+        self.version += 1
+        self._results.clear()
+        logger.info(f"Blacklist extended: {sorted(new_words)}")
+        return True
+
     def filter_input(self, text: str) -> FilterResult:
         """
         Filter player input before sending to AI
@@ -223,42 +312,32 @@ class ContentFilter:
                 severity=Severity.SAFE,
             )
 
-        violations = []
-        filtered_text = text
-        max_severity = Severity.SAFE
-
-        # Check for prompt injection attempts
-        injection_patterns = [
-            r"ignore.*instructions",
-            r"oublie.*règles",
-            r"tu es maintenant",
-            r"nouveau.*rôle",
-            r"système.*prompt",
-            r"</?(system|user|assistant)",
-        ]
-
-        for pattern in injection_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                violations.append(
-                    {
-                        "category": "INJECTION",
-                        "pattern": pattern,
-                        "severity": Severity.EXTREME.name,
-                    }
-                )
-                max_severity = Severity.EXTREME
-                # Replace entire input for injection attempts
-                filtered_text = "Je continue mon aventure."
+        return self._cached(text, is_input=True)
 
-        # If injection detected, return immediately
-        if max_severity == Severity.EXTREME:
+    def _scan_input(self, text: str) -> FilterResult:
+        """Input scan: prompt injection first, then standard filtering"""
+        # Check for prompt injection attempts (single scan, details on hit)
+        if self._injection_detector.search(text):
+            patterns = dict.fromkeys(
+                self._injection_groups[match.lastgroup]
+                for match in self._injection_detector.finditer(text)
+            )
+            violations = [
+                {
+                    "category": "INJECTION",
+                    "pattern": pattern,
+                    "severity": Severity.EXTREME.name,
+                }
+                for pattern in patterns
+            ]
             logger.warning(f"Prompt injection attempt blocked: {text[:50]}...")
+            # Replace entire input for injection attempts
             return FilterResult(
                 is_safe=False,
                 original_text=text,
-                filtered_text=filtered_text,
+                filtered_text="Je continue mon aventure.",
                 violations=violations,
-                severity=max_severity,
+                severity=Severity.EXTREME,
             )
 
         # Standard content filtering
@@ -287,7 +366,50 @@ class ContentFilter:
                 severity=Severity.SAFE,
             )
 
-        return self._filter_content(text, is_input=False)
+        return self._cached(text, is_input=False)
+
+    def _cached(self, text: str, is_input: bool) -> FilterResult:
+        """
+        Filter through the result cache
+
+        Cached FilterResult objects are shared between callers and must be
+        treated as read-only.
+        """
+        key = (self.version, is_input, text)
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            self.stats["hits"] += 1
+            return result
+
+        start = time.perf_counter()
+        if is_input:
+            result = self._scan_input(text)
+        else:
+            result = self._filter_content(text, is_input=False)
+        self.stats["scan_time"] += time.perf_counter() - start
+        self.stats["misses"] += 1
+
+        self._results[key] = result
+        if len(self._results) > self.cache_size:
+            self._results.popitem(last=False)
+        return result
+
+    def get_stats(self) -> Dict:
+        """Filter cost and cache efficiency"""
+        hits, misses = self.stats["hits"], self.stats["misses"]
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+            "scan_time_ms": round(self.stats["scan_time"] * 1000, 3),
+            "avg_scan_us": (
+                round(self.stats["scan_time"] / misses * 1e6, 1) if misses else 0.0
+            ),
+            "cached_results": len(self._results),
+            "version": self.version,
+        }
 
     def _filter_content(self, text: str, is_input: bool = False) -> FilterResult:
         """
@@ -300,35 +422,39 @@ class ContentFilter:
         Returns:
             FilterResult
         """
+        # Fast path: one scan over all blacklist words and category patterns
+        if self._detector is None or not self._detector.search(text):
+            return FilterResult(
+                is_safe=True,
+                original_text=text,
+                filtered_text=text,
+                severity=Severity.SAFE,
+            )
+
         violations = []
-        filtered_text = text
         max_severity = Severity.SAFE
-
         text_lower = text.lower()
 
-        # Step 1: Check blacklist (fast lookup with word boundaries)
-        for word in self.blacklist:
-            # Use word boundary regex to avoid false positives (e.g., "ass" in "passage")
-            pattern = re.compile(rf"\b{re.escape(word)}\b", re.IGNORECASE)
-            if pattern.search(text_lower):
-                # Check if it's actually in the whitelist context
-                if not self._is_whitelisted_context(text_lower, word):
-                    violations.append(
-                        {
-                            "category": "BLACKLIST",
-                            "word": word,
-                            "severity": Severity.HIGH.name,
-                        }
-                    )
-                    max_severity = max(
-                        max_severity, Severity.HIGH, key=lambda x: x.value
-                    )
-
-                    # Apply replacement if available
-                    replacement = self.safe_replacements.get(word, "...")
-                    filtered_text = pattern.sub(replacement, filtered_text)
-
-        # Step 2: Check regex patterns by category
+        # Step 1: blacklist, independently of the category patterns
+        blacklisted: Set[str] = set()
+        if self._blacklist_detector is not None:
+            for match in self._blacklist_detector.finditer(text):
+                word = match.group(0).lower()
+                # Word boundaries avoid "ass" in "passage"
+                if word in blacklisted or self._is_whitelisted_context(
+                    text_lower, word
+                ):
+                    continue
+                blacklisted.add(word)
+                violations.append(
+                    {
+                        "category": "BLACKLIST",
+                        "word": word,
+                        "severity": Severity.HIGH.name,
+                    }
+                )
+                max_severity = Severity.HIGH
+
         # Categories that should NEVER be whitelisted by context
         never_whitelist = {
             ContentCategory.LANGUAGE,
@@ -337,36 +463,37 @@ class ContentFilter:
             ContentCategory.DRUGS,
         }
 
-        for category, patterns in self._compiled_patterns.items():
-            for pattern in patterns:
-                matches = pattern.findall(text)
-                for match in matches:
-                    match_str = match if isinstance(match, str) else match[0]
-
-                    # Skip if whitelisted (but never for certain categories)
-                    if category not in never_whitelist:
-                        if self._is_whitelisted_context(text_lower, match_str.lower()):
-                            continue
-
-                    severity = self._get_category_severity(category)
-                    violations.append(
-                        {
-                            "category": category.value,
-                            "match": match_str,
-                            "pattern": pattern.pattern,
-                            "severity": severity.name,
-                        }
-                    )
-                    max_severity = max(max_severity, severity, key=lambda x: x.value)
-
-                    # Apply safe replacement
-                    replacement = self.safe_replacements.get(match_str.lower(), "...")
-                    filtered_text = re.sub(
-                        rf"\b{re.escape(match_str)}\b",
-                        replacement,
-                        filtered_text,
-                        flags=re.IGNORECASE,
-                    )
+        def replace(match: re.Match) -> str:
+            nonlocal max_severity
+            category, pattern = self._groups[match.lastgroup]
+            term = match.group(match.lastgroup)
+            term_lower = term.lower()
+
+            if category is None:
+                # Blacklist: already reported in step 1, only replaced here
+                if term_lower not in blacklisted:
+                    return match.group(0)
+                return self.safe_replacements.get(term_lower, "...")
+
+            # Skip if whitelisted (but never for certain categories)
+            if category not in never_whitelist and self._is_whitelisted_context(
+                text_lower, term_lower
+            ):
+                return match.group(0)
+            severity = self._get_category_severity(category)
+            violations.append(
+                {
+                    "category": category.value,
+                    "match": term,
+                    "pattern": pattern,
+                    "severity": severity.name,
+                }
+            )
+            max_severity = max(max_severity, severity, key=lambda x: x.value)
+            return self.safe_replacements.get(term_lower, "...")
+
+        # Step 2: category violations and safe replacements in the same pass
+        filtered_text = self._detector.sub(replace, text)
 
         # Step 3: Final safety check
         is_safe = max_severity.value <= Severity.MILD.value
@@ -491,6 +618,78 @@ class ContentFilter:
         return result.is_safe, result.filtered_text, issues
 
 
+class IncrementalFilter:
+    """
+    Sentence-by-sentence output filtering for streamed narratives
+
+    Streamed text is buffered until a sentence boundary; complete sentences
+    are then filtered and released, so nothing reaches the player unfiltered.
+
+    Usage:
+        stream_filter = IncrementalFilter(get_content_filter())
+        for delta in deltas:
+            safe_text = stream_filter.feed(delta)
+        safe_text = stream_filter.flush()
+    """
+
+    SENTENCE_END = re.compile(r"[.!?…]+[\"»)]*\s+")
+
+    def __init__(self, content_filter: ContentFilter):
+        self.content_filter = content_filter
+        self.violations: List[Dict] = []
+        self.is_safe = True
+        self.severity = Severity.SAFE
+        self._buffer = ""
+
+    def feed(self, text: str) -> str:
+        """
+        Add streamed text
+
+        Returns:
+            Filtered text of the sentences completed by this chunk ("" if none)
+        """
+        self._buffer += text
+        last_end = None
+        for match in self.SENTENCE_END.finditer(self._buffer):
+            last_end = match.end()
+        if last_end is None:
+            return ""
+        ready, self._buffer = self._buffer[:last_end], self._buffer[last_end:]
+        return self._release(ready)
+
+    def flush(self) -> str:
+        """Filter and release whatever is left (end of stream)"""
+        ready, self._buffer = self._buffer, ""
+        return self._release(ready)
+
+    def _release(self, text: str) -> str:
+        if not text.strip():
+            return text
+        result = self.content_filter.filter_output(text)
+        if not result.is_safe:
+            self.is_safe = False
+        if result.severity.value > self.severity.value:
+            self.severity = result.severity
+        self.violations.extend(result.violations)
+
+        filtered = result.filtered_text
+        # Keep the separator so released chunks concatenate cleanly
+        trailing = text[len(text.rstrip()) :]
+        if trailing and not filtered.endswith(trailing):
+            filtered = filtered.rstrip() + trailing
+        return filtered
+
+    def result(self, original_text: str, filtered_text: str) -> FilterResult:
+        """Aggregated result of the whole stream (no rescan)"""
+        return FilterResult(
+            is_safe=self.is_safe,
+            original_text=original_text,
+            filtered_text=filtered_text,
+            violations=self.violations,
+            severity=self.severity,
+        )
+
+
 # Singleton instance
 _filter_instance: Optional[ContentFilter] = None
 
@@ -0,0 +1,274 @@
+"""
+Magasin de contenu généré (descriptions de lieux, quêtes...) dans un seul
+fichier SQLite
+
+Remplace un fichier JSON par clé (une ouverture/écriture/renommage par
+entrée) par une table indexée, partagée entre workers (WAL):
+- Espaces de noms: une même clé peut exister pour les lieux et les quêtes
+- Échéance (TTL) par entrée; une entrée expirée reste lisible via
+  `get_entry` (stale-while-revalidate) jusqu'à `stale_grace` secondes
+- Taille bornée (`max_bytes`): au-delà, les entrées expirées puis les moins
+  récemment lues sont supprimées. La taille est suivie en mémoire (recalée
+  sur la table toutes les `resync_every` écritures, pour les écritures des
+  autres workers) et la date de lecture n'est réécrite qu'après
+  `touch_interval` secondes: une lecture n'est en général qu'un SELECT
+- Compaction (VACUUM) une fois qu'une part suffisante du fichier a été
+  libérée, le fichier ne grossit donc pas indéfiniment
+"""
+
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..config import get_config
+from .persistence import get_engine
+
+config = get_config()
+
+
+class ContentStore:
+    """
+    Usage:
+        store = ContentStore("content_store.db", max_bytes=64 * 1024 * 1024)
+        store.put("locations", "Absalom", {"description": "..."}, ttl=7200)
+        store.get("locations", "Absalom")
+    """
+
+    def __init__(
+        self,
+        db_path: str = "content_store.db",
+        max_bytes: int = 64 * 1024 * 1024,
+        stale_grace: float = 7 * 24 * 3600,
+        compact_ratio: float = 0.25,
+        touch_interval: float = 60.0,
+        resync_every: int = 256,
+    ):
+        self.engine = get_engine(db_path)
+        self.max_bytes = max_bytes
+        self.stale_grace = stale_grace
+        # Compaction quand les octets libérés dépassent cette part de max_bytes
+        self.compact_ratio = compact_ratio
+        self.touch_interval = touch_interval
+        self.resync_every = resync_every
+        self._freed = 0
+        self._writes_since_sync = 0
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "compactions": 0,
+        }
+        self.init_db()
+        self._size = self._table_size()
+
+    def init_db(self):
+        self.engine.execute(
+            """
+            CREATE TABLE IF NOT EXISTS content (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires REAL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self.engine.execute(
+            "CREATE INDEX IF NOT EXISTS idx_content_access ON content(last_access)"
+        )
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Valeur encore fraîche, sinon None"""
+        entry = self.get_entry(namespace, key)
+        if entry is None or (entry[1] is not None and entry[1] <= time.time()):
+            return None
+        return entry[0]
+
+    def get_entry(
+        self, namespace: str, key: str
+    ) -> Optional[Tuple[Any, Optional[float]]]:
+        """(valeur, échéance), y compris expirée; None si absente"""
+        now = time.time()
+        row = self.engine.fetchone(
+            "SELECT value, expires, last_access FROM content "
+            "WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        )
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        value, expires, last_access = row
+        self.stats[
+            "stale_hits" if expires is not None and expires <= now else "hits"
+        ] += 1
+        # L'ordre LRU n'a pas besoin d'être plus précis que touch_interval
+        if now - last_access >= self.touch_interval:
+            self.engine.execute(
+                "UPDATE content SET last_access = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key),
+            )
+        return json.loads(value), expires
+
+    def put(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        """Écrit (ou remplace) une entrée; ttl None = sans échéance"""
+        self.put_many(namespace, [(key, value, ttl)])
+
+    def put_many(
+        self,
+        namespace: str,
+        entries: Iterable[Tuple[str, Any, Optional[float]]],
+        replace: bool = True,
+    ) -> int:
+        """Plusieurs entrées en une transaction; replace=False garde l'existant"""
+        now = time.time()
+        rows = []
+        for key, value, ttl in entries:
+            payload = json.dumps(value, ensure_ascii=False)
+            expires = now + ttl if ttl is not None else None
+            rows.append((namespace, key, payload, len(payload.encode()), expires, now))
+        if not rows:
+            return 0
+        existing = self._sizes(namespace, [row[1] for row in rows])
+        if replace:
+            delta = sum(row[3] - existing.get(row[1], 0) for row in rows)
+        else:
+            delta = sum(row[3] for row in rows if row[1] not in existing)
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        self.engine.executemany(
+            f"{verb} INTO content (namespace, key, value, size, expires, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        self._size += delta
+        self.stats["writes"] += len(rows)
+        self._writes_since_sync += len(rows)
+        if self._writes_since_sync >= self.resync_every:
+            self._size = self._table_size()
+            self._writes_since_sync = 0
+        self.evict()
+        return len(rows)
+
+    def _sizes(self, namespace: str, keys: List[str]) -> Dict[str, int]:
+        """Taille actuelle des clés déjà présentes (recherche par clé primaire)"""
+        placeholders = ", ".join("?" * len(keys))
+        return dict(
+            self.engine.fetchall(
+                f"SELECT key, size FROM content WHERE namespace = ? "
+                f"AND key IN ({placeholders})",
+                (namespace, *keys),
+            )
+        )
+
+    async def aput(
+        self, namespace: str, key: str, value: Any, ttl: Optional[float] = None
+    ):
+        """put() dans le thread I/O, sans bloquer la boucle"""
+        await self.engine.run(self.put, namespace, key, value, ttl)
+
+    def delete(self, namespace: str, key: str):
+        self._size -= self._sizes(namespace, [key]).get(key, 0)
+        self.engine.execute(
+            "DELETE FROM content WHERE namespace = ? AND key = ?", (namespace, key)
+        )
+
+    def size(self) -> int:
+        """Octets des valeurs stockées (total suivi en mémoire)"""
+        return self._size
+
+    def _table_size(self) -> int:
+        return self.engine.fetchone("SELECT COALESCE(SUM(size), 0) FROM content")[0]
+
+    def count(self, namespace: Optional[str] = None) -> int:
+        if namespace is None:
+            return self.engine.fetchone("SELECT COUNT(*) FROM content")[0]
+        return self.engine.fetchone(
+            "SELECT COUNT(*) FROM content WHERE namespace = ?", (namespace,)
+        )[0]
+
+    def evict(self) -> int:
+        """
+        Ramène le magasin sous max_bytes: entrées expirées depuis plus de
+        stale_grace, puis les moins récemment lues
+        """
+        if self._size <= self.max_bytes:
+            return 0
+        # Total exact avant de supprimer (écritures des autres workers)
+        self._size = self._table_size()
+        self._writes_since_sync = 0
+        if self._size <= self.max_bytes:
+            return 0
+        removed = self.purge_expired()
+        total = self._size
+        rows = self.engine.fetchall(
+            "SELECT namespace, key, size FROM content ORDER BY last_access"
+        )
+        victims = []
+        for namespace, key, size in rows:
+            if total <= self.max_bytes:
+                break
+            victims.append((namespace, key))
+            total -= size
+            self._freed += size
+        if victims:
+            self.engine.executemany(
+                "DELETE FROM content WHERE namespace = ? AND key = ?", victims
+            )
+        self._size = total
+        self.stats["evictions"] += len(victims)
+        if self._freed >= self.max_bytes * self.compact_ratio:
+            self.compact()
+        return removed + len(victims)
+
+    def purge_expired(self) -> int:
+        """Supprime les entrées expirées depuis plus de stale_grace"""
+        where = "expires IS NOT NULL AND expires < ?"
+        params = (time.time() - self.stale_grace,)
+        freed = self.engine.fetchone(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM content WHERE {where}",
+            params,
+        )
+        if freed[0]:
+            self.engine.execute(f"DELETE FROM content WHERE {where}", params)
+            self._size -= freed[1]
+            self._freed += freed[1]
+            self.stats["evictions"] += freed[0]
+        return freed[0]
+
+    def compact(self):
+        """Rend au système l'espace libéré (VACUUM) et tronque le journal WAL"""
+        self.engine.execute("VACUUM")
+        self.engine.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._freed = 0
+        self.stats["compactions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "entries": self.count(),
+            "bytes": self.size(),
+            "max_bytes": self.max_bytes,
+        }
+
+
+# Singleton
+_store_instance: Optional[ContentStore] = None
+
+
+def get_content_store() -> ContentStore:
+    """Magasin configuré (`content_store` dans config.yaml)"""
+    global _store_instance
+    if _store_instance is None:
+        options = dict(config.get("content_store", {}))
+        max_mb = options.pop("max_mb", 64)
+        _store_instance = ContentStore(max_bytes=int(max_mb * 1024 * 1024), **options)
+    return _store_instance
+
+
+def reset_content_store():
+    """Reset pour tests"""
+    global _store_instance
+    _store_instance = None
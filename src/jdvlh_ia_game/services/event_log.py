@@ -0,0 +1,196 @@
+"""
+Journal d'événements parental (append-only) pour JDVLH IA Game
+
+Remplace la liste `logs` stockée dans l'état de jeu:
+- Table dédiée `parental_events`, indexée par (player_id, ts)
+- Ajout O(1) en mémoire, écrit par lots (une transaction par lot)
+- Requêtes par joueur et par plage de temps
+- Rétention par nombre d'événements par joueur et par âge
+"""
+
+import asyncio
+import datetime
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .persistence import get_engine
+
+logger = logging.getLogger(__name__)
+
+INSERT_EVENT = (
+    "INSERT INTO parental_events (player_id, ts, event, details) VALUES (?, ?, ?, ?)"
+)
+DELETE_OLDER_THAN = "DELETE FROM parental_events WHERE ts < ?"
+DELETE_OVER_COUNT = """
+    DELETE FROM parental_events WHERE id IN (
+        SELECT id FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY player_id ORDER BY ts DESC, id DESC
+            ) AS rank
+            FROM parental_events
+        ) WHERE rank > ?
+    )
+"""
+
+
+class EventLog:
+    """Journal append-only des événements de session par joueur"""
+
+    def __init__(
+        self,
+        db_path: str,
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        max_events_per_player: int = 1000,
+        max_age_days: float = 30,
+    ):
+        self.engine = get_engine(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_events_per_player = max_events_per_player
+        self.max_age_days = max_age_days
+        self.pending: List[Tuple[str, float, str, str]] = []
+        self.init_db()
+
+    def init_db(self):
+        self.engine.execute(
+            """
+            CREATE TABLE IF NOT EXISTS parental_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                player_id TEXT NOT NULL,
+                ts REAL NOT NULL,
+                event TEXT NOT NULL,
+                details TEXT
+            )
+        """
+        )
+        self.engine.execute(
+            "CREATE INDEX IF NOT EXISTS idx_parental_events_player_ts "
+            "ON parental_events (player_id, ts)"
+        )
+
+    def append(
+        self,
+        player_id: str,
+        event: str,
+        details: Optional[Dict] = None,
+        timestamp: Optional[float] = None,
+    ):
+        """Ajoute un événement (écrit au prochain lot)"""
+        self.pending.append(
+            (
+                player_id,
+                timestamp if timestamp is not None else time.time(),
+                event,
+                json.dumps(details or {}, ensure_ascii=False),
+            )
+        )
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """Écrit les événements en attente en une transaction"""
+        rows, self.pending = self.pending, []
+        if rows:
+            try:
+                self.engine.executemany(INSERT_EVENT, rows)
+            except Exception:
+                self.pending = rows + self.pending
+                raise
+        return len(rows)
+
+    async def flush_async(self) -> int:
+        rows, self.pending = self.pending, []
+        if rows:
+            try:
+                await self.engine.run(self.engine.executemany, INSERT_EVENT, rows)
+            except Exception:
+                self.pending = rows + self.pending
+                raise
+        return len(rows)
+
+    def get_events(
+        self,
+        player_id: str,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Événements d'un joueur, du plus ancien au plus récent
+
+        Args:
+            since/until: Bornes (timestamps epoch) optionnelles
+            limit: Ne garder que les `limit` plus récents
+        """
+        self.flush()
+        return self._select_events(player_id, since, until, limit)
+
+    async def get_events_async(
+        self,
+        player_id: str,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """get_events() dans le thread I/O, sans bloquer la boucle"""
+        await self.flush_async()
+        return await self.engine.run(
+            self._select_events, player_id, since, until, limit
+        )
+
+    def _select_events(
+        self,
+        player_id: str,
+        since: Optional[float],
+        until: Optional[float],
+        limit: Optional[int],
+    ) -> List[Dict[str, Any]]:
+        sql = "SELECT ts, event, details FROM parental_events WHERE player_id = ?"
+        params: List[Any] = [player_id]
+        if since is not None:
+            sql += " AND ts >= ?"
+            params.append(since)
+        if until is not None:
+            sql += " AND ts <= ?"
+            params.append(until)
+        sql += " ORDER BY ts DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows = self.engine.fetchall(sql, params)
+        return [
+            {
+                "timestamp": datetime.datetime.fromtimestamp(ts).isoformat(),
+                "event": event,
+                "details": json.loads(details) if details else {},
+            }
+            for ts, event, details in reversed(rows)
+        ]
+
+    def apply_retention(self) -> int:
+        """Supprime les événements trop anciens ou au-delà du quota par joueur"""
+        cutoff = time.time() - self.max_age_days * 86400
+        removed = self.engine.execute(DELETE_OLDER_THAN, (cutoff,)).rowcount
+        removed += self.engine.execute(
+            DELETE_OVER_COUNT, (self.max_events_per_player,)
+        ).rowcount
+        return removed
+
+    async def run_flusher(self):
+        """Flush périodique des lots + rétention (toutes les ~minutes)"""
+        last_retention = time.time()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush_async()
+                if time.time() - last_retention >= 60:
+                    last_retention = time.time()
+                    removed = await self.engine.run(self.apply_retention)
+                    if removed:
+                        logger.info(f"Rétention logs parentaux: {removed} supprimés")
+            except Exception as e:
+                logger.error(f"Flush logs parentaux échoué: {e}")
@@ -0,0 +1,282 @@
+"""
+Client LLM asynchrone pour JDVLH IA Game
+
+Remplace les appels bloquants `ollama.generate` dans les handlers async:
+- Un seul `ollama.AsyncClient` partagé (pool de connexions httpx)
+- Timeout par appel (config `ollama.timeout`)
+- Annulation propre: si la tâche appelante est annulée (déconnexion
+  WebSocket), la requête HTTP en cours est abandonnée
+- Chaque appel passe par l'ordonnanceur (LLMScheduler): places limitées
+  par modèle, priorités, délestage (LLMOverloadedError)
+- Requêtes identiques en cours regroupées (coalesce=True): une seule
+  génération partagée, gardée quelques secondes si la température est basse
+- Latence, tokens/s et erreurs de chaque génération remontés au ModelRouter
+- ollama et httpx (~0,2 s d'import) ne sont importés qu'à la première
+  génération, pas au démarrage du worker
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from ..config import get_config
+from .llm_scheduler import LLMScheduler, Priority
+from .model_router import get_router
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+config = get_config()
+
+
+class LLMTimeoutError(Exception):
+    """Génération LLM trop longue (timeout dépassé)"""
+
+
+class LLMClient:
+    """Client Ollama asynchrone partagé par tous les services"""
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+    ):
+        ollama_config = config["ollama"]
+        self.host = host or ollama_config.get("host")
+        self.timeout = timeout or ollama_config.get("timeout", 60)
+        self.max_connections = max_connections or ollama_config.get(
+            "max_connections", 10
+        )
+        self.scheduler = LLMScheduler(**config.get("llm_scheduler", {}))
+        coalescing = dict(config.get("llm_coalescing", {}))
+        self.cache_max_temperature = coalescing.pop("max_temperature", 0.4)
+        self.single_flight = SingleFlight(**coalescing)
+        self.router = get_router()
+        self._client = None
+        self._transport = None
+
+    def _ollama(self):
+        """Client Ollama partagé, créé au premier appel"""
+        if self._client is None:
+            import httpx
+            import ollama
+
+            # Pool de connexions possédé ici (transport httpx public): close()
+            # le ferme sans passer par les attributs internes d'ollama
+            self._transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                )
+            )
+            # Le timeout httpx est une borne haute; le timeout effectif est
+            # géré par asyncio.wait_for pour pouvoir être ajusté par appel
+            self._client = ollama.AsyncClient(
+                host=self.host,
+                timeout=httpx.Timeout(None, connect=10.0),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def generate(
+        self,
+        model: str,
+        prompt: str,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        player_id: Optional[str] = None,
+        coalesce: bool = False,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """
+        Génère une réponse complète sans bloquer la boucle d'événements
+
+        Args:
+            model: Nom du modèle Ollama
+            prompt: Prompt utilisateur
+            options: Options de génération (temperature, num_predict...)
+            timeout: Timeout en secondes (défaut: config `ollama.timeout`),
+                hors attente dans la file de l'ordonnanceur
+            priority: Classe de priorité dans la file
+            player_id: Joueur à l'origine de l'appel (file équitable)
+            coalesce: partager la génération avec les appels identiques
+                (modèle, prompt normalisé, options) en cours; résultat
+                réutilisé `llm_coalescing.cache_ttl` secondes si la
+                température ne dépasse pas `max_temperature`
+            **kwargs: Arguments Ollama additionnels (system, context, format...)
+
+        Returns:
+            Réponse Ollama (dict avec "response", "context", ...)
+
+        Raises:
+            LLMTimeoutError: si la génération dépasse le timeout
+            LLMOverloadedError: si l'attente en file dépasse son budget
+        """
+        timeout = timeout or self.timeout
+        if not coalesce:
+            return await self._generate(
+                model, prompt, options, timeout, priority, player_id, **kwargs
+            )
+
+        key = _request_key(model, prompt, options, kwargs)
+        temperature = (options or {}).get("temperature")
+        response = await self.single_flight.do(
+            key,
+            lambda: self._generate(
+                model, prompt, options, timeout, priority, player_id, **kwargs
+            ),
+            cache=temperature is not None and temperature <= self.cache_max_temperature,
+        )
+        return dict(response)
+
+    async def _generate(
+        self,
+        model: str,
+        prompt: str,
+        options: Optional[Dict[str, Any]],
+        timeout: float,
+        priority: Priority,
+        player_id: Optional[str],
+        **kwargs,
+    ) -> Dict[str, Any]:
+        try:
+            async with self.scheduler.slot(model, priority, player_id):
+                started = time.monotonic()
+                try:
+                    response = await asyncio.wait_for(
+                        self._ollama().generate(
+                            model=model, prompt=prompt, options=options, **kwargs
+                        ),
+                        timeout=timeout,
+                    )
+                except Exception:
+                    self.router.record_result(model, time.monotonic() - started, False)
+                    raise
+                self._record(model, started, response)
+                return response
+        except asyncio.TimeoutError as e:
+            logger.warning(f"Génération {model} > {timeout}s, abandon")
+            raise LLMTimeoutError(f"{model}: timeout après {timeout}s") from e
+
+    async def stream(
+        self,
+        model: str,
+        prompt: str,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        player_id: Optional[str] = None,
+        **kwargs,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Génère en streaming: produit les fragments Ollama au fil de l'eau
+
+        Le timeout s'applique à la génération complète (même budget que
+        `generate`), vérifié à chaque fragment.
+
+        La place dans l'ordonnanceur est gardée jusqu'à la fin du flux.
+
+        Raises:
+            LLMTimeoutError: si la génération dépasse le timeout
+            LLMOverloadedError: si l'attente en file dépasse son budget
+        """
+        timeout = timeout or self.timeout
+        async with self.scheduler.slot(model, priority, player_id):
+            started = time.monotonic()
+            chunks = self._stream(model, prompt, options, timeout, **kwargs)
+            try:
+                async for chunk in chunks:
+                    if chunk.get("done"):
+                        self._record(model, started, chunk)
+                    yield chunk
+            except Exception:
+                self.router.record_result(model, time.monotonic() - started, False)
+                raise
+            finally:
+                await chunks.aclose()
+
+    def _record(self, model: str, started: float, response: Dict[str, Any]):
+        """Mesures d'une génération réussie pour le routage adaptatif"""
+        self.router.record_result(
+            model,
+            time.monotonic() - started,
+            True,
+            response.get("eval_count"),
+            response.get("eval_duration"),
+        )
+
+    async def _stream(
+        self,
+        model: str,
+        prompt: str,
+        options: Optional[Dict[str, Any]],
+        timeout: float,
+        **kwargs,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        try:
+            chunks = await asyncio.wait_for(
+                self._ollama().generate(
+                    model=model, prompt=prompt, options=options, stream=True, **kwargs
+                ),
+                timeout=timeout,
+            )
+            try:
+                while True:
+                    chunk = await asyncio.wait_for(
+                        chunks.__anext__(), deadline - loop.time()
+                    )
+                    yield chunk
+                    if chunk.get("done"):
+                        return
+            except StopAsyncIteration:
+                return
+            finally:
+                # Ferme la réponse HTTP même si le consommateur s'arrête tôt
+                await chunks.aclose()
+        except asyncio.TimeoutError as e:
+            logger.warning(f"Streaming {model} > {timeout}s, abandon")
+            raise LLMTimeoutError(f"{model}: timeout après {timeout}s") from e
+
+    async def close(self):
+        """Ferme le pool de connexions (recréé au prochain appel)"""
+        if self._transport is not None:
+            await self._transport.aclose()
+        self._client = self._transport = None
+
+
+def _request_key(
+    model: str, prompt: str, options: Optional[Dict[str, Any]], kwargs: Dict
+) -> tuple:
+    """Clé de regroupement: prompt aux espaces normalisés, options triées"""
+    return (
+        model,
+        " ".join(prompt.split()),
+        json.dumps(options or {}, sort_keys=True, default=str),
+        json.dumps(kwargs, sort_keys=True, default=str),
+    )
+
+
+# Singleton
+_client_instance: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    """Singleton LLMClient"""
+    global _client_instance
+    if _client_instance is None:
+        _client_instance = LLMClient()
+        logger.info("LLMClient initialisé")
+    return _client_instance
+
+
+def reset_llm_client():
+    """Reset pour tests"""
+    global _client_instance
+    _client_instance = None
@@ -0,0 +1,182 @@
+"""
+Ordonnanceur des requêtes LLM pour JDVLH IA Game
+
+Coordonne tous les appels Ollama (tours, combats, quêtes, pré-génération):
+- Nombre borné de requêtes en cours par modèle
+- Classes de priorité: tour interactif > combat > quête > pré-génération
+- File équitable entre joueurs (tourniquet) dans une même priorité
+- Métriques: profondeur de file, attentes, délestages
+- Délestage: au-delà du budget d'attente de sa priorité, la requête lève
+  LLMOverloadedError et l'appelant sert sa réponse de repli habituelle
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, defaultdict, deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+
+class Priority(IntEnum):
+    """Classes de priorité (plus petit = servi en premier)"""
+
+    INTERACTIVE = 0
+    COMBAT = 1
+    QUEST = 2
+    PREGENERATION = 3
+
+
+class LLMOverloadedError(Exception):
+    """Attente en file au-delà du budget de la priorité (requête délestée)"""
+
+
+# Attente maximale en file par priorité (secondes, None = illimitée)
+DEFAULT_MAX_WAIT = {
+    Priority.INTERACTIVE: 20.0,
+    Priority.COMBAT: 10.0,
+    Priority.QUEST: 10.0,
+    Priority.PREGENERATION: None,
+}
+
+WAIT_SAMPLES = 1000
+
+
+class _ModelQueue:
+    """Requêtes en cours et en attente pour un modèle"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.queued = 0
+        # priorité -> joueur -> attentes (ordre des joueurs = tourniquet)
+        self.waiting: Dict[Priority, "OrderedDict[str, Deque[asyncio.Future]]"] = {
+            priority: OrderedDict() for priority in Priority
+        }
+
+    def next_waiter(self) -> Optional[asyncio.Future]:
+        """Prochaine attente: priorité la plus haute, joueur suivant du tourniquet"""
+        for priority in Priority:
+            players = self.waiting[priority]
+            while players:
+                player_id, waiters = next(iter(players.items()))
+                future = waiters.popleft()
+                if waiters:
+                    players.move_to_end(player_id)
+                else:
+                    del players[player_id]
+                if not future.done():
+                    return future
+        return None
+
+
+class LLMScheduler:
+    """
+    File d'attente des générations, partagée par tous les services
+
+    Usage:
+        async with scheduler.slot(model, Priority.COMBAT, player_id):
+            await client.generate(...)
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 4,
+        max_wait: Optional[Dict[str, Optional[float]]] = None,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_wait = dict(DEFAULT_MAX_WAIT)
+        for name, budget in (max_wait or {}).items():
+            self.max_wait[Priority[name.upper()]] = budget
+        self._queues: Dict[str, _ModelQueue] = defaultdict(_ModelQueue)
+        self.stats: Dict[str, Any] = {
+            "granted": defaultdict(int),
+            "shed": defaultdict(int),
+        }
+        self._waits: Dict[Priority, Deque[float]] = {
+            priority: deque(maxlen=WAIT_SAMPLES) for priority in Priority
+        }
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        model: str,
+        priority: Priority = Priority.INTERACTIVE,
+        player_id: Optional[str] = None,
+    ) -> AsyncIterator[None]:
+        """
+        Réserve une place pour `model` le temps du bloc
+
+        Raises:
+            LLMOverloadedError: si l'attente dépasse le budget de `priority`
+        """
+        await self._acquire(model, priority, player_id or "")
+        try:
+            yield
+        finally:
+            self._release(model)
+
+    async def _acquire(self, model: str, priority: Priority, player_id: str):
+        queue = self._queues[model]
+        start = time.monotonic()
+        if queue.in_flight < self.max_in_flight and not queue.queued:
+            queue.in_flight += 1
+            self._record(priority, start)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        queue.waiting[priority].setdefault(player_id, deque()).append(future)
+        queue.queued += 1
+        try:
+            await asyncio.wait_for(future, timeout=self.max_wait[priority])
+        except BaseException as e:
+            self._abandon(model, future)
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats["shed"][priority.name.lower()] += 1
+                raise LLMOverloadedError(
+                    f"{model}: file d'attente saturée ({priority.name.lower()})"
+                ) from e
+            raise
+        self._record(priority, start)
+
+    def _abandon(self, model: str, future: asyncio.Future):
+        """Attente interrompue (timeout, annulation)"""
+        if future.done() and not future.cancelled():
+            self._release(model)  # place accordée entre-temps: la rendre
+        else:
+            future.cancel()  # ignorée par next_waiter
+            self._queues[model].queued -= 1
+
+    def _release(self, model: str):
+        queue = self._queues[model]
+        queue.in_flight -= 1
+        while queue.in_flight < self.max_in_flight:
+            future = queue.next_waiter()
+            if future is None:
+                break
+            queue.queued -= 1
+            queue.in_flight += 1
+            future.set_result(None)
+
+    def _record(self, priority: Priority, start: float):
+        self.stats["granted"][priority.name.lower()] += 1
+        self._waits[priority].append(time.monotonic() - start)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Requêtes en cours/en file par modèle, attentes p50/p99 par priorité"""
+        waits = {}
+        for priority, samples in self._waits.items():
+            if samples:
+                ordered = sorted(samples)
+                waits[priority.name.lower()] = {
+                    "p50": ordered[len(ordered) // 2],
+                    "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+                }
+        return {
+            "models": {
+                model: {"in_flight": queue.in_flight, "queued": queue.queued}
+                for model, queue in self._queues.items()
+            },
+            "granted": dict(self.stats["granted"]),
+            "shed": dict(self.stats["shed"]),
+            "wait_seconds": waits,
+        }
@@ -0,0 +1,147 @@
+"""
+Index des lieux (gazetteer): texte libre du modèle -> lieu canonique
+
+Le modèle renvoie des lieux en texte libre ("Absalom, quartier des docks",
+"Sandpoint|Magnimar", "Varisia"). L'index les ramène au lieu canonique de
+`config["locations"]` (clé du cache de lieux):
+1. Découpage sur les séparateurs usuels (| , / ; parenthèses), premier
+   segment prioritaire
+2. Correspondance exacte d'un nom ou alias, accents et articles ignorés
+3. Alias contenu dans le segment ("absalom" dans "absalom quartier docks")
+4. Correspondance approchée: Jaccard sur trigrammes (fautes, pluriels)
+
+Résultats mémorisés (LRU): une résolution déjà vue est un accès dict.
+"""
+
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .response_cache import normalize, similarity, trigrams
+
+# Alias connus des lieux de Golarion (noms anglais, variantes, régions)
+GOLARION_ALIASES: Dict[str, List[str]] = {
+    "Absalom": ["cite des premieres lumieres", "city at the center of the world"],
+    "Magnimar": ["cite des monuments", "city of monuments"],
+    "Sandpoint": ["pointe de sable", "cathedrale de sandpoint"],
+    "Korvosa": ["citadelle de korvosa"],
+    "la forêt de Sombrelune": ["sombrelune", "bois de sombrelune"],
+    "les Terres Sauvages": ["terres sauvages", "wildlands", "contrees sauvages"],
+    "le désert du Katapesh": ["katapesh", "desert de katapesh"],
+    "les monts Kodar": ["kodar", "kodar mountains", "montagnes kodar", "mont kodar"],
+    "la mer Intérieure": ["mer interieure", "inner sea"],
+    "Osirion": ["osirion desert", "pyramides d osirion"],
+    "la Varisie": ["varisie", "varisia"],
+    "le Nidal": ["nidal"],
+}
+
+ARTICLES = {"la", "le", "les", "l", "du", "de", "des", "the"}
+
+_SEPARATORS = re.compile(r"[|,/;()\[\]]|\s-\s")
+
+
+def _strip_articles(text: str) -> str:
+    tokens = text.split()
+    while len(tokens) > 1 and tokens[0] in ARTICLES:
+        tokens = tokens[1:]
+    return " ".join(tokens)
+
+
+class LocationIndex:
+    """
+    Usage:
+        index = LocationIndex(config["locations"])
+        index.resolve("Absalom, quartier des docks")  # -> "Absalom"
+    """
+
+    def __init__(
+        self,
+        locations: Iterable[str],
+        aliases: Optional[Dict[str, List[str]]] = None,
+        min_similarity: float = 0.5,
+        max_memo: int = 1024,
+    ):
+        self.locations = list(locations)
+        self.min_similarity = min_similarity
+        self.max_memo = max_memo
+        # nom ou alias normalisé -> lieu canonique
+        self._names: Dict[str, str] = {}
+        # token -> alias normalisés le contenant (recherche par inclusion)
+        self._by_token: Dict[str, Set[str]] = {}
+        self._grams: List[Tuple[str, Set[str]]] = []
+        self._memo: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self.stats = {
+            "lookups": 0,
+            "exact": 0,
+            "contained": 0,
+            "fuzzy": 0,
+            "unknown": 0,
+        }
+
+        alias_table = GOLARION_ALIASES if aliases is None else aliases
+        for location in self.locations:
+            self._add(location, location)
+            for alias in alias_table.get(location, []):
+                self._add(alias, location)
+
+    def _add(self, name: str, location: str):
+        key = _strip_articles(normalize(name))
+        if not key or key in self._names:
+            return
+        self._names[key] = location
+        for token in key.split():
+            self._by_token.setdefault(token, set()).add(key)
+        self._grams.append((key, trigrams(key)))
+
+    def resolve(self, text: str) -> Optional[str]:
+        """Lieu canonique correspondant au texte, None si aucun"""
+        self.stats["lookups"] += 1
+        if text in self._memo:
+            self._memo.move_to_end(text)
+            return self._memo[text]
+
+        location, how = self._resolve(text)
+        self.stats[how] += 1
+        self._memo[text] = location
+        if len(self._memo) > self.max_memo:
+            self._memo.popitem(last=False)
+        return location
+
+    def _resolve(self, text: str) -> Tuple[Optional[str], str]:
+        segments = [
+            _strip_articles(normalize(segment)) for segment in _SEPARATORS.split(text)
+        ]
+        segments = [segment for segment in segments if segment]
+
+        for segment in segments:
+            if segment in self._names:
+                return self._names[segment], "exact"
+
+        for segment in segments:
+            contained = self._contained(segment)
+            if contained:
+                return contained, "contained"
+
+        best, best_score = None, self.min_similarity
+        for segment in segments:
+            grams = trigrams(segment)
+            for key, key_grams in self._grams:
+                score = similarity(grams, key_grams)
+                if score >= best_score:
+                    best, best_score = self._names[key], score
+        return (best, "fuzzy") if best else (None, "unknown")
+
+    def _contained(self, segment: str) -> Optional[str]:
+        """Alias le plus long dont tous les tokens figurent dans le segment"""
+        tokens = segment.split()
+        token_set = set(tokens)
+        candidates = set()
+        for token in tokens:
+            candidates |= self._by_token.get(token, set())
+        matches = [key for key in candidates if set(key.split()) <= token_set]
+        if not matches:
+            return None
+        return self._names[max(matches, key=len)]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, "names": len(self._names), "memo": len(self._memo)}
@@ -6,12 +6,31 @@ Automatically selects the best Ollama model based on:
 - Prompt context (location, dialogue, action)
 - Task type (narrative, description, choice)
 - Model availability and performance
+- Live measurements: per-model latency, tokens/s and error rate recorded by
+  LLMClient; slow models are penalised against a per-task latency SLO and
+  failing models are skipped by a circuit breaker until a cooldown expires
+- Background discovery (run_discovery): the model list is refreshed
+  periodically without blocking the event loop, and a model only becomes
+  eligible once a warm-up call has loaded it into memory
+- The ollama package (and httpx behind it) is imported on first use, so
+  importing the router stays cheap at worker startup
 """
 
-from typing import Dict, List, Optional, Tuple
+import asyncio
+import bisect
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
-import ollama
+
+from ..config import get_config
+
+if TYPE_CHECKING:
+    import ollama
+
+# Upper bounds (seconds) of the latency histogram buckets; last one is open
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32)
 
 
 class TaskType(Enum):
@@ -36,32 +55,192 @@ class ModelConfig:
     speed_rating: int  # 1-5, 5 = fastest
 
 
+class ModelHealth:
+    """
+    Live measurements for one model, with a circuit breaker
+
+    closed -> open after `failure_threshold` consecutive failures;
+    open -> half_open once `cooldown` seconds have passed (one probe call);
+    half_open -> closed on success, back to open on failure.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        window: int = 20,
+        alpha: float = 0.2,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self.requests = 0
+        self.errors = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_ewma: Optional[float] = None
+        self.tokens_per_second: Optional[float] = None
+        self._recent: deque = deque(maxlen=window)  # True = success
+        self.consecutive_failures = 0
+        self.state = "closed"
+        self.opened_at = 0.0
+        self._probe_started: Optional[float] = None
+
+    def record(
+        self,
+        latency: float,
+        success: bool,
+        eval_count: Optional[int] = None,
+        eval_duration: Optional[int] = None,
+    ):
+        """Record one call; eval_duration is in nanoseconds, as Ollama reports it"""
+        self.requests += 1
+        self._recent.append(success)
+        self._probe_started = None
+        if not success:
+            self.errors += 1
+            self.consecutive_failures += 1
+            if (
+                self.state == "half_open"
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            return
+
+        self.consecutive_failures = 0
+        self.state = "closed"
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.latency_ewma = self._smooth(self.latency_ewma, latency)
+        if eval_count and eval_duration:
+            rate = eval_count / (eval_duration / 1e9)
+            self.tokens_per_second = self._smooth(self.tokens_per_second, rate)
+
+    def _smooth(self, current: Optional[float], value: float) -> float:
+        if current is None:
+            return value
+        return self.alpha * value + (1 - self.alpha) * current
+
+    def available(self) -> bool:
+        """False while the circuit is open; lets a single probe through afterwards"""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.state = "half_open"
+        if self.state == "half_open" and self._probe_started is not None:
+            # A probe that never reported back (shed, cancelled) expires too
+            return time.monotonic() - self._probe_started >= self.cooldown
+        return True
+
+    def start_probe(self):
+        """Mark the half-open probe as in flight (the model was just selected)"""
+        if self.state == "half_open":
+            self._probe_started = time.monotonic()
+
+    @property
+    def error_rate(self) -> float:
+        """Failure ratio over the last `window` calls"""
+        if not self._recent:
+            return 0.0
+        return 1 - sum(self._recent) / len(self._recent)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the histogram bucket holding the q-th percentile"""
+        total = sum(self.histogram)
+        if not total:
+            return None
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if seen >= q * total:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else float("inf")
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate, 3),
+            "circuit": self.state,
+            "latency_ewma": (
+                round(self.latency_ewma, 3) if self.latency_ewma is not None else None
+            ),
+            "latency_p50": self.percentile(0.5),
+            "latency_p95": self.percentile(0.95),
+            "tokens_per_second": (
+                round(self.tokens_per_second, 1)
+                if self.tokens_per_second is not None
+                else None
+            ),
+            "latency_histogram": dict(
+                zip([f"<={b}s" for b in LATENCY_BUCKETS] + ["inf"], self.histogram)
+            ),
+        }
+
+
 class ModelRouter:
     """
     Intelligent routing of prompts to optimal Ollama models
     """
 
-    def __init__(self):
-        self.available_models = self._detect_local_models()
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        window: int = 20,
+        latency_slo: Optional[Dict[str, float]] = None,
+        discovery_interval: float = 60.0,
+        retry_interval: float = 5.0,
+        warm_up_timeout: float = 120.0,
+        keep_alive: Optional[str] = None,
+        host: Optional[str] = None,
+    ):
+        # Published by run_discovery() (ready models only), or detected
+        # synchronously on first access when no discovery task runs (scripts)
+        self._available_models: Optional[Dict[str, ModelConfig]] = None
+        self.discovery_interval = discovery_interval
+        self.retry_interval = retry_interval
+        self.warm_up_timeout = warm_up_timeout
+        self.keep_alive = keep_alive
+        self.host = host
+        self._discovering = False
+        self._server_up: Optional[bool] = None
+        self._ready: set = set()
+        self._last_refresh: Optional[float] = None
+        self._client: Optional["ollama.AsyncClient"] = None
         self.routing_rules = self._init_routing_rules()
+        for task_name, slo in (latency_slo or {}).items():
+            self.routing_rules[TaskType(task_name)]["latency_slo"] = slo
         self.fallback_model = "mistral"
         self.stats = {"total_requests": 0, "by_model": {}, "by_task": {}}
+        self._health_settings = {
+            "failure_threshold": failure_threshold,
+            "cooldown": cooldown,
+            "window": window,
+        }
+        self.health: Dict[str, ModelHealth] = {}
+        self.last_decision: Optional[Dict[str, Any]] = None
+
+    @property
+    def available_models(self) -> Dict[str, ModelConfig]:
+        if self._available_models is None:
+            if self._discovering:
+                # Never block the event loop: route to the fallback until a
+                # model has been discovered and warmed up
+                return self._fallback_models()
+            self.detect_models()
+        return self._available_models
+
+    def detect_models(self) -> Dict[str, ModelConfig]:
+        """(Re)detect local models; blocking, run it in a thread from async code"""
+        self._available_models = self._detect_local_models()
+        return self._available_models
 
     def _detect_local_models(self) -> Dict[str, ModelConfig]:
         """Detect available local Ollama models"""
         try:
-            models_list = ollama.list()
-            detected = {}
-
-            for model in models_list.get("models", []):
-                name = model["name"]
-                base_name = name.split(":")[0]
-
-                # Configure based on model name patterns
-                config = self._configure_model(base_name, name)
-                if config:
-                    detected[base_name] = config
+            import ollama
 
+            detected = self._configure_models(ollama.list())
             print(
                 f"[ModelRouter] Detected {len(detected)} local models: {list(detected.keys())}"
             )
@@ -69,17 +248,110 @@ class ModelRouter:
 
         except Exception as e:
             print(f"[ModelRouter] Error detecting models: {e}")
-            # Fallback to default Mistral
-            return {
-                "mistral": ModelConfig(
-                    name="mistral",
-                    specialties=["general", "narrative"],
-                    priority=1,
-                    max_tokens=150,
-                    temperature=0.7,
-                    speed_rating=3,
-                )
-            }
+            return self._fallback_models()
+
+    def _configure_models(self, models_list: Dict) -> Dict[str, ModelConfig]:
+        """Configure every model of an `ollama.list()` response"""
+        detected = {}
+        for model in models_list.get("models", []):
+            name = model["name"]
+            base_name = name.split(":")[0]
+
+            # Configure based on model name patterns
+            config = self._configure_model(base_name, name)
+            if config:
+                detected[base_name] = config
+        return detected
+
+    def _fallback_models(self) -> Dict[str, ModelConfig]:
+        """Fallback to default Mistral"""
+        return {
+            self.fallback_model: ModelConfig(
+                name=self.fallback_model,
+                specialties=["general", "narrative"],
+                priority=1,
+                max_tokens=150,
+                temperature=0.7,
+                speed_rating=3,
+            )
+        }
+
+    async def run_discovery(self, client: Optional["ollama.AsyncClient"] = None):
+        """
+        Background task: discover models now, then refresh them every
+        `discovery_interval` seconds (`retry_interval` while the server is down)
+        """
+        self._discovering = True
+        while True:
+            await self.discover(client)
+            await asyncio.sleep(
+                self.discovery_interval if self._server_up else self.retry_interval
+            )
+
+    async def discover(
+        self, client: Optional["ollama.AsyncClient"] = None
+    ) -> Dict[str, ModelConfig]:
+        """
+        Refresh the model list without blocking the event loop
+
+        New models are warmed up before becoming eligible; after the server
+        has been unreachable (restart), every model is warmed up again.
+        `available_models` is swapped as each model becomes ready.
+        """
+        client = client or self._async_client()
+        try:
+            listed = self._configure_models(
+                await asyncio.wait_for(client.list(), self.retry_interval)
+            )
+        except Exception as e:
+            if self._server_up is not False:
+                print(f"[ModelRouter] Model server unreachable: {e}")
+            self._server_up = False
+            self._ready.clear()
+            return self._available_models or self._fallback_models()
+
+        if self._server_up is False:
+            print("[ModelRouter] Model server back, warming models up again")
+        self._server_up = True
+        self._last_refresh = time.time()
+        self._ready &= set(listed)
+        self._publish(listed)
+
+        # Best models first, so the likely pick is eligible soonest
+        for name, config in sorted(listed.items(), key=lambda item: item[1].priority):
+            if name not in self._ready and await self._warm_up(client, config):
+                self._ready.add(name)
+                self._publish(listed)
+        return self._available_models or self._fallback_models()
+
+    def _publish(self, listed: Dict[str, ModelConfig]):
+        """Swap in the ready models (keeps the previous set while none is ready)"""
+        ready = {name: config for name, config in listed.items() if name in self._ready}
+        if ready:
+            self._available_models = ready
+
+    async def _warm_up(self, client: "ollama.AsyncClient", config: ModelConfig) -> bool:
+        """Load the model into memory (empty prompt) and keep it loaded"""
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(
+                client.generate(
+                    model=config.name, prompt="", keep_alive=self.keep_alive
+                ),
+                self.warm_up_timeout,
+            )
+        except Exception as e:
+            print(f"[ModelRouter] Warm-up failed for {config.name}: {e}")
+            return False
+        print(f"[ModelRouter] {config.name} ready ({time.monotonic() - started:.1f}s)")
+        return True
+
+    def _async_client(self) -> "ollama.AsyncClient":
+        if self._client is None:
+            import ollama
+
+            self._client = ollama.AsyncClient(host=self.host)
+        return self._client
 
     def _configure_model(self, base_name: str, full_name: str) -> Optional[ModelConfig]:
         """Configure a model based on its name"""
@@ -167,6 +439,7 @@ class ModelRouter:
                 "preferred_specialties": ["narrative", "creative", "general"],
                 "tokens": 150,
                 "temperature": 0.75,
+                "latency_slo": 10.0,  # seconds
                 "priority_boost": {
                     "gemma": 1,
                     "mistral": 0,
@@ -177,6 +450,7 @@ class ModelRouter:
                 "preferred_specialties": ["quick", "fast", "short"],
                 "tokens": 100,
                 "temperature": 0.7,
+                "latency_slo": 3.0,  # seconds
                 "priority_boost": {
                     "llama3.2": 2,
                     "phi": 2,
@@ -194,6 +468,7 @@ class ModelRouter:
                 "preferred_specialties": ["conversation", "general", "narrative"],
                 "tokens": 150,
                 "temperature": 0.7,
+                "latency_slo": 6.0,  # seconds
                 "priority_boost": {"mistral": 1, "qwen": 0},
             },
             TaskType.EPIC_ACTION: {
@@ -208,6 +483,7 @@ class ModelRouter:
                 "preferred_specialties": ["creative", "dramatic", "epic"],
                 "tokens": 150,
                 "temperature": 0.8,
+                "latency_slo": 8.0,  # seconds
                 "priority_boost": {"gemma": 2},  # Strongly prefer creative for drama
             },
             TaskType.GENERAL: {
@@ -215,6 +491,7 @@ class ModelRouter:
                 "preferred_specialties": ["general", "narrative"],
                 "tokens": 150,
                 "temperature": 0.7,
+                "latency_slo": 8.0,  # seconds
                 "priority_boost": {},
             },
         }
@@ -249,9 +526,20 @@ class ModelRouter:
 
         rules = self.routing_rules[task_type]
 
+        # Circuit breaker: skip failing models (unless every model is failing)
+        candidates = {
+            name: config
+            for name, config in self.available_models.items()
+            if self._health(name).available()
+        }
+        excluded = sorted(set(self.available_models) - set(candidates))
+        if not candidates:
+            candidates = self.available_models
+
         # Score each available model
         scores = {}
-        for model_name, config in self.available_models.items():
+        breakdown = {}
+        for model_name, config in candidates.items():
             score = 0
 
             # Base priority (lower number = higher priority)
@@ -271,12 +559,22 @@ class ModelRouter:
             if task_type == TaskType.QUICK_CHOICE:
                 score += config.speed_rating * 5
 
-            scores[model_name] = score
+            latency_penalty, error_penalty = self._live_penalties(
+                model_name, rules["latency_slo"]
+            )
+            scores[model_name] = score - latency_penalty - error_penalty
+            breakdown[model_name] = {
+                "static": score,
+                "latency_penalty": latency_penalty,
+                "error_penalty": error_penalty,
+                "score": scores[model_name],
+            }
 
         # Select model with highest score
         if scores:
             best_model = max(scores.items(), key=lambda x: x[1])[0]
             selected_config = self.available_models[best_model]
+            self._health(best_model).start_probe()
         else:
             # Fallback if no models available
             best_model = self.fallback_model
@@ -295,6 +593,14 @@ class ModelRouter:
             "num_predict": rules.get("tokens", selected_config.max_tokens),
         }
 
+        self.last_decision = {
+            "task": task_type.value,
+            "selected": best_model,
+            "latency_slo": rules["latency_slo"],
+            "scores": breakdown,
+            "circuit_open": excluded,
+        }
+
         # Update stats
         self.stats["total_requests"] += 1
         self.stats["by_model"][best_model] = (
@@ -310,6 +616,49 @@ class ModelRouter:
 
         return best_model, options
 
+    def _health(self, model: str) -> ModelHealth:
+        health = self.health.get(model)
+        if health is None:
+            health = self.health[model] = ModelHealth(**self._health_settings)
+        return health
+
+    def _live_penalties(self, model: str, latency_slo: float) -> Tuple[float, float]:
+        """
+        Score penalties from live measurements (0 until the model has been used)
+
+        - latency: 30 points per SLO multiple above the SLO, capped at 60
+        - errors: up to 50 points at a 100% recent error rate, except for the
+          half-open probe (its outcome decides whether the model comes back)
+        """
+        health = self.health.get(model)
+        if health is None:
+            return 0.0, 0.0
+        error_penalty = 0.0 if health.state == "half_open" else 50.0 * health.error_rate
+        latency_penalty = 0.0
+        if health.latency_ewma is not None and health.latency_ewma > latency_slo:
+            latency_penalty = min(60.0, 30.0 * (health.latency_ewma / latency_slo - 1))
+        return round(latency_penalty, 1), round(error_penalty, 1)
+
+    def record_result(
+        self,
+        model: str,
+        latency: float,
+        success: bool,
+        eval_count: Optional[int] = None,
+        eval_duration: Optional[int] = None,
+    ):
+        """
+        Record the outcome of one generation (called by LLMClient)
+
+        Args:
+            latency: seconds spent generating, excluding the scheduler queue
+            eval_count, eval_duration: Ollama's generated-token count and
+                generation time (ns), for tokens/s
+        """
+        self._health(model.split(":")[0]).record(
+            latency, success, eval_count, eval_duration
+        )
+
     def get_model_for_task(self, task_type: TaskType) -> Tuple[str, Dict]:
         """Get the preferred model for a specific task type"""
         return self.select_model("", "", task_type)
@@ -322,6 +671,14 @@ class ModelRouter:
             "by_task": self.stats["by_task"],
             "available_models": list(self.available_models.keys()),
             "fallback_model": self.fallback_model,
+            "models": {name: health.snapshot() for name, health in self.health.items()},
+            "discovery": {
+                "running": self._discovering,
+                "server_up": self._server_up,
+                "ready": sorted(self._ready),
+                "last_refresh": self._last_refresh,
+            },
+            "last_decision": self.last_decision,
         }
 
     def test_routing(self, prompt: str) -> Dict:
@@ -346,5 +703,16 @@ def get_router() -> ModelRouter:
     """Get or create the global ModelRouter instance"""
     global _router_instance
     if _router_instance is None:
-        _router_instance = ModelRouter()
+        settings = get_config()
+        _router_instance = ModelRouter(
+            keep_alive=settings["ollama"].get("keep_alive"),
+            host=settings["ollama"].get("host"),
+            **settings.get("model_router", {}),
+        )
     return _router_instance
+
+
+def reset_router():
+    """Reset for tests"""
+    global _router_instance
+    _router_instance = None
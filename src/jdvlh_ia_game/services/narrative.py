@@ -1,20 +1,50 @@
 import asyncio
-import json
-from typing import Any, Dict, List, Optional
-from pathlib import Path
-
-import ollama
-import yaml
+import copy
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 
+from ..config import get_config
+from .llm_client import get_llm_client
+from .llm_scheduler import LLMOverloadedError, Priority
 from .model_router import get_router
-from .narrative_memory import NarrativeMemory, SmartHistoryManager
+from .narrative_memory import PlayerMemory, get_memory_registry
 from .pf2e_content import get_pf2e_content
-from .content_filter import get_content_filter
+from .content_filter import FilterResult, IncrementalFilter, get_content_filter
+from .output_parser import (
+    NARRATIVE_SCHEMA,
+    ModelOutputError,
+    NarrativeFieldStream,
+    parse_model_output,
+)
+from .prompt_context import PromptContextStore
+from .response_cache import ResponseCache, memory_fingerprint
+
+config = get_config()
+
+FALLBACK_RESPONSE = {
+    "narrative": "Les brumes de Golarion se dissipent, révélant un chemin...",
+    "choices": ["Explorer", "Équipement", "Observer"],
+    "location": "Absalom",
+    "animation_trigger": "none",
+    "sfx": "ambient",
+}
+
+# Joueur utilisé quand l'appelant ne fournit pas de player_id (benchs, scripts)
+DEFAULT_PLAYER_ID = "default"
+
+# Consignes de format, fixes: jointes au prompt système (préfixe stable)
+OUTPUT_INSTRUCTIONS = """Si jet de dé requis: animation_trigger="DICE_ROLL:skill:DC"
+(ex: perception:15).
+
+JSON STRICT:
+{
+  "narrative": "description immersive",
+  "choices": ["action1","action2","action3"],
+  "location": "Absalom|Sandpoint|Magnimar|...",
+  "animation_trigger": "none|DICE_ROLL:skill:DC",
+  "sfx": "ambient|combat|magic|tavern"
+}"""
 
-# Chemin absolu vers config.yaml
-CONFIG_PATH = Path(__file__).parent.parent / "config" / "config.yaml"
-with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-    config = yaml.safe_load(f)
+_UNLOADED = object()
 
 
 class NarrativeService:
@@ -24,33 +54,343 @@ class NarrativeService:
         self.temperature = config["ollama"]["temperature"]
         self.max_tokens = config["ollama"]["max_tokens"]
         self.router = get_router()
-        self.memory = NarrativeMemory()
-        self.history_mgr = SmartHistoryManager()
+        self.llm = get_llm_client()
+        self.memories = get_memory_registry(**config.get("narrative_memory", {}))
         self.content_filter = get_content_filter(target_age=16, strict_mode=True)
+        self.blacklist_words: Set[str] = set()
+        self._add_blacklist_words(config.get("blacklist_words", []))
+
+        # Cache de réponses aux choix courts (opt-in: `response_cache.enabled`)
+        cache_config = dict(config.get("response_cache", {}))
+        self.response_cache = (
+            ResponseCache(**cache_config)
+            if cache_config.pop("enabled", False)
+            else None
+        )
+
+        # Prompt système stable, envoyé une fois puis repris via le contexte Ollama
+        self.system_prompt = (
+            f"{config['prompts']['system'].rstrip()}\n\n{OUTPUT_INSTRUCTIONS}"
+        )
+        self.keep_alive = config["ollama"].get("keep_alive")
+        context_config = dict(config.get("prompt_context", {}))
+        self.contexts = (
+            PromptContextStore(**context_config)
+            if context_config.pop("enabled", True)
+            else None
+        )
+
+        # Sortie structurée: Ollama contraint le décodage au schéma de réponse
+        self.output_format = (
+            NARRATIVE_SCHEMA
+            if config["ollama"].get("structured_output", True)
+            else None
+        )
+        self.output_stats = {
+            "parsed": 0,
+            "repaired": 0,
+            "malformed": 0,
+            "regenerations": 0,
+            "wasted_tokens": 0,
+            "fallbacks": 0,
+        }
 
-        # Intégration PF2e (optionnel)
-        try:
-            self.pf2e = get_pf2e_content(language="fr")
-            print("[+] PF2e content intégré au NarrativeService")
-        except Exception as e:
-            print(f"[!] PF2e content non disponible: {e}")
-            self.pf2e = None
+        # Intégration PF2e (optionnel), chargée au premier usage
+        self._pf2e = _UNLOADED
 
         print("[+] ContentFilter PEGI 16 activé")
 
+    @property
+    def pf2e(self):
+        if self._pf2e is _UNLOADED:
+            try:
+                self._pf2e = get_pf2e_content(language="fr")
+                print("[+] PF2e content intégré au NarrativeService")
+            except Exception as e:
+                print(f"[!] PF2e content non disponible: {e}")
+                self._pf2e = None
+        return self._pf2e
+
     async def generate(
-        self, context: str, history: List[str], choice: str, blacklist_words: List[str]
+        self,
+        context: str,
+        history: List[str],
+        choice: str,
+        blacklist_words: List[str],
+        player_id: str = DEFAULT_PLAYER_ID,
+        state: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
-        # FILTER INPUT: Check player choice for inappropriate content
+        """
+        Génère le tour suivant pour un joueur
+
+        Args:
+            player_id: Joueur dont la mémoire narrative est utilisée
+            state: État de jeu du joueur; sa mémoire y est réhydratée puis
+                sauvegardée (clé "narrative_memory")
+        """
+        player = self._load_memory(player_id, state)
+        self._add_blacklist_words(blacklist_words)
+        try:
+            choice = self._filter_choice(choice)
+            cache_key = self._response_cache_key(choice, player)
+            cached = self.response_cache.lookup(*cache_key) if cache_key else None
+            turn = self._prepare_turn(choice, player)
+            if cached is not None:
+                self._forget_context(player_id)
+                return self._finalize_turn(choice, cached, player)
+
+            for attempt in range(self.max_retries):
+                if attempt:
+                    self.output_stats["regenerations"] += 1
+                try:
+                    model, options = self.router.select_model(
+                        prompt=choice, context=context
+                    )
+                    prompt, prefix = self._turn_request(player_id, model, turn)
+                    response = await self.llm.generate(
+                        model=model,
+                        prompt=prompt,
+                        options=options,
+                        priority=Priority.INTERACTIVE,
+                        player_id=player_id,
+                        **prefix,
+                    )
+                    self._remember_context(player_id, model, response, prefix)
+                    parsed = self._parse_output(
+                        response.get("response", ""), response.get("eval_count")
+                    )
+                    result = self._finalize_turn(choice, parsed, player)
+                    self._remember_response(cache_key, result)
+                    return result
+                except LLMOverloadedError as e:
+                    # Serveur saturé: réessayer ne ferait qu'allonger la file
+                    print(f"[!] Tour délesté: {e}")
+                    self._forget_context(player_id)
+                    return self._fallback()
+                except Exception as e:
+                    print(f"Tentative {attempt + 1} échouée: {e}")
+                    # Contexte douteux: la tentative suivante repart du prompt système
+                    self._forget_context(player_id)
+                    # Attendre n'aide qu'en cas d'erreur serveur, pas de JSON invalide
+                    if attempt < self.max_retries - 1 and not isinstance(
+                        e, ModelOutputError
+                    ):
+                        await asyncio.sleep(2**attempt)
+
+            return self._fallback()
+        finally:
+            self._save_memory(player, state)
+
+    async def generate_stream(
+        self,
+        context: str,
+        history: List[str],
+        choice: str,
+        blacklist_words: List[str],
+        player_id: str = DEFAULT_PLAYER_ID,
+        state: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Variante streaming de generate()
+
+        Produit des frames {"type": "narrative_delta", "delta": "..."} au fil du
+        décodage du champ "narrative" (filtré phrase par phrase avant envoi),
+        puis une frame {"type": "narrative_final", ...} équivalente au retour
+        de generate(), qui fait foi pour le texte complet.
+        """
+        player = self._load_memory(player_id, state)
+        self._add_blacklist_words(blacklist_words)
+        choice = self._filter_choice(choice)
+        cache_key = self._response_cache_key(choice, player)
+        cached = self.response_cache.lookup(*cache_key) if cache_key else None
+        turn = self._prepare_turn(choice, player)
+        if cached is not None:
+            self._forget_context(player_id)
+            result = self._finalize_turn(choice, cached, player)
+            self._save_memory(player, state)
+            yield {"type": "narrative_delta", "delta": result["narrative"]}
+            yield {"type": "narrative_final", **result}
+            return
+        model, options = self.router.select_model(prompt=choice, context=context)
+        prompt, prefix = self._turn_request(player_id, model, turn)
+
+        decoder = NarrativeFieldStream()
+        stream_filter = IncrementalFilter(self.content_filter)
+        released: List[str] = []
+        blocked = False
+
+        def release(text: str) -> Optional[Dict[str, Any]]:
+            nonlocal blocked
+            if not text or blocked:
+                return None
+            if not self._is_safe(text):
+                # Blacklist: on arrête d'envoyer, la frame finale remplace
+                blocked = True
+                return None
+            released.append(text)
+            return {"type": "narrative_delta", "delta": text}
+
+        eval_count = None
+        try:
+            async for chunk in self.llm.stream(
+                model=model,
+                prompt=prompt,
+                options=options,
+                priority=Priority.INTERACTIVE,
+                player_id=player_id,
+                **prefix,
+            ):
+                if chunk.get("done"):
+                    self._remember_context(player_id, model, chunk, prefix)
+                    eval_count = chunk.get("eval_count")
+                delta = decoder.feed(chunk.get("response", ""))
+                frame = release(stream_filter.feed(delta)) if delta else None
+                if frame:
+                    yield frame
+            frame = release(stream_filter.flush())
+            if frame:
+                yield frame
+            parsed = self._parse_output(decoder.raw, eval_count)
+        except Exception as e:
+            print(f"[!] Streaming échoué: {e}")
+            self._forget_context(player_id)
+            parsed = self._fallback()
+            if released:
+                parsed["narrative"] = "".join(released)
+            self._save_memory(player, state)
+            yield {"type": "narrative_final", **parsed}
+            return
+
+        # Le texte final est celui déjà filtré et envoyé au joueur
+        output_result = None
+        if blocked:
+            parsed["narrative"] = decoder.value
+        else:
+            parsed["narrative"] = "".join(released)
+            output_result = stream_filter.result(decoder.value, parsed["narrative"])
+        result = self._finalize_turn(choice, parsed, player, output_result)
+        self._remember_response(cache_key, result)
+        self._save_memory(player, state)
+        yield {"type": "narrative_final", **result}
+
+    def _add_blacklist_words(self, words: List[str]):
+        """Mots interdits: fusionnés dans le ContentFilter et gardés pour _is_safe"""
+        self.content_filter.add_blacklist_words(words)
+        self.blacklist_words |= {w.strip().lower() for w in words if w.strip()}
+
+    def _is_safe(self, text: str) -> bool:
+        """
+        Contrôle de la blacklist indépendant du ContentFilter (sous-chaîne:
+        attrape aussi les variantes que les frontières de mots laissent passer)
+        """
+        text_lower = text.lower()
+        return not any(word in text_lower for word in self.blacklist_words)
+
+    def _load_memory(
+        self, player_id: str, state: Optional[Dict[str, Any]]
+    ) -> PlayerMemory:
+        """Mémoire du joueur, réhydratée depuis l'état si absente du process"""
+        saved = state.get("narrative_memory") if state is not None else None
+        return self.memories.get(player_id, saved)
+
+    def _save_memory(self, player: PlayerMemory, state: Optional[Dict[str, Any]]):
+        """Sérialise la mémoire du joueur dans son état (persisté par l'appelant)"""
+        if state is not None:
+            state["narrative_memory"] = player.to_dict()
+
+    def _response_cache_key(
+        self, choice: str, player: PlayerMemory
+    ) -> Optional[Tuple[str, str, str]]:
+        """(lieu, choix, empreinte mémoire) si le choix peut venir du cache"""
+        if self.response_cache is None or not self.response_cache.cacheable(choice):
+            return None
+        memory = player.memory
+        return memory.current_location, choice, memory_fingerprint(memory)
+
+    def _remember_response(
+        self, cache_key: Optional[Tuple[str, str, str]], result: Dict[str, Any]
+    ):
+        """Met en cache une réponse générée (jamais une réponse filtrée)"""
+        if cache_key and not result.get("content_filtered"):
+            self.response_cache.store(*cache_key, result)
+
+    def _turn_request(
+        self, player_id: str, model: str, turn: Dict[str, str]
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Prompt du tour et arguments Ollama (préfixe, format de sortie)
+
+        Avec un contexte valide pour ce joueur et ce modèle, seul le delta du
+        tour est envoyé (l'historique récent est déjà dans le contexte);
+        sinon prompt système + historique récent.
+        """
+        context = self.contexts.get(player_id, model) if self.contexts else None
+        sections = [f"Mémoire: {turn['memory']}"]
+        if context:
+            prefix: Dict[str, Any] = {"context": context}
+        else:
+            prefix = {"system": self.system_prompt}
+            sections.append(f"Récemment: {turn['history']}")
+        sections.append(f"Choix du joueur: {turn['choice']}")
+        if self.keep_alive:
+            prefix["keep_alive"] = self.keep_alive
+        if self.output_format:
+            prefix["format"] = self.output_format
+        return "\n\n".join(sections), prefix
+
+    def _remember_context(
+        self,
+        player_id: str,
+        model: str,
+        response: Dict[str, Any],
+        prefix: Dict[str, Any],
+    ):
+        """Garde le contexte renvoyé par Ollama pour le tour suivant"""
+        if self.contexts is not None:
+            self.contexts.record(response, reused="context" in prefix)
+            self.contexts.put(player_id, model, response.get("context"))
+
+    def _forget_context(self, player_id: str):
+        """Tour sans génération du modèle: son contexte ne reflète plus l'histoire"""
+        if self.contexts is not None:
+            self.contexts.discard(player_id)
+
+    def _parse_output(self, raw: str, eval_count: Optional[int]) -> Dict[str, Any]:
+        """
+        Décode la réponse du modèle, réparée si tronquée ou entourée de texte
+
+        Raises:
+            ModelOutputError: réponse inexploitable (ses tokens sont perdus)
+        """
+        try:
+            parsed, repaired = parse_model_output(raw)
+        except ModelOutputError:
+            self.output_stats["malformed"] += 1
+            self.output_stats["wasted_tokens"] += eval_count or 0
+            raise
+        self.output_stats["parsed"] += 1
+        if repaired:
+            self.output_stats["repaired"] += 1
+        return parsed
+
+    def _fallback(self) -> Dict[str, Any]:
+        self.output_stats["fallbacks"] += 1
+        return copy.deepcopy(FALLBACK_RESPONSE)
+
+    def _filter_choice(self, choice: str) -> str:
+        """FILTER INPUT: Check player choice for inappropriate content"""
         input_result = self.content_filter.filter_input(choice)
         if not input_result.is_safe:
             print(f"[!] Input filtré: {input_result.violations}")
-            choice = input_result.filtered_text
+            return input_result.filtered_text
+        return choice
 
-        # AVANT génération
-        self.memory.update_entities(choice)
-        self.memory.advance_turn()
-        smart_context = self.history_mgr.get_smart_context(self.memory)
+    def _prepare_turn(self, choice: str, player: PlayerMemory) -> Dict[str, str]:
+        """Met à jour la mémoire AVANT génération et construit le delta du tour"""
+        memory = player.memory
+        memory.update_entities(choice)
+        memory.advance_turn()
+        smart_context = player.history.get_smart_context(memory)
 
         # Enrichissement PF2e si sort détecté
         spell_info = self._extract_spell_info(choice)
@@ -66,89 +406,68 @@ class NarrativeService:
                 f"(niveau {spell_info['level']}) - {spell_desc}"
             )
 
-        prompt = f"""Tu es un Maître du Jeu Pathfinder 2e expert pour adolescents (14-18 ans).
-UNIVERS: Golarion - haute fantasy avec magie, dieux et aventures épiques.
-
-STYLE:
-- Descriptions immersives (4-6 phrases)
-- Combats tactiques avec règles PF2e (3 actions/tour)
-- Mentionne jets de dés (d20+mod) et DC appropriés
-
-Mémoire: {self.memory.get_context_summary()[:150]}
-
-Récemment: {smart_history}
-
-Choix du joueur: {choice}{spell_context}
-
-Si jet de dé requis: animation_trigger="DICE_ROLL:skill:DC" (ex: perception:15).
-
-JSON STRICT:
-{{
-  "narrative": "description immersive 4-6 phrases",
-  "choices": ["action1","action2","action3"],
-  "location": "Absalom|Sandpoint|Magnimar|...",
-  "animation_trigger": "none|DICE_ROLL:skill:DC",
-  "sfx": "ambient|combat|magic|tavern"
-}}"""
-
-        fallback = {
-            "narrative": "Les brumes de Golarion se dissipent, révélant un chemin...",
-            "choices": ["Explorer", "Équipement", "Observer"],
-            "location": "Absalom",
-            "animation_trigger": "none",
-            "sfx": "ambient",
+        return {
+            "memory": memory.get_context_summary()[:150],
+            "history": smart_history,
+            "choice": f"{choice}{spell_context}",
         }
 
-        for attempt in range(self.max_retries):
-            try:
-                model, options = self.router.select_model(
-                    prompt=choice, context=context
-                )
-                resp = ollama.generate(model=model, prompt=prompt, options=options)[
-                    "response"
-                ]
-                parsed = json.loads(resp)
-
-                # APRÈS génération
-                self.memory.update_entities(parsed["narrative"])
-                self.history_mgr.add_interaction(choice, parsed["narrative"])
-
-                event = self.memory.detect_important_events(parsed["narrative"])
-                if event and event.importance >= 4:
-                    self.memory.add_event(
-                        description=event.description,
-                        location=parsed.get("location", ""),
-                        entities=event.entities_involved,
-                        importance=event.importance,
-                    )
+    def _finalize_turn(
+        self,
+        choice: str,
+        parsed: Dict[str, Any],
+        player: PlayerMemory,
+        output_result: Optional[FilterResult] = None,
+    ) -> Dict[str, Any]:
+        """
+        Met à jour la mémoire APRÈS génération et filtre la sortie
 
-                # Mettre à jour lieu
-                if parsed.get("location"):
-                    self.memory.update_location(parsed["location"])
-
-                # FILTER OUTPUT: Check AI response for inappropriate content
-                output_result = self.content_filter.filter_output(
-                    parsed.get("narrative", "")
-                )
-                if not output_result.is_safe:
-                    print(f"[!] Output filtré: {output_result.violations}")
-                    parsed["narrative"] = output_result.filtered_text
-                    parsed["content_filtered"] = True
-
-                # Legacy blacklist check (backward compatibility)
-                if not self._is_safe(parsed.get("narrative", ""), blacklist_words):
-                    parsed["narrative"] = "L'aventure continue paisiblement..."
-                    parsed["content_filtered"] = True
-
-                parsed["choices"] = parsed.get("choices", fallback["choices"])[:3]
-                return parsed
-            except Exception as e:
-                print(f"Tentative {attempt + 1} échouée: {e}")
-                if attempt == self.max_retries - 1:
-                    return fallback
-                await asyncio.sleep(2**attempt)
+        Seul étage de filtrage du tour: le résultat est joint à la réponse
+        ("filter_result") pour que l'appelant n'ait pas à refiltrer.
+        `output_result` est fourni quand le texte a déjà été filtré (streaming).
+        La blacklist est ensuite revérifiée indépendamment du filtre.
+        """
+        memory = player.memory
+        memory.update_entities(parsed["narrative"])
+        player.history.add_interaction(choice, parsed["narrative"])
+
+        event = memory.detect_important_events(parsed["narrative"])
+        if event and event.importance >= 4:
+            memory.add_event(
+                description=event.description,
+                location=parsed.get("location", ""),
+                entities=event.entities_involved,
+                importance=event.importance,
+            )
 
-        return fallback
+        # Mettre à jour lieu
+        if parsed.get("location"):
+            memory.update_location(parsed["location"])
+
+        # FILTER OUTPUT: Check AI response for inappropriate content
+        # (blacklist_words de la config inclus dans le ContentFilter)
+        if output_result is None:
+            output_result = self.content_filter.filter_output(
+                parsed.get("narrative", "")
+            )
+        if not output_result.is_safe:
+            print(f"[!] Output filtré: {output_result.violations}")
+            parsed["narrative"] = output_result.filtered_text
+            parsed["content_filtered"] = True
+        parsed["filter_result"] = output_result.to_dict()
+
+        # Dernier garde-fou, indépendant du ContentFilter
+        if not self._is_safe(parsed.get("narrative", "")):
+            parsed["narrative"] = "L'aventure continue paisiblement..."
+            parsed["content_filtered"] = True
+
+        # Réponse réparée (tronquée): champs manquants complétés, le lieu
+        # reste celui de la mémoire
+        parsed["choices"] = (parsed.get("choices") or FALLBACK_RESPONSE["choices"])[:3]
+        parsed.setdefault("location", memory.current_location)
+        for key in ("animation_trigger", "sfx"):
+            parsed.setdefault(key, FALLBACK_RESPONSE[key])
+        return parsed
 
     def _extract_spell_info(self, choice: str) -> Optional[Dict]:
         """
@@ -187,10 +506,3 @@ JSON STRICT:
             print(f"[!] Erreur extraction sort: {e}")
 
         return None
-
-    def _is_safe(self, text: str, blacklist_words: List[str]) -> bool:
-        text_lower = text.lower()
-        for word in blacklist_words:
-            if word.lower() in text_lower:
-                return False
-        return True
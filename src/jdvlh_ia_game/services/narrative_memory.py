@@ -5,13 +5,15 @@ Improves narrative coherence through:
 - Relationship management
 - Event timeline
 - Smart context summarization
+- Per-player memory registry (LRU eviction of idle players)
 """
 
 import re
+import time
 from typing import Dict, List, Set, Optional, Any
 from dataclasses import dataclass, field
 from datetime import datetime
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 
 
 @dataclass
@@ -441,3 +443,117 @@ class SmartHistoryManager:
             context.extend(self.get_recent_history(num_interactions=3))
 
         return context
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize history for storage"""
+        return {"raw_history": self.raw_history}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SmartHistoryManager":
+        """Deserialize history from dict"""
+        manager = cls()
+        manager.raw_history = data.get("raw_history", [])[-manager.max_raw_history :]
+        return manager
+
+
+@dataclass
+class PlayerMemory:
+    """Narrative memory and history of a single player"""
+
+    memory: NarrativeMemory
+    history: SmartHistoryManager
+    last_access: float = field(default_factory=time.monotonic)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"memory": self.memory.to_dict(), "history": self.history.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "PlayerMemory":
+        if not data:
+            return cls(memory=NarrativeMemory(), history=SmartHistoryManager())
+        return cls(
+            memory=NarrativeMemory.from_dict(data.get("memory", {})),
+            history=SmartHistoryManager.from_dict(data.get("history", {})),
+        )
+
+
+class PlayerMemoryRegistry:
+    """
+    Per-player narrative memories, bounded in size
+
+    Each player gets its own NarrativeMemory/SmartHistoryManager so prompts only
+    contain that player's story. Memories are kept in an LRU: the least recently
+    used player is evicted beyond `max_players`, and players idle for more than
+    `idle_ttl` seconds are dropped. Evicted memories are rehydrated on reconnect
+    from the snapshot stored in the game state (see `snapshot`).
+    """
+
+    def __init__(self, max_players: int = 100, idle_ttl: float = 1800):
+        self.max_players = max_players
+        self.idle_ttl = idle_ttl
+        self._players: "OrderedDict[str, PlayerMemory]" = OrderedDict()
+
+    def get(
+        self, player_id: str, saved: Optional[Dict[str, Any]] = None
+    ) -> PlayerMemory:
+        """
+        Get a player's memory, rehydrating it from `saved` if not loaded
+
+        Args:
+            player_id: Player identifier
+            saved: Snapshot previously returned by `snapshot` (from game state)
+        """
+        player = self._players.get(player_id)
+        if player is None:
+            player = PlayerMemory.from_dict(saved)
+            self._players[player_id] = player
+            self.evict_idle()
+            while len(self._players) > self.max_players:
+                self._players.popitem(last=False)
+        else:
+            self._players.move_to_end(player_id)
+        player.last_access = time.monotonic()
+        return player
+
+    def snapshot(self, player_id: str) -> Optional[Dict[str, Any]]:
+        """Serializable snapshot of a loaded player's memory (None if not loaded)"""
+        player = self._players.get(player_id)
+        return player.to_dict() if player else None
+
+    def discard(self, player_id: str):
+        """Drop a player's memory from the process"""
+        self._players.pop(player_id, None)
+
+    def evict_idle(self) -> int:
+        """Drop players idle for longer than idle_ttl, returns count evicted"""
+        cutoff = time.monotonic() - self.idle_ttl
+        idle = [pid for pid, p in self._players.items() if p.last_access < cutoff]
+        for player_id in idle:
+            del self._players[player_id]
+        return len(idle)
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def __contains__(self, player_id: str) -> bool:
+        return player_id in self._players
+
+
+# Singleton instance
+_registry_instance: Optional[PlayerMemoryRegistry] = None
+
+
+def get_memory_registry(
+    max_players: int = 100, idle_ttl: float = 1800
+) -> PlayerMemoryRegistry:
+    """Get or create the global PlayerMemoryRegistry instance"""
+    global _registry_instance
+    if _registry_instance is None:
+        _registry_instance = PlayerMemoryRegistry(max_players, idle_ttl)
+    return _registry_instance
+
+
+def reset_memory_registry():
+    """Reset the singleton registry (useful for testing)"""
+    global _registry_instance
+    _registry_instance = None
@@ -0,0 +1,242 @@
+"""
+Décodage incrémental de la sortie JSON du modèle
+
+Le MJ répond en JSON strict ({"narrative": "...", "choices": [...], ...}).
+En mode streaming, Ollama renvoie ce JSON token par token: `NarrativeFieldStream`
+extrait au fil de l'eau le texte du champ "narrative" sans attendre la fin
+de l'objet, pour l'envoyer au joueur dès qu'il est décodé.
+
+Hors streaming, `parse_model_output` tolère les écarts usuels du modèle
+(texte autour de l'objet, balises ```json, réponse tronquée par num_predict)
+et répare le JSON plutôt que de régénérer tout le tour.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Schéma de réponse du MJ, passé à Ollama (`format`) pour contraindre le décodage
+NARRATIVE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "narrative": {"type": "string"},
+        "choices": {"type": "array", "items": {"type": "string"}},
+        "location": {"type": "string"},
+        "animation_trigger": {"type": "string"},
+        "sfx": {"type": "string"},
+    },
+    "required": ["narrative", "choices", "location", "animation_trigger", "sfx"],
+}
+
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class NarrativeFieldStream:
+    """
+    Extrait incrémentalement la valeur d'un champ string d'un JSON partiel
+
+    Usage:
+        stream = NarrativeFieldStream()
+        for chunk in chunks:
+            delta = stream.feed(chunk)  # texte nouvellement décodé
+        full_json = stream.raw
+    """
+
+    def __init__(self, field: str = "narrative"):
+        self.field = field
+        self.raw = ""
+        self.value = ""
+        self.done = False
+        self._key_pattern = re.compile(rf'"{re.escape(field)}"\s*:\s*"')
+        self._pos: Optional[int] = None  # Début du texte non décodé de la valeur
+
+    def feed(self, chunk: str) -> str:
+        """
+        Ajoute un fragment de sortie modèle
+
+        Returns:
+            Texte du champ décodé grâce à ce fragment ("" si rien de nouveau)
+        """
+        self.raw += chunk
+        if self.done:
+            return ""
+
+        if self._pos is None:
+            match = self._key_pattern.search(self.raw)
+            if not match:
+                return ""
+            self._pos = match.end()
+
+        decoded = []
+        pos = self._pos
+        raw = self.raw
+        while pos < len(raw):
+            char = raw[pos]
+            if char == '"':
+                self.done = True
+                pos += 1
+                break
+            if char != "\\":
+                decoded.append(char)
+                pos += 1
+                continue
+
+            # Séquence d'échappement: attendre qu'elle soit complète
+            if pos + 1 >= len(raw):
+                break
+            code = raw[pos + 1]
+            if code == "u":
+                if pos + 6 > len(raw):
+                    break
+                try:
+                    codepoint = int(raw[pos + 2 : pos + 6], 16)
+                except ValueError:
+                    codepoint = None
+                if codepoint is not None and 0xD800 <= codepoint < 0xDC00:
+                    # Paire de substitution (emoji): attendre la seconde moitié
+                    if pos + 12 > len(raw):
+                        break
+                    if raw[pos + 6 : pos + 8] == "\\u":
+                        try:
+                            low = int(raw[pos + 8 : pos + 12], 16)
+                            codepoint = 0x10000 + ((codepoint - 0xD800) << 10)
+                            codepoint += low - 0xDC00
+                            pos += 6
+                        except ValueError:
+                            pass
+                if codepoint is not None:
+                    decoded.append(chr(codepoint))
+                pos += 6
+            else:
+                decoded.append(_ESCAPES.get(code, code))
+                pos += 2
+
+        self._pos = pos
+        delta = "".join(decoded)
+        self.value += delta
+        return delta
+
+
+_PARTIAL_ESCAPE = re.compile(
+    r"(?<!\\)((?:\\\\)*)\\u(?:d[89ab][0-9a-f]{2}|[0-9a-f]{0,3})$", re.IGNORECASE
+)
+
+
+class ModelOutputError(ValueError):
+    """Sortie modèle inexploitable même après réparation"""
+
+
+def repair_json(raw: str) -> str:
+    """
+    Extrait le premier objet JSON de `raw` et le complète s'il est tronqué
+
+    - Ignore le texte avant la première accolade et après l'objet
+    - Ferme la chaîne, les tableaux et les objets restés ouverts; un élément
+      de tableau coupé en plein texte ("Par" pour "Partir") est retiré
+    - Retire une virgule ou une clé pendante en fin de texte tronqué
+    """
+    start = raw.find("{")
+    if start < 0:
+        raise ModelOutputError("aucun objet JSON dans la réponse")
+
+    stack: List[str] = []
+    in_string = escaped = False
+    string_start = pos = start
+    for pos in range(start, len(raw)):
+        char = raw[pos]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+            string_start = pos
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if not stack or stack[-1] != char:
+                break
+            stack.pop()
+            if not stack:
+                return raw[start : pos + 1]
+
+    # Tronqué: fermer ce qui est ouvert
+    text = raw[start:]
+    if in_string and stack and stack[-1] == "]":
+        text = text[: string_start - start]
+    elif in_string:
+        if escaped:
+            text = text[:-1]
+        # \uXXXX incomplet, puis moitié de paire de substitution (emoji)
+        for _ in range(2):
+            text = _PARTIAL_ESCAPE.sub(r"\1", text)
+        text += '"'
+    text = _drop_dangling(text)
+    return text + "".join(reversed(stack))
+
+
+def _drop_dangling(text: str) -> str:
+    """Retire la fin incomplète d'un objet tronqué (virgule, clé sans valeur)"""
+    stripped = text.rstrip()
+    if stripped.endswith(","):
+        return stripped[:-1]
+    # {"a": 1, "clé"   ou   {"a": 1, "clé":
+    match = re.search(r'[{,]\s*"(?:[^"\\]|\\.)*"\s*:?\s*$', stripped)
+    if match and (stripped.endswith(":") or _is_key(stripped, match.start())):
+        return stripped[: match.start() + 1].rstrip(",")
+    return stripped
+
+
+def _is_key(text: str, pos: int) -> bool:
+    """La chaîne qui suit `pos` est-elle une clé d'objet (et non un élément de tableau)"""
+    depth = 0
+    for char in reversed(text[: pos + 1]):
+        if char in "}]":
+            depth += 1
+        elif char in "{[":
+            if depth == 0:
+                return char == "{"
+            depth -= 1
+    return False
+
+
+def parse_model_output(
+    raw: str, required: Sequence[str] = ("narrative",)
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Décode la réponse JSON du modèle, en la réparant si besoin
+
+    Returns:
+        (objet décodé, True si une réparation a été nécessaire)
+
+    Raises:
+        ModelOutputError: pas d'objet exploitable ou champ requis absent/vide
+    """
+    repaired = False
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        repaired = True
+        try:
+            data = json.loads(repair_json(raw))
+        except ValueError as e:
+            raise ModelOutputError(f"JSON irréparable: {e}") from e
+
+    if not isinstance(data, dict):
+        raise ModelOutputError("la réponse n'est pas un objet JSON")
+    missing = [key for key in required if not data.get(key)]
+    if missing:
+        raise ModelOutputError(f"champs manquants: {', '.join(missing)}")
+    return data, repaired
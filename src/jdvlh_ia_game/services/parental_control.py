@@ -9,7 +9,11 @@ Fonctionnalités:
 - Logs de sessions (choix, durée, timestamps)
 - Export rapports hebdomadaires (email parents)
 
-Persistance: Par player_id dans StateManager
+Persistance: Par player_id dans StateManager, logs dans le journal
+append-only `EventLog` (hors état de jeu), sessions parentales en cours
+dans l'état partagé entre workers. Chaque worker garde sa copie des
+sessions pour le journal; une session modifiée est annoncée sur le canal
+`parental` et les autres workers oublient leur copie
 """
 
 import hashlib
@@ -20,10 +24,15 @@ from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict, field
 import logging
 
-from ..services.state_manager import StateManager
+from ..services.event_log import EventLog
+from ..services.shared_state import WORKER_ID, get_shared_state
+from ..services.state_manager import StateManager, config
 
 logger = logging.getLogger(__name__)
 
+# Canal de l'état partagé: joueurs dont la session parentale a changé
+INVALIDATION_CHANNEL = "parental"
+
 
 @dataclass
 class ParentalSession:
@@ -39,7 +48,6 @@ class ParentalSession:
         }
     )
     start_time: Optional[datetime.datetime] = None
-    logs: List[Dict] = field(default_factory=list)
     total_play_time: int = 0  # minutes
 
     def __post_init__(self):
@@ -50,17 +58,19 @@ class ParentalSession:
                 "content_level": "10+",
                 "enable_logs": True,
             }
-        if self.logs is None:
-            self.logs = []
 
     def to_dict(self) -> Dict:
-        return asdict(self)
+        data = asdict(self)
+        if self.start_time:
+            data["start_time"] = self.start_time.isoformat()
+        return data
 
     @classmethod
     def from_dict(cls, data: Dict):
-        session = cls(**data)
-        session.logs = data.get("logs", [])
-        return session
+        data = {k: v for k, v in data.items() if k != "logs"}
+        if isinstance(data.get("start_time"), str):
+            data["start_time"] = datetime.datetime.fromisoformat(data["start_time"])
+        return cls(**data)
 
 
 class ParentalControl:
@@ -69,41 +79,84 @@ class ParentalControl:
     def __init__(self):
         self.sessions: Dict[str, ParentalSession] = {}
         self.state_manager = StateManager()
+        self.shared = get_shared_state()
+        self.event_log = EventLog(
+            self.state_manager.db_path, **config.get("parental_logs", {})
+        )
+
+    async def get_or_create_session(self, player_id: str) -> ParentalSession:
+        """
+        Récupère ou crée session parentale pour joueur
 
-    def get_or_create_session(self, player_id: str) -> ParentalSession:
-        """Récupère ou crée session parentale pour joueur"""
-        if player_id not in self.sessions:
+        Relue depuis l'état partagé: un PIN ou un réglage modifié par un autre
+        worker est pris en compte immédiatement.
+        """
+        shared_data = await self.shared.get("parental", player_id)
+        if shared_data is not None:
+            self.sessions[player_id] = ParentalSession.from_dict(shared_data)
+        elif player_id not in self.sessions:
             state = self.state_manager.load_state(player_id)
             parental_data = state.get("parental", {})
             self.sessions[player_id] = ParentalSession.from_dict(parental_data)
+            if parental_data.get("logs"):
+                await self._migrate_logs(player_id, parental_data["logs"])
+            else:
+                await self._share_session(player_id)
         return self.sessions[player_id]
 
-    def set_pin(self, player_id: str, pin: str) -> bool:
+    async def _share_session(self, player_id: str):
+        await self.shared.set("parental", player_id, self.sessions[player_id].to_dict())
+        await self.shared.publish(
+            INVALIDATION_CHANNEL, {"origin": WORKER_ID, "player_id": player_id}
+        )
+
+    async def run_invalidation_listener(self):
+        """Oublie les sessions modifiées par les autres workers (relues au besoin)"""
+        async for message in self.shared.subscribe(INVALIDATION_CHANNEL):
+            if message.get("origin") != WORKER_ID:
+                self.sessions.pop(message.get("player_id"), None)
+
+    async def _migrate_logs(self, player_id: str, logs: List[Dict]):
+        """Déplace les anciens logs de l'état de jeu vers le journal"""
+        for entry in logs:
+            timestamp = datetime.datetime.fromisoformat(entry["timestamp"])
+            self.event_log.append(
+                player_id,
+                entry["event"],
+                entry.get("details"),
+                timestamp=timestamp.timestamp(),
+            )
+        await self._save_session(player_id)
+
+    async def set_pin(self, player_id: str, pin: str) -> bool:
         """Définit code PIN (4 chiffres) - hashé"""
         if not (pin.isdigit() and len(pin) == 4):
             return False
-        session = self.get_or_create_session(player_id)
+        session = await self.get_or_create_session(player_id)
         session.pin_hash = hashlib.sha256(pin.encode()).hexdigest()
-        self._save_session(player_id)
+        await self._save_session(player_id)
         logger.info(f"PIN défini pour {player_id}")
         return True
 
-    def verify_pin(self, player_id: str, pin: str) -> bool:
+    async def verify_pin(self, player_id: str, pin: str) -> bool:
         """Vérifie code PIN"""
-        session = self.get_or_create_session(player_id)
+        return self._check_pin(await self.get_or_create_session(player_id), pin)
+
+    @staticmethod
+    def _check_pin(session: ParentalSession, pin: str) -> bool:
         if not session.pin_hash:
             return False
         pin_hash = hashlib.sha256(pin.encode()).hexdigest()
         return pin_hash == session.pin_hash
 
-    def check_session_allowed(self, player_id: str) -> Tuple[bool, str]:
+    async def check_session_allowed(self, player_id: str) -> Tuple[bool, str]:
         """
         Vérifie si session autorisée :
         - Plages horaires
         - Durée session max
         """
         now = datetime.datetime.now()
-        session = self.get_or_create_session(player_id)
+        session = await self.get_or_create_session(player_id)
 
         # Check heures autorisées
         hour = now.hour
@@ -122,54 +175,64 @@ class ParentalControl:
 
         return True, "OK"
 
-    def start_session(self, player_id: str):
+    async def start_session(self, player_id: str):
         """Démarre session (reset timer)"""
-        session = self.get_or_create_session(player_id)
+        session = await self.get_or_create_session(player_id)
         session.start_time = datetime.datetime.now()
-        self._save_session(player_id)
+        await self._save_session(player_id)
         logger.info(f"Session démarrée pour {player_id}")
 
-    def end_session(self, player_id: str):
+    async def end_session(self, player_id: str):
         """Termine session, calcule temps joué"""
-        session = self.get_or_create_session(player_id)
+        session = await self.get_or_create_session(player_id)
         if session.start_time:
             duration_min = (
                 datetime.datetime.now() - session.start_time
             ).total_seconds() / 60
             session.total_play_time += duration_min
             session.start_time = None
-            self._save_session(player_id)
+            await self._save_session(player_id)
 
-    def log_event(self, player_id: str, event: str, details: Optional[Dict] = None):
-        """Log événement session"""
-        session = self.get_or_create_session(player_id)
+    async def log_event(
+        self, player_id: str, event: str, details: Optional[Dict] = None
+    ):
+        """
+        Log événement session (ajout au journal, sans réécrire l'état)
+
+        Session lue dans la copie du worker: l'état partagé n'est relu que
+        si elle est absente ou invalidée par un autre worker.
+        """
+        session = self.sessions.get(player_id)
+        if session is None:
+            session = await self.get_or_create_session(player_id)
         if session.settings["enable_logs"]:
-            log_entry = {
-                "timestamp": datetime.datetime.now().isoformat(),
-                "event": event,
-                "details": details or {},
-            }
-            session.logs.append(log_entry)
-            # Keep last 100 logs
-            if len(session.logs) > 100:
-                session.logs = session.logs[-100:]
-            self._save_session(player_id)
-
-    def get_session_logs(self, player_id: str) -> List[Dict]:
-        """Récupère logs session"""
-        session = self.get_or_create_session(player_id)
-        return session.logs
-
-    def export_logs(self, player_id: str, parent_email: str) -> bool:
+            self.event_log.append(player_id, event, details)
+
+    async def get_session_logs(
+        self,
+        player_id: str,
+        since: Optional[datetime.datetime] = None,
+        until: Optional[datetime.datetime] = None,
+        limit: Optional[int] = 100,
+    ) -> List[Dict]:
+        """Récupère logs session (les `limit` plus récents, ordre chronologique)"""
+        await self.get_or_create_session(player_id)
+        return await self.event_log.get_events_async(
+            player_id,
+            since=since.timestamp() if since else None,
+            until=until.timestamp() if until else None,
+            limit=limit,
+        )
+
+    async def export_logs(self, player_id: str, parent_email: str) -> bool:
         """Export logs par email (MVP: print + log)"""
         try:
-            logs = self.get_session_logs(player_id)
+            logs = await self.get_session_logs(player_id, limit=20)
+            session = await self.get_or_create_session(player_id)
             report = {
                 "player_id": player_id,
-                "total_play_time": self.get_or_create_session(
-                    player_id
-                ).total_play_time,
-                "logs": logs[-20:],  # Last 20
+                "total_play_time": session.total_play_time,
+                "logs": logs,  # Last 20
                 "generated": datetime.datetime.now().isoformat(),
             }
             report_text = json.dumps(report, indent=2, ensure_ascii=False)
@@ -184,19 +247,22 @@ class ParentalControl:
             logger.error(f"Export logs échoué: {e}")
             return False
 
-    def _save_session(self, player_id: str):
+    async def _save_session(self, player_id: str):
         """Sauvegarde session dans StateManager"""
         state = self.state_manager.load_state(player_id)
         state["parental"] = self.sessions[player_id].to_dict()
         self.state_manager.save_state(player_id, state)
+        await self._share_session(player_id)
 
-    def update_settings(self, player_id: str, settings: Dict, pin: str) -> bool:
+    async def update_settings(self, player_id: str, settings: Dict, pin: str) -> bool:
         """Met à jour settings (vérif PIN)"""
-        session = self.get_or_create_session(player_id)
-        if not self.verify_pin(player_id, pin):
+        session = await self.get_or_create_session(player_id)
+        # PIN vérifié sur la session déjà relue: une seconde relecture
+        # remplacerait l'objet en cache et la modification serait perdue
+        if not self._check_pin(session, pin):
             return False
         session.settings.update(settings)
-        self._save_session(player_id)
+        await self._save_session(player_id)
         return True
 
 
@@ -0,0 +1,94 @@
+"""
+Moteur de persistance SQLite pour JDVLH IA Game
+
+Remplace l'ouverture d'une connexion sqlite3 à chaque appel:
+- Une connexion persistante par fichier de base (partagée par les services)
+- Journal WAL + synchronous=NORMAL (lectures concurrentes, fsync réduits)
+- Requêtes préparées: sqlite3 garde en cache les statements compilés par
+  connexion, une connexion persistante les réutilise d'un appel à l'autre
+- Exécuteur dédié (1 thread) pour les appels async, sans bloquer la boucle
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class PersistenceEngine:
+    """Connexion SQLite persistante en mode WAL"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            db_path,
+            check_same_thread=False,
+            isolation_level=None,  # autocommit, transactions explicites
+            cached_statements=256,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sqlite-io"
+        )
+        logger.info(f"PersistenceEngine ouvert: {db_path} (WAL)")
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        """Exécute une requête (autocommit)"""
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def fetchone(self, sql: str, params: Sequence[Any] = ()) -> Optional[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def fetchall(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def executemany(self, sql: str, rows: Iterable[Sequence[Any]]) -> int:
+        """Exécute une requête pour plusieurs lignes dans une seule transaction"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                cursor = self._conn.executemany(sql, rows)
+            return cursor.rowcount
+
+    async def run(self, func: Callable, *args) -> Any:
+        """Exécute une fonction (bloquante) dans le thread I/O dédié"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def close(self):
+        with self._lock:
+            self._executor.shutdown(wait=True)
+            self._conn.close()
+
+
+# Un moteur par fichier de base
+_engines: Dict[str, PersistenceEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(db_path: str) -> PersistenceEngine:
+    """Récupère (ou ouvre) le moteur partagé pour un fichier de base"""
+    with _engines_lock:
+        engine = _engines.get(db_path)
+        if engine is None:
+            engine = PersistenceEngine(db_path)
+            _engines[db_path] = engine
+        return engine
+
+
+def close_engines():
+    """Ferme tous les moteurs (arrêt serveur, tests)"""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.close()
+        _engines.clear()
@@ -5,17 +5,32 @@ Features :
 - Chargement SRD complet
 - Traduction FR automatique avec fallback EN
 - Feature flags (désactivation progressive)
-- Cache en mémoire
+- Cache en mémoire, indexé (noms FR/EN, plein texte, niveau/tradition/trait)
+- Sorts, objets et monstres (data/pf2e/translated/<langue>)
+- Snapshot binaire (pf2e_snapshot) pour un démarrage rapide, reconstruit
+  automatiquement quand un JSON source change
 """
 
-from typing import Optional, Dict, List
+from typing import TYPE_CHECKING, Optional, Dict, List
 from pathlib import Path
 import json
-import yaml
-from dataclasses import dataclass
+import re
+from dataclasses import asdict, dataclass
 from enum import Enum
 
-from .translation.pf2e_translator import PF2eTranslator
+from ..config import CONFIG_PATH, get_config
+from .pf2e_index import ContentIndex
+from .pf2e_snapshot import Snapshot, source_signature, write_snapshot
+
+if TYPE_CHECKING:
+    from .translation.pf2e_translator import PF2eTranslator
+
+# Balisage Foundry dans les descriptions EN: HTML, [[/r 4d8#feu]], @Compendium[...]{Nom}
+_HTML_TAG = re.compile(r"<[^>]+>")
+_INLINE_ROLL = re.compile(r"\[\[/r\s*([^\]#]+?)\s*(?:#[^\]]*)?\]\]")
+_ENRICHER = re.compile(r"@\w+\[[^\]]*\](?:\{([^}]*)\})?")
+_DICE = re.compile(r"\b\d+d\d+\b")
+_QUALIFIER = re.compile(r"\s*\([^)]*\)$")
 
 
 class ContentType(Enum):
@@ -112,19 +127,31 @@ class PF2eContent:
         self,
         data_dir: Path = Path("data/pf2e"),
         language: str = "fr",
-        config_path: Path = Path(__file__).parent.parent / "config" / "config.yaml",
+        config_path: Path = CONFIG_PATH,
+        use_snapshot: bool = True,
+        snapshot_path: Optional[Path] = None,
     ):
         self.data_dir = Path(data_dir)
         self.language = language
         self.config_path = config_path
-
-        # Translator
-        self.translator = PF2eTranslator()
-
-        # Cache en mémoire
-        self._spells: Dict[str, PF2eSpell] = {}
-        self._items: Dict[str, PF2eItem] = {}
-        self._monsters: Dict[str, PF2eMonster] = {}
+        self.use_snapshot = use_snapshot
+        self.snapshot_path = (
+            Path(snapshot_path)
+            if snapshot_path
+            else self.data_dir / "snapshot" / f"{language}.bin"
+        )
+        self._snapshot: Optional[Snapshot] = None
+
+        # Translator (construit au premier usage: inutile avec un snapshot)
+        self._translator: Optional["PF2eTranslator"] = None
+
+        # Cache en mémoire, indexé
+        self.spells: ContentIndex[PF2eSpell] = ContentIndex()
+        self.items: ContentIndex[PF2eItem] = ContentIndex()
+        self.monsters: ContentIndex[PF2eMonster] = ContentIndex()
+        self._spells: Dict[str, PF2eSpell] = self.spells.entries
+        self._items: Dict[str, PF2eItem] = self.items.entries
+        self._monsters: Dict[str, PF2eMonster] = self.monsters.entries
 
         # Feature flags
         self._feature_config = self._load_feature_config()
@@ -132,12 +159,19 @@ class PF2eContent:
         # Charger contenu
         self._load_all_content()
 
+    @property
+    def translator(self) -> "PF2eTranslator":
+        if self._translator is None:
+            from .translation.pf2e_translator import PF2eTranslator
+
+            self._translator = PF2eTranslator()
+        return self._translator
+
     def _load_feature_config(self) -> Dict:
         """Charger config feature flags depuis config.yaml"""
 
         try:
-            with open(self.config_path, "r", encoding="utf-8") as f:
-                config = yaml.safe_load(f)
+            config = get_config(self.config_path)
 
             pf2e_config = config.get("pf2e", {})
             active_level = pf2e_config.get("active_level", "mvp")
@@ -162,6 +196,17 @@ class PF2eContent:
 
         print(f"[*] Chargement contenu PF2e (langue: {self.language})...")
 
+        sources = source_signature(self._source_files())
+        if self.use_snapshot:
+            snapshot = Snapshot.open_if_fresh(self.snapshot_path, sources)
+            if snapshot:
+                self._attach_snapshot(snapshot)
+                print(
+                    f"[+] Contenu PF2e (snapshot) : {len(self.spells)} sorts, "
+                    f"{len(self.items)} objets, {len(self.monsters)} monstres"
+                )
+                return
+
         # Charger traductions
         translation_dir = self.data_dir / "translated" / self.language
         if translation_dir.exists():
@@ -170,13 +215,56 @@ class PF2eContent:
         else:
             print(f"  [!] Pas de traductions {self.language}, fallback EN")
 
-        # Charger sorts
+        # Charger sorts (SRD brut, sinon données traduites)
         self._load_spells()
+        if not self._spells:
+            self._load_translated_spells()
+
+        self._load_translated_items()
+        self._load_translated_monsters()
 
-        # TODO : Charger items, monsters, etc.
-        print("  [!] Items & monsters non chargés encore")
+        print(
+            f"[+] Contenu PF2e chargé : {len(self.spells)} sorts, "
+            f"{len(self.items)} objets, {len(self.monsters)} monstres"
+        )
 
-        print(f"[+] Contenu PF2e chargé : {len(self._spells)} sorts")
+        if self.use_snapshot:
+            try:
+                write_snapshot(
+                    self.snapshot_path,
+                    {
+                        "spells": self.spells,
+                        "items": self.items,
+                        "monsters": self.monsters,
+                    },
+                    asdict,
+                    sources,
+                )
+                print(f"  [+] Snapshot PF2e écrit: {self.snapshot_path}")
+            except OSError as e:
+                print(f"  [!] Snapshot PF2e non écrit: {e}")
+
+    def _source_files(self) -> List[Path]:
+        """Fichiers dont dépend le contenu (invalident le snapshot)"""
+
+        translation_dir = self.data_dir / "translated" / self.language
+        files = [
+            translation_dir / f"{content_type}.json"
+            for content_type in ("spells", "items", "monsters", "conditions")
+        ]
+        files.extend(sorted((self.data_dir / "raw" / "spells").glob("**/*.json")))
+        return files
+
+    def _attach_snapshot(self, snapshot: Snapshot):
+        """Index en lecture seule, entrées décodées au premier accès"""
+
+        self._snapshot = snapshot
+        self.spells = snapshot.index("spells", PF2eSpell)
+        self.items = snapshot.index("items", PF2eItem)
+        self.monsters = snapshot.index("monsters", PF2eMonster)
+        self._spells = self.spells.entries
+        self._items = self.items.entries
+        self._monsters = self.monsters.entries
 
     def _load_spells(self):
         """Charger sorts depuis raw data"""
@@ -204,12 +292,117 @@ class PF2eContent:
                 for spell_data in spells_list:
                     spell = self._parse_spell(spell_data)
                     if spell:
-                        self._spells[spell.id] = spell
+                        self._index_spell(spell, spell_data.get("name"))
 
             except Exception as e:
                 print(f"[!] Erreur parsing {json_file}: {e}")
                 continue
 
+    def _load_translated(self, content_type: str) -> Dict[str, Dict]:
+        """Charger un fichier data/pf2e/translated/<langue>/<type>.json"""
+
+        path = self.data_dir / "translated" / self.language / f"{content_type}.json"
+        if not path.exists():
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[!] Erreur parsing {path}: {e}")
+            return {}
+
+    def _translated_text(self, data: Dict) -> str:
+        """Description FR, sinon EN débarrassée du balisage Foundry"""
+
+        if data.get("description_fr"):
+            return data["description_fr"].strip()
+        text = data.get("description_en", "")
+        text = _INLINE_ROLL.sub(r"\1", text)
+        text = _ENRICHER.sub(lambda m: m.group(1) or "", text)
+        return " ".join(_HTML_TAG.sub(" ", text).split())
+
+    def _load_translated_spells(self):
+        """Charger sorts depuis les données traduites (SRD brut absent)"""
+
+        for spell_id, data in self._load_translated("spells").items():
+            description = self._translated_text(data)
+            damage = _DICE.search(description)
+            spell = PF2eSpell(
+                id=spell_id,
+                name=data.get("name_fr") or data.get("name_en") or spell_id,
+                description=description,
+                level=data.get("level", 1),
+                traditions=data.get("traditions", []),
+                actions=2,
+                traits=data.get("traits_fr", []),
+                damage=damage.group(0) if damage else None,
+                source=data.get("source", "Unknown"),
+            )
+            self._index_spell(spell, data.get("name_en"))
+
+    def _load_translated_items(self):
+        """Charger objets depuis les données traduites"""
+
+        for item_id, data in self._load_translated("items").items():
+            description = self._translated_text(data)
+            damage = _DICE.search(description) if data.get("type") == "weapon" else None
+            item = PF2eItem(
+                id=item_id,
+                name=data.get("name_fr") or data.get("name_en") or item_id,
+                description=description,
+                type=data.get("type", "equipment"),
+                level=data.get("level", 0),
+                price=data.get("price", {}),
+                damage=damage.group(0) if damage else None,
+                traits=data.get("traits_fr", []),
+            )
+            self.items.add(
+                item.id,
+                item,
+                names=[item.name, data.get("name_en")],
+                text=item.description,
+                level=item.level,
+                traits=[*item.traits, item.type],
+            )
+
+    def _load_translated_monsters(self):
+        """Charger monstres depuis les données traduites (sans bloc de stats)"""
+
+        for monster_id, data in self._load_translated("monsters").items():
+            monster = PF2eMonster(
+                id=monster_id,
+                name=data.get("name_fr") or data.get("name_en") or monster_id,
+                description=self._translated_text(data),
+                level=data.get("level", 0),
+                hp=data.get("hp", 0),
+                ac=data.get("ac", 0),
+                attacks=data.get("attacks", []),
+                abilities=data.get("abilities", {}),
+                traits=data.get("traits_fr", []),
+            )
+            # "Brontosaure (Dinosaure)" est aussi trouvable par "Brontosaure"
+            names = [monster.name, data.get("name_en")]
+            names.append(_QUALIFIER.sub("", monster.name))
+            self.monsters.add(
+                monster.id,
+                monster,
+                names=names,
+                text=monster.description,
+                level=monster.level,
+                traits=monster.traits,
+            )
+
+    def _index_spell(self, spell: PF2eSpell, name_en: Optional[str] = None):
+        self.spells.add(
+            spell.id,
+            spell,
+            names=[spell.name, name_en],
+            text=spell.description,
+            level=spell.level,
+            traits=spell.traits,
+            traditions=spell.traditions,
+        )
+
     def _extract_text_from_entries(self, entries: List) -> str:
         """Extraire texte depuis entries (gère structures complexes)"""
         text_parts = []
@@ -306,10 +499,14 @@ class PF2eContent:
         Returns:
             PF2eSpell ou None si introuvable
         """
-        return self._spells.get(spell_id)
+        return self.spells.get(spell_id)
 
     def get_all_spells(
-        self, filter_by_level: Optional[int] = None, available_only: bool = False
+        self,
+        filter_by_level: Optional[int] = None,
+        available_only: bool = False,
+        tradition: Optional[str] = None,
+        trait: Optional[str] = None,
     ) -> List[PF2eSpell]:
         """
         Liste tous les sorts
@@ -317,34 +514,26 @@ class PF2eContent:
         Args:
             filter_by_level: Filtrer par niveau (ex: <= 3 pour MVP)
             available_only: Si True, respecter feature flags
+            tradition: Filtrer par tradition (ex: "arcane")
+            trait: Filtrer par trait (ex: "fire")
 
         Returns:
             Liste de PF2eSpell
         """
 
-        spells = list(self._spells.values())
-
-        # Filtrer par niveau
-        if filter_by_level is not None:
-            spells = [s for s in spells if s.level <= filter_by_level]
+        max_level = filter_by_level
 
         # Filtrer selon feature flags
         if available_only:
-            max_level = self._feature_config["max_spell_level"]
-            spells = [s for s in spells if s.level <= max_level]
+            flag_level = self._feature_config["max_spell_level"]
+            max_level = flag_level if max_level is None else min(max_level, flag_level)
 
-        return spells
+        return self.spells.filter(max_level=max_level, tradition=tradition, trait=trait)
 
     def get_spell_by_name(self, name: str) -> Optional[PF2eSpell]:
-        """Récupérer sort par nom (FR ou EN)"""
-
-        name_lower = name.lower()
+        """Récupérer sort par nom (FR ou EN, casse et accents ignorés)"""
 
-        for spell in self._spells.values():
-            if spell.name.lower() == name_lower:
-                return spell
-
-        return None
+        return self.spells.get_by_name(name)
 
     def search_spells(self, query: str, limit: int = 10) -> List[PF2eSpell]:
         """
@@ -355,24 +544,41 @@ class PF2eContent:
             limit: Nombre max résultats
 
         Returns:
-            Liste de PF2eSpell
+            Liste de PF2eSpell, les plus pertinents d'abord
         """
 
-        query_lower = query.lower()
-        results = []
+        return self.spells.search(query, limit=limit)
+
+    # ===== OBJETS =====
+    def get_item(self, item_id: str) -> Optional[PF2eItem]:
+        return self.items.get(item_id)
+
+    def get_item_by_name(self, name: str) -> Optional[PF2eItem]:
+        return self.items.get_by_name(name)
+
+    def get_all_items(
+        self, max_level: Optional[int] = None, trait: Optional[str] = None
+    ) -> List[PF2eItem]:
+        """Objets filtrés par niveau max et trait (le type compte comme trait)"""
+        return self.items.filter(max_level=max_level, trait=trait)
+
+    def search_items(self, query: str, limit: int = 10) -> List[PF2eItem]:
+        return self.items.search(query, limit=limit)
+
+    # ===== MONSTRES =====
+    def get_monster(self, monster_id: str) -> Optional[PF2eMonster]:
+        return self.monsters.get(monster_id)
 
-        for spell in self._spells.values():
-            # Chercher dans nom ou description
-            if (
-                query_lower in spell.name.lower()
-                or query_lower in spell.description.lower()
-            ):
-                results.append(spell)
+    def get_monster_by_name(self, name: str) -> Optional[PF2eMonster]:
+        return self.monsters.get_by_name(name)
 
-                if len(results) >= limit:
-                    break
+    def get_all_monsters(
+        self, max_level: Optional[int] = None, trait: Optional[str] = None
+    ) -> List[PF2eMonster]:
+        return self.monsters.filter(max_level=max_level, trait=trait)
 
-        return results
+    def search_monsters(self, query: str, limit: int = 10) -> List[PF2eMonster]:
+        return self.monsters.search(query, limit=limit)
 
 
 # Singleton global (optionnel)
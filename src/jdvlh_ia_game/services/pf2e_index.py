@@ -0,0 +1,202 @@
+"""
+Index de contenu PF2e (sorts, objets, monstres)
+
+Construit une fois au chargement, remplace les parcours linéaires:
+- Noms normalisés (minuscules, sans accents) FR et EN -> ID, lookup O(1)
+- Index inversé des tokens (nom + description), résultats classés
+- Index secondaires niveau / tradition / trait pour les filtres
+"""
+
+import bisect
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Generic, Iterable, List, Optional, Set, TypeVar
+
+T = TypeVar("T")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Mots trop fréquents pour discriminer (FR + EN)
+# fmt: off
+STOPWORDS = {
+    "au", "aux", "avec", "ce", "ces", "dans", "de", "des", "du", "en", "est",
+    "et", "il", "la", "le", "les", "leur", "ou", "par", "pas", "pour", "qui",
+    "sa", "se", "son", "sur", "un", "une", "vos", "votre", "vous",
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in",
+    "is", "it", "its", "of", "on", "or", "that", "the", "to", "with", "you",
+    "your",
+}
+# fmt: on
+
+NAME_WEIGHT = 3.0
+
+
+def fold(text: str) -> str:
+    """Normalise pour comparaison: minuscules, sans accents, tirets -> espaces"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = text.replace("’", "'").replace("-", " ")
+    return " ".join(text.lower().split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokens normalisés d'un texte (sans mots vides)"""
+    return [
+        token
+        for token in _TOKEN_RE.findall(fold(text))
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+class ContentIndex(Generic[T]):
+    """
+    Index d'un type de contenu
+
+    Usage:
+        index = ContentIndex()
+        index.add("fireball", spell, names=["Boule de feu", "Fireball"],
+                  text=spell.description, level=3, traits=["fire"])
+        index.get_by_name("boule de feu")
+        index.search("feu", limit=5)
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, T] = {}
+        self.names: Dict[str, str] = {}
+        self.postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self.by_level: Dict[int, Set[str]] = defaultdict(set)
+        self.by_tradition: Dict[str, Set[str]] = defaultdict(set)
+        self.by_trait: Dict[str, Set[str]] = defaultdict(set)
+        self._vocabulary: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self.entries
+
+    def add(
+        self,
+        entry_id: str,
+        entry: T,
+        names: Iterable[str],
+        text: str = "",
+        level: Optional[int] = None,
+        traits: Iterable[str] = (),
+        traditions: Iterable[str] = (),
+    ):
+        """Ajoute (ou remplace) une entrée"""
+        if entry_id in self.entries:
+            self.remove(entry_id)
+        self.entries[entry_id] = entry
+
+        names = [name for name in names if name]
+        for name in [*names, entry_id]:
+            self.names.setdefault(fold(name), entry_id)
+
+        # Fréquence amortie (1 + log tf) dans le texte, bonus pour le nom
+        counts: Dict[str, int] = defaultdict(int)
+        for token in tokenize(text):
+            counts[token] += 1
+        weights = {token: 1 + math.log(count) for token, count in counts.items()}
+        for name in names:
+            for token in set(tokenize(name)):
+                weights[token] = weights.get(token, 0.0) + NAME_WEIGHT
+        for token, weight in weights.items():
+            self.postings[token][entry_id] = weight
+        self._vocabulary = None
+
+        if level is not None:
+            self.by_level[level].add(entry_id)
+        for trait in traits:
+            self.by_trait[fold(trait)].add(entry_id)
+        for tradition in traditions:
+            self.by_tradition[fold(tradition)].add(entry_id)
+
+    def remove(self, entry_id: str):
+        self.entries.pop(entry_id, None)
+        for key in [k for k, v in self.names.items() if v == entry_id]:
+            del self.names[key]
+        for postings in self.postings.values():
+            postings.pop(entry_id, None)
+        for index in (self.by_level, self.by_tradition, self.by_trait):
+            for ids in index.values():
+                ids.discard(entry_id)
+        self._vocabulary = None
+
+    def get(self, entry_id: str) -> Optional[T]:
+        return self.entries.get(entry_id)
+
+    def get_by_name(self, name: str) -> Optional[T]:
+        """Lookup O(1) par nom FR ou EN (casse et accents ignorés)"""
+        entry_id = self.names.get(fold(name))
+        return self.entries.get(entry_id) if entry_id else None
+
+    def search(self, query: str, limit: int = 10) -> List[T]:
+        """
+        Recherche plein texte classée (TF amorti x IDF)
+
+        Chaque token de la requête correspond aux tokens identiques, et aux
+        tokens qui le prolongent avec un poids réduit ("feu" -> "feux").
+        """
+        scores: Dict[str, float] = defaultdict(float)
+        total = len(self.entries) or 1
+        for token in tokenize(query):
+            for term, factor in self._expand(token):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + total / len(postings))
+                for entry_id, weight in postings.items():
+                    scores[entry_id] += weight * idf * factor
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [self.entries[entry_id] for entry_id, _ in ranked[:limit]]
+
+    def filter(
+        self,
+        max_level: Optional[int] = None,
+        level: Optional[int] = None,
+        tradition: Optional[str] = None,
+        trait: Optional[str] = None,
+    ) -> List[T]:
+        """Entrées correspondant à tous les critères (via index secondaires)"""
+        candidates: Optional[Set[str]] = None
+
+        def restrict(ids: Set[str]):
+            nonlocal candidates
+            candidates = set(ids) if candidates is None else candidates & ids
+
+        if level is not None:
+            restrict(self.by_level.get(level, set()))
+        if max_level is not None:
+            restrict(
+                set().union(
+                    *(ids for lvl, ids in self.by_level.items() if lvl <= max_level)
+                )
+            )
+        if tradition is not None:
+            restrict(self.by_tradition.get(fold(tradition), set()))
+        if trait is not None:
+            restrict(self.by_trait.get(fold(trait), set()))
+
+        if candidates is None:
+            return list(self.entries.values())
+        return [
+            self.entries[entry_id]
+            for entry_id in self.entries
+            if entry_id in candidates
+        ]
+
+    def _expand(self, token: str):
+        """Token exact (poids 1) puis tokens préfixés (poids 0.5)"""
+        yield token, 1.0
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        vocabulary = self._vocabulary
+        position = bisect.bisect_right(vocabulary, token)
+        while position < len(vocabulary) and vocabulary[position].startswith(token):
+            yield vocabulary[position], 0.5
+            position += 1
@@ -0,0 +1,232 @@
+"""
+Snapshot binaire du contenu PF2e
+
+Évite de reparser ~4.4 MB de JSON et de reconstruire les index à chaque
+démarrage:
+- Compilation des sorts/objets/monstres déjà dérivés (et de leurs index)
+  dans un fichier unique, projeté en mémoire (mmap)
+- Index d'offsets: chaque entrée est décodée (marshal) au premier accès
+- Chaînes récurrentes (traits, types, sources) internées au décodage
+- Reconstruction automatique si un JSON source change (mtime/taille) ou si
+  l'interpréteur change: le format marshal n'est pas stable entre versions
+  de Python
+
+Format:
+    MAGIC (4) | version (u32) | Python majeur, mineur, version marshal (3 x u8)
+    | taille en-tête (u32) | en-tête marshal | blobs
+L'en-tête contient les sources et, par type de contenu, l'offset/la taille
+de chaque entrée et de chaque structure d'index (offsets relatifs aux blobs).
+"""
+
+import marshal
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .pf2e_index import ContentIndex
+
+MAGIC = b"PF2S"
+FORMAT_VERSION = 2
+_PREFIX = struct.Struct("<4sI3BxI")
+# Interpréteur qui a écrit le snapshot, vérifié avant tout décodage marshal
+INTERPRETER = (*sys.version_info[:2], marshal.version)
+
+INDEX_SECTIONS = ("names", "postings", "by_level", "by_tradition", "by_trait")
+_INTERNED_FIELDS = ("traits", "traditions", "type", "source", "rarity")
+
+Sources = Dict[str, Tuple[int, int]]
+
+
+def source_signature(paths: List[Path]) -> Sources:
+    """(mtime_ns, taille) de chaque fichier source existant"""
+    signature = {}
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        signature[str(path)] = (stat.st_mtime_ns, stat.st_size)
+    return signature
+
+
+def _intern(record: Dict[str, Any]) -> Dict[str, Any]:
+    for key in _INTERNED_FIELDS:
+        value = record.get(key)
+        if isinstance(value, str):
+            record[key] = sys.intern(value)
+        elif isinstance(value, list):
+            record[key] = [sys.intern(v) if isinstance(v, str) else v for v in value]
+    return record
+
+
+def write_snapshot(
+    path: Path,
+    indexes: Dict[str, ContentIndex],
+    to_record: Callable[[Any], Dict[str, Any]],
+    sources: Sources,
+):
+    """
+    Compile des index en snapshot (écriture atomique)
+
+    Args:
+        indexes: type de contenu -> ContentIndex construit depuis le JSON
+        to_record: entrée -> dict marshalable (ex: dataclasses.asdict)
+        sources: signature des fichiers sources (voir source_signature)
+    """
+    blobs = bytearray()
+
+    def put(value: Any) -> Tuple[int, int]:
+        data = marshal.dumps(value)
+        offset = len(blobs)
+        blobs.extend(data)
+        return offset, len(data)
+
+    sections = {}
+    for content_type, index in indexes.items():
+        sections[content_type] = {
+            "entries": {
+                entry_id: put(to_record(entry))
+                for entry_id, entry in index.entries.items()
+            },
+            "names": put(index.names),
+            "postings": put(dict(index.postings)),
+            "by_level": put({k: list(v) for k, v in index.by_level.items()}),
+            "by_tradition": put({k: list(v) for k, v in index.by_tradition.items()}),
+            "by_trait": put({k: list(v) for k, v in index.by_trait.items()}),
+        }
+
+    header = marshal.dumps({"sources": sources, "sections": sections})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, *INTERPRETER, len(header)))
+        f.write(header)
+        f.write(blobs)
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """Snapshot ouvert en lecture (mmap)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, *interpreter, header_size = _PREFIX.unpack_from(
+                self._map, 0
+            )
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"Snapshot incompatible: {path}")
+            if tuple(interpreter) != INTERPRETER:
+                raise ValueError(
+                    "écrit par Python {}.{} (marshal {})".format(*interpreter)
+                )
+            start = _PREFIX.size
+            header = marshal.loads(self._map[start : start + header_size])
+        except Exception:
+            self.close()
+            raise
+        self._base = start + header_size
+        self.sources: Sources = {k: tuple(v) for k, v in header["sources"].items()}
+        self.sections: Dict[str, Dict] = header["sections"]
+
+    @classmethod
+    def open_if_fresh(cls, path: Path, sources: Sources) -> Optional["Snapshot"]:
+        """Ouvre le snapshot s'il existe et correspond aux sources actuelles"""
+        if not path.exists():
+            return None
+        try:
+            snapshot = cls(path)
+        except Exception as e:
+            print(f"[!] Snapshot PF2e illisible ({e}), reconstruction")
+            return None
+        if snapshot.sources != sources:
+            snapshot.close()
+            return None
+        return snapshot
+
+    def read(self, location: Tuple[int, int]) -> Any:
+        offset, size = location
+        start = self._base + offset
+        return marshal.loads(self._map[start : start + size])
+
+    def index(self, content_type: str, factory: Callable[..., Any]) -> "SnapshotIndex":
+        return SnapshotIndex(self, self.sections.get(content_type, {}), factory)
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+class LazyEntries(Mapping):
+    """id -> entrée, décodée au premier accès puis gardée en cache"""
+
+    def __init__(self, snapshot: Snapshot, locations: Dict, factory: Callable):
+        self._snapshot = snapshot
+        self._locations = locations
+        self._factory = factory
+        self._decoded: Dict[str, Any] = {}
+
+    def __getitem__(self, entry_id: str) -> Any:
+        entry = self._decoded.get(entry_id)
+        if entry is None:
+            location = self._locations[entry_id]
+            entry = self._factory(**_intern(self._snapshot.read(location)))
+            self._decoded[entry_id] = entry
+        return entry
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._locations)
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, entry_id: object) -> bool:
+        return entry_id in self._locations
+
+    @property
+    def decoded_count(self) -> int:
+        return len(self._decoded)
+
+
+class SnapshotIndex(ContentIndex):
+    """
+    ContentIndex adossé à un snapshot
+
+    Les structures d'index ne sont décodées qu'au premier usage (ex: les
+    postings seulement à la première recherche plein texte).
+    """
+
+    def __init__(self, snapshot: Snapshot, section: Dict, factory: Callable):
+        self._snapshot = snapshot
+        self._section = section
+        self._loaded: Dict[str, Any] = {}
+        self._vocabulary = None
+        self.entries = LazyEntries(snapshot, section.get("entries", {}), factory)
+
+    def _section_value(self, name: str) -> Any:
+        if name not in self._loaded:
+            location = self._section.get(name)
+            value = self._snapshot.read(location) if location else {}
+            if name.startswith("by_"):
+                value = {key: set(ids) for key, ids in value.items()}
+            self._loaded[name] = value
+        return self._loaded[name]
+
+    names = property(lambda self: self._section_value("names"))
+    postings = property(lambda self: self._section_value("postings"))
+    by_level = property(lambda self: self._section_value("by_level"))
+    by_tradition = property(lambda self: self._section_value("by_tradition"))
+    by_trait = property(lambda self: self._section_value("by_trait"))
+
+    def add(self, *args, **kwargs):
+        raise TypeError("Index en lecture seule (snapshot)")
+
+    remove = add
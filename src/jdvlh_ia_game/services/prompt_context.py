@@ -0,0 +1,77 @@
+"""
+Contextes Ollama réutilisés d'un tour à l'autre, par joueur
+
+Ollama renvoie avec chaque génération le `context` (tokens du prompt
+système, des tours précédents et de la réponse). Le renvoyer au tour
+suivant évite de réévaluer ce préfixe: seuls les nouveaux tokens (le
+delta du tour) sont traités.
+
+Un contexte est abandonné (le tour suivant repart du prompt système):
+- s'il dépasse `max_tokens` (fenêtre du modèle)
+- si le modèle choisi change (tokens propres à chaque modèle)
+- après une erreur de génération ou un tour servi sans le modèle
+- après `ttl` secondes d'inactivité (le modèle a pu être déchargé)
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class PromptContextStore:
+    """joueur -> (modèle, tokens de contexte, dernière utilisation), LRU borné"""
+
+    def __init__(
+        self, max_tokens: int = 3072, max_players: int = 100, ttl: float = 1800
+    ):
+        self.max_tokens = max_tokens
+        self.max_players = max_players
+        self.ttl = ttl
+        self._contexts: "OrderedDict[str, Tuple[str, List[int], float]]" = OrderedDict()
+        self.stats = {
+            "fresh": 0,
+            "reused": 0,
+            "invalidated": 0,
+            "prompt_eval_tokens": {"fresh": 0, "reused": 0},
+        }
+
+    def get(self, player_id: str, model: str) -> Optional[List[int]]:
+        """Contexte réutilisable pour ce joueur et ce modèle, sinon None"""
+        entry = self._contexts.get(player_id)
+        if entry is not None:
+            entry_model, context, last_used = entry
+            if entry_model == model and time.monotonic() - last_used < self.ttl:
+                self._contexts.move_to_end(player_id)
+                return context
+            self.discard(player_id)
+        return None
+
+    def put(self, player_id: str, model: str, context: Optional[List[int]]):
+        if not context or len(context) > self.max_tokens:
+            self.discard(player_id)
+            return
+        self._contexts[player_id] = (model, context, time.monotonic())
+        self._contexts.move_to_end(player_id)
+        while len(self._contexts) > self.max_players:
+            self._contexts.popitem(last=False)
+
+    def discard(self, player_id: str):
+        if self._contexts.pop(player_id, None) is not None:
+            self.stats["invalidated"] += 1
+
+    def record(self, response: Dict[str, Any], reused: bool):
+        """Comptabilise les tokens de prompt évalués par Ollama pour ce tour"""
+        kind = "reused" if reused else "fresh"
+        self.stats[kind] += 1
+        self.stats["prompt_eval_tokens"][kind] += response.get("prompt_eval_count") or 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        evaluated = self.stats["prompt_eval_tokens"]
+        return {
+            **self.stats,
+            "players": len(self._contexts),
+            "avg_prompt_eval_tokens": {
+                kind: evaluated[kind] / self.stats[kind] if self.stats[kind] else 0
+                for kind in ("fresh", "reused")
+            },
+        }
@@ -5,18 +5,27 @@ Handles quest progression, rewards, and narrative integration
 
 from typing import Dict, Optional
 from datetime import datetime
-import ollama
 
 from ..models.game_entities import Player, Quest, Objective, ObjectiveType, QuestStatus
+from .content_store import get_content_store
+from .llm_client import get_llm_client
+from .llm_scheduler import Priority
 from .model_router import get_router, TaskType
+from .output_parser import parse_model_output
+from .response_cache import normalize
 from .inventory_manager import InventoryManager, ITEM_DATABASE
 
 
+# Generated quests in the content store, keyed by location and player level
+QUEST_NAMESPACE = "quests"
+
+
 class QuestManager:
     """Manages player quests and objectives"""
 
     def __init__(self):
         self.router = get_router()
+        self.llm = get_llm_client()
         self.inventory_manager = InventoryManager()
 
     def start_quest(self, player: Player, quest: Quest) -> Dict[str, any]:
@@ -224,38 +233,62 @@ Réponds en JSON:
 }}"""
 
         try:
-            response = ollama.generate(model=model, prompt=prompt, options=options)
-            import json
-
-            quest_data = json.loads(response["response"])
-
-            # Create quest from AI response
-            objectives = [
-                Objective(
-                    objective_id=f"obj_{i}",
-                    type=ObjectiveType(obj["type"]),
-                    description=obj["description"],
-                    target=obj["target"],
-                )
-                for i, obj in enumerate(quest_data["objectives"])
-            ]
-
-            quest = Quest(
-                quest_id=f"dyn_quest_{player.player_id}_{int(datetime.now().timestamp())}",
-                title=quest_data["title"],
-                description=quest_data["description"],
-                objectives=objectives,
-                xp_reward=quest_data["xp_reward"],
-                gold_reward=quest_data["gold_reward"],
+            response = await self.llm.generate(
+                model=model,
+                prompt=prompt,
+                options=options,
+                priority=Priority.QUEST,
+                player_id=player.player_id,
+                coalesce=True,
+                format="json",
+            )
+            quest_data, _ = parse_model_output(
+                response["response"], required=("title", "objectives")
+            )
+            quest = self._build_quest(player, quest_data)
+            await get_content_store().aput(
+                QUEST_NAMESPACE, self._quest_key(player, location), quest_data
             )
-
             return quest
 
         except Exception as e:
             print(f"Dynamic quest generation failed: {e}")
 
-            # Fallback to template quest
-            return QUEST_TEMPLATES["simple_delivery"]
+        # Fallback: last quest generated for this location and level, then template
+        try:
+            stored = get_content_store().get(
+                QUEST_NAMESPACE, self._quest_key(player, location)
+            )
+            if stored is not None:
+                return self._build_quest(player, stored)
+        except Exception as e:
+            print(f"Stored quest unavailable: {e}")
+        return QUEST_TEMPLATES["simple_delivery"]
+
+    @staticmethod
+    def _quest_key(player: Player, location: str) -> str:
+        return f"{normalize(location)}|{player.level}"
+
+    @staticmethod
+    def _build_quest(player: Player, quest_data: Dict[str, any]) -> Quest:
+        """Create a quest from AI-generated data"""
+        objectives = [
+            Objective(
+                objective_id=f"obj_{i}",
+                type=ObjectiveType(obj["type"]),
+                description=obj["description"],
+                target=obj["target"],
+            )
+            for i, obj in enumerate(quest_data["objectives"])
+        ]
+        return Quest(
+            quest_id=f"dyn_quest_{player.player_id}_{int(datetime.now().timestamp())}",
+            title=quest_data["title"],
+            description=quest_data["description"],
+            objectives=objectives,
+            xp_reward=quest_data["xp_reward"],
+            gold_reward=quest_data["gold_reward"],
+        )
 
     def _find_active_quest(self, player: Player, quest_id: str) -> Optional[Quest]:
         """Find an active quest by ID"""
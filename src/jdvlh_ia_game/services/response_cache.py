@@ -0,0 +1,216 @@
+"""
+Cache de réponses pour les tours narratifs (opt-in)
+
+Beaucoup de choix sont quasi identiques ("Explorer", "Observer", choix
+d'accueil) dans un même lieu et un même état de mémoire. Plutôt que de
+régénérer à chaque fois:
+- Clé: lieu normalisé + empreinte compacte de la mémoire (bucket), puis
+  choix normalisé
+- Choix proches acceptés: similarité de Jaccard sur trigrammes de caractères
+- Seuls les choix courts (peu d'enjeu) sont mis en cache, jamais les sorts
+- Variation: quelques variantes par clé servies à tour de rôle, texte stocké
+  en gabarit ($location, $choice) et choix proposés mélangés
+- TTL, éviction LRU, métriques hits/misses
+"""
+
+import hashlib
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from string import Template
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .narrative_memory import NarrativeMemory
+from .pf2e_index import fold
+
+CACHED_FIELDS = ("narrative", "choices", "location", "animation_trigger", "sfx")
+
+
+def normalize(text: str) -> str:
+    """Minuscules, sans accents ni ponctuation"""
+    return " ".join("".join(c if c.isalnum() else " " for c in fold(text)).split())
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: Set[str], b: Set[str]) -> float:
+    """Indice de Jaccard"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def memory_fingerprint(memory: NarrativeMemory) -> str:
+    """
+    Empreinte compacte de l'état narratif: lieu, personnages actifs, quêtes,
+    dernier événement marquant (le numéro de tour n'en fait pas partie)
+    """
+    characters = sorted(
+        e.name for e in memory.get_active_entities() if e.type == "character"
+    )[:3]
+    last_event = (
+        max(memory.events, key=lambda e: e.turn).description if memory.events else ""
+    )
+    parts = [
+        normalize(memory.current_location),
+        ",".join(normalize(name) for name in characters),
+        ",".join(normalize(quest) for quest in memory.active_quests[:2]),
+        normalize(last_event)[:80],
+    ]
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=8).hexdigest()
+
+
+@dataclass
+class _Entry:
+    choice: str
+    grams: Set[str]
+    expires: float
+    variants: List[Dict[str, Any]] = field(default_factory=list)
+    served: int = 0
+
+
+class ResponseCache:
+    """
+    Usage:
+        cache = ResponseCache(ttl=600)
+        response = cache.lookup(location, choice, fingerprint)
+        if response is None:
+            response = generate(...)
+            cache.store(location, choice, fingerprint, response)
+    """
+
+    def __init__(
+        self,
+        ttl: float = 600,
+        max_entries: int = 512,
+        similarity: float = 0.6,
+        max_choice_words: int = 4,
+        variants: int = 3,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.min_similarity = similarity
+        self.max_choice_words = max_choice_words
+        self.max_variants = variants
+        # (lieu, empreinte) -> choix normalisé -> entrée; ordre des buckets = LRU
+        self._buckets: "OrderedDict[Tuple[str, str], Dict[str, _Entry]]" = OrderedDict()
+        self._size = 0
+        self.stats = {
+            "hits": 0,
+            "similar_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    def cacheable(self, choice: str) -> bool:
+        """Choix court et sans effet de jeu particulier (sort)"""
+        return (
+            "spell:" not in choice.lower()
+            and 0 < len(normalize(choice).split()) <= self.max_choice_words
+        )
+
+    def lookup(
+        self, location: str, choice: str, fingerprint: str
+    ) -> Optional[Dict[str, Any]]:
+        """Réponse mise en cache pour ce choix (ou un choix proche), rendue"""
+        if not self.cacheable(choice):
+            return None
+        bucket_key = (normalize(location), fingerprint)
+        bucket = self._buckets.get(bucket_key)
+        entry, exact = (
+            self._match(bucket, normalize(choice)) if bucket else (None, False)
+        )
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        self._buckets.move_to_end(bucket_key)
+        self.stats["hits"] += 1
+        if not exact:
+            self.stats["similar_hits"] += 1
+        variant = entry.variants[entry.served % len(entry.variants)]
+        entry.served += 1
+        return self._render(variant, location, choice)
+
+    def store(
+        self, location: str, choice: str, fingerprint: str, response: Dict[str, Any]
+    ):
+        """Ajoute une variante de réponse pour ce choix"""
+        if not self.cacheable(choice):
+            return
+        bucket_key = (normalize(location), fingerprint)
+        bucket = self._buckets.setdefault(bucket_key, {})
+        self._buckets.move_to_end(bucket_key)
+        key = normalize(choice)
+        entry = bucket.get(key)
+        if entry is None or entry.expires <= time.monotonic():
+            if entry is None:
+                self._size += 1
+            entry = bucket[key] = _Entry(
+                choice=key, grams=trigrams(key), expires=time.monotonic() + self.ttl
+            )
+        if len(entry.variants) < self.max_variants:
+            entry.variants.append(self._template(response, location, choice))
+            self.stats["stores"] += 1
+        self._evict()
+
+    def _match(
+        self, bucket: Dict[str, _Entry], choice: str
+    ) -> Tuple[Optional[_Entry], bool]:
+        now = time.monotonic()
+        entry = bucket.get(choice)
+        if entry is not None and entry.expires > now:
+            return entry, True
+        grams = trigrams(choice)
+        best, best_score = None, self.min_similarity
+        for candidate in bucket.values():
+            if candidate.expires <= now:
+                continue
+            score = similarity(grams, candidate.grams)
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best, False
+
+    def _evict(self):
+        while self._size > self.max_entries and self._buckets:
+            _, bucket = self._buckets.popitem(last=False)
+            self._size -= len(bucket)
+            self.stats["evictions"] += len(bucket)
+
+    @staticmethod
+    def _template(
+        response: Dict[str, Any], location: str, choice: str
+    ) -> Dict[str, Any]:
+        """Fige la réponse en gabarit: le lieu et le choix deviennent variables"""
+        narrative = response.get("narrative", "").replace("$", "$$")
+        if location:
+            narrative = narrative.replace(location, "$location")
+        if choice:
+            narrative = narrative.replace(choice, "$choice")
+        variant = {key: response[key] for key in CACHED_FIELDS if key in response}
+        variant["narrative"] = narrative
+        return variant
+
+    @staticmethod
+    def _render(variant: Dict[str, Any], location: str, choice: str) -> Dict[str, Any]:
+        response = dict(variant)
+        response["narrative"] = Template(variant["narrative"]).safe_substitute(
+            location=location, choice=choice
+        )
+        choices = list(variant.get("choices", []))
+        random.shuffle(choices)
+        response["choices"] = choices
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": self._size,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+        }
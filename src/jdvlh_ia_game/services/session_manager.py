@@ -7,8 +7,16 @@ Gère:
 - Broadcast sync state (narrative, combat, character)
 - Gestion déconnexions/reconnexions
 - Limite simultané par player (e.g. 3 devices)
+- Compteur joueurs actifs en mémoire (admission O(1)), réconcilié
+  périodiquement avec la base
+- Sessions et sockets enregistrées dans l'état partagé (plusieurs workers):
+  les limites comptent tous les workers, broadcast relaie vers les sockets
+  connectées aux autres workers
 """
 
+import asyncio
+import time
+from collections import OrderedDict
 from fastapi import WebSocket
 from typing import Dict, List, Optional
 from datetime import datetime
@@ -16,10 +24,15 @@ import logging
 
 from ..models.game_entities import Player
 from dataclasses import dataclass, field
+from .shared_state import WORKER_ID, get_shared_state
 from .state_manager import StateManager
 
 logger = logging.getLogger(__name__)
 
+SESSION_TTL = 3600  # même durée que cleanup_inactive
+SOCKET_TTL = 180  # rafraîchi toutes les 60s par cleanup_inactive
+BROADCAST_CHANNEL = "broadcast"
+
 
 class ServerFullError(Exception):
     pass
@@ -45,10 +58,16 @@ class SessionManager:
         self.max_sessions = 10
         self.max_devices_per_player = 3
         self.state_manager = StateManager()
+        # player_id -> dernière activité, du plus ancien au plus récent
+        self.last_seen: "OrderedDict[str, float]" = OrderedDict()
+        self.shared = get_shared_state()
 
     async def create_session(self, player_id: str, device_info: Dict) -> GameSession:
         """Crée session pour nouveau player/device"""
-        if len(self.active_sessions) >= self.max_sessions:
+        if (
+            await self.shared.get("sessions", player_id) is None
+            and await self.shared.count("sessions") >= self.max_sessions
+        ):
             raise ServerFullError("Serveur plein (max 10 joueurs)")
 
         # Load or create game state
@@ -60,22 +79,36 @@ class SessionManager:
             state=state,
         )
         self.active_sessions[player_id] = session
+        await self.shared.set(
+            "sessions",
+            player_id,
+            {
+                "worker": WORKER_ID,
+                "device": device_info,
+                "started_at": session.started_at.isoformat(),
+            },
+            ttl=SESSION_TTL,
+        )
+        self.touch(player_id)
         logger.info(
             f"Session créée pour {player_id} "
-            f"(devices: {len(self.player_sockets.get(player_id, [])) + 1})"
+            f"(devices: {await self.device_count(player_id) + 1})"
         )
         return session
 
     async def add_socket(self, player_id: str, socket):
         """Ajoute socket pour player (multi-device)"""
-        if player_id not in self.player_sockets:
-            self.player_sockets[player_id] = []
-        sockets = self.player_sockets[player_id]
-        if len(sockets) >= self.max_devices_per_player:
+        if await self.device_count(player_id) >= self.max_devices_per_player:
             await socket.close(code=503, reason="Trop de devices pour ce joueur")
             return False
-        sockets.append(socket)
-        logger.info(f"Socket ajouté pour {player_id} (total: {len(sockets)})")
+        self.player_sockets.setdefault(player_id, []).append(socket)
+        await self.shared.add_member(
+            "sockets", player_id, _socket_id(socket), ttl=SOCKET_TTL
+        )
+        logger.info(
+            f"Socket ajouté pour {player_id} "
+            f"(total: {await self.device_count(player_id)})"
+        )
         return True
 
     async def remove_socket(self, player_id: str, socket):
@@ -84,14 +117,50 @@ class SessionManager:
             sockets = self.player_sockets[player_id]
             if socket in sockets:
                 sockets.remove(socket)
+                await self.shared.remove_member(
+                    "sockets", player_id, _socket_id(socket)
+                )
+                self.touch(player_id)
                 if not sockets:
                     del self.player_sockets[player_id]
                 logger.info(f"Socket retiré pour {player_id} (restant: {len(sockets)})")
                 return True
         return False
 
+    async def device_count(self, player_id: str) -> int:
+        """Sockets du joueur, tous workers confondus"""
+        return len(await self.shared.members("sockets", player_id))
+
     async def broadcast(self, player_id: str, event: str, data: Dict):
-        """Broadcast event à tous devices du player"""
+        """Broadcast event à tous devices du player (tous workers)"""
+        local = len(self.player_sockets.get(player_id, []))
+        await self._send_local(player_id, event, data)
+        # Relais seulement si d'autres workers ont des sockets pour ce joueur
+        if await self.device_count(player_id) > local:
+            await self.shared.publish(
+                BROADCAST_CHANNEL,
+                {
+                    "origin": WORKER_ID,
+                    "player_id": player_id,
+                    "event": event,
+                    "data": data,
+                },
+            )
+
+    async def run_broadcast_listener(self):
+        """Relaie aux sockets locales les broadcasts des autres workers"""
+        async for message in self.shared.subscribe(BROADCAST_CHANNEL):
+            if message.get("origin") == WORKER_ID:
+                continue
+            try:
+                await self._send_local(
+                    message["player_id"], message["event"], message["data"]
+                )
+            except Exception as e:
+                logger.error(f"Relais broadcast échoué: {e}")
+
+    async def _send_local(self, player_id: str, event: str, data: Dict):
+        """Envoie aux sockets du player connectées à ce worker"""
         if player_id in self.player_sockets:
             sockets = self.player_sockets[player_id][:]
             disconnected = []
@@ -117,9 +186,9 @@ class SessionManager:
             "location": getattr(session, "location", ""),
             "inventory": getattr(session, "inventory", []),
             "quests": getattr(session, "quests", []),
-            "combat": getattr(session, "combat", None),
+            "combat": await self.shared.get("combats", player_id),
             "session_info": {
-                "devices": len(self.player_sockets.get(player_id, [])),
+                "devices": await self.device_count(player_id),
                 "started_at": (
                     session.started_at.isoformat() if session.started_at else None
                 ),
@@ -131,10 +200,13 @@ class SessionManager:
     ):
         """Update narrative et broadcast"""
         if player_id in self.active_sessions:
-            self.active_sessions[player_id].current_narrative = narrative
-            self.state_manager.save_state(
-                player_id, self.active_sessions[player_id].state
-            )
+            session = self.active_sessions[player_id]
+            session.current_narrative = narrative
+            self.touch(player_id)
+            # État courant du cache: la copie de la session a pu être
+            # invalidée par un autre worker
+            session.state = await self.state_manager.load_state_async(player_id)
+            await self.state_manager.save_state_async(player_id, session.state)
             await self.broadcast(
                 player_id, "narrative", {"narrative": narrative, "choices": choices}
             )
@@ -147,17 +219,64 @@ class SessionManager:
         """Update combat et broadcast"""
         await self.broadcast(player_id, "combat", {"combat": combat})
 
+    # ===== JOUEURS ACTIFS =====
+    def touch(self, player_id: str):
+        """Marque le joueur actif maintenant (connexion, tour, déconnexion)"""
+        self.last_seen[player_id] = time.time()
+        self.last_seen.move_to_end(player_id)
+
+    def get_active_count(self) -> int:
+        """
+        Joueurs actifs depuis moins de `session_ttl` (même règle que la base)
+
+        Les entrées sont triées par activité: l'expiration ne parcourt que
+        les joueurs expirés, le comptage est O(1) amorti.
+        """
+        cutoff = time.time() - self.state_manager.session_ttl
+        while self.last_seen:
+            player_id, last = next(iter(self.last_seen.items()))
+            if last > cutoff:
+                break
+            self.last_seen.popitem(last=False)
+        return len(self.last_seen)
+
+    async def reconcile(self):
+        """Recale le compteur sur la base (joueurs actifs via d'autres chemins)"""
+        rows = await self.state_manager.get_active_players_async()
+        merged = dict(self.last_seen)
+        for player_id, last in rows:
+            if last > merged.get(player_id, 0):
+                merged[player_id] = last
+        self.last_seen = OrderedDict(sorted(merged.items(), key=lambda item: item[1]))
+        return self.get_active_count()
+
     async def cleanup_inactive(self):
-        """Nettoie sessions inactives"""
-        now = datetime.now()
-        to_remove = []
-        for player_id, session in self.active_sessions.items():
-            if (now - session.started_at).total_seconds() > 3600:  # 1h inactive
-                to_remove.append(player_id)
-        for player_id in to_remove:
-            del self.active_sessions[player_id]
-            await self.state_manager.cleanup_inactive()
-            logger.info(f"Session nettoyée: {player_id}")
+        """Nettoie sessions inactives et réconcilie le compteur (toutes les 60s)"""
+        while True:
+            await asyncio.sleep(60)
+            now = datetime.now()
+            to_remove = []
+            for player_id, session in self.active_sessions.items():
+                if (now - session.started_at).total_seconds() > 3600:  # 1h inactive
+                    to_remove.append(player_id)
+            for player_id in to_remove:
+                del self.active_sessions[player_id]
+                await self.shared.delete("sessions", player_id)
+                logger.info(f"Session nettoyée: {player_id}")
+            # Heartbeat: les sockets d'un worker arrêté expirent d'elles-mêmes
+            for player_id, sockets in self.player_sockets.items():
+                for socket in sockets:
+                    await self.shared.add_member(
+                        "sockets", player_id, _socket_id(socket), ttl=SOCKET_TTL
+                    )
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Réconciliation joueurs actifs échouée: {e}")
+
+
+def _socket_id(socket) -> str:
+    return f"{WORKER_ID}:{id(socket)}"
 
 
 # Singleton
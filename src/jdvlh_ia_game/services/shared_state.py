@@ -0,0 +1,379 @@
+"""
+État partagé entre workers pour JDVLH IA Game
+
+Sessions, routage des sockets et combats étaient des dicts propres à chaque
+process: impossible de lancer plusieurs workers uvicorn sans casser la
+synchro multi-device et les limites. Ce module fournit un backend commun:
+- Clés/valeurs par espace de noms (valeurs JSON), avec expiration
+- Ensembles de membres par clé (ex: sockets d'un joueur), avec expiration
+- Canal de diffusion publish/subscribe entre workers
+
+Backends:
+- "memory" (défaut): en process, un seul worker
+- "sqlite": fichier SQLite en WAL partagé par les workers d'une même machine;
+  requêtes et scrutation du canal exécutées dans le thread I/O du moteur
+
+Les sockets restent locales au worker; seules leurs identités sont partagées.
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from ..config import get_config
+from .persistence import get_engine
+
+config = get_config()
+
+# Identifiant de ce worker (origine des messages diffusés)
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class SharedStateBackend(ABC):
+    """
+    Interface commune des backends d'état partagé
+
+    Méthodes async: un backend sur disque ou réseau ne bloque jamais la
+    boucle d'événements (les sockets des autres joueurs).
+    """
+
+    # ===== CLÉS / VALEURS =====
+    @abstractmethod
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Valeur (copie), None si absente ou expirée"""
+
+    @abstractmethod
+    async def set(
+        self, namespace: str, key: str, value: Any, ttl: Optional[float] = None
+    ):
+        """Écrit une valeur JSON, expirée après `ttl` secondes si fourni"""
+
+    @abstractmethod
+    async def delete(self, namespace: str, key: str):
+        """Supprime une valeur"""
+
+    @abstractmethod
+    async def keys(self, namespace: str) -> List[str]:
+        """Clés non expirées de l'espace de noms"""
+
+    async def count(self, namespace: str) -> int:
+        return len(await self.keys(namespace))
+
+    # ===== ENSEMBLES =====
+    @abstractmethod
+    async def add_member(
+        self, namespace: str, key: str, member: str, ttl: Optional[float] = None
+    ):
+        """Ajoute (ou rafraîchit l'expiration d') un membre"""
+
+    @abstractmethod
+    async def remove_member(self, namespace: str, key: str, member: str):
+        """Retire un membre"""
+
+    @abstractmethod
+    async def members(self, namespace: str, key: str) -> Set[str]:
+        """Membres non expirés"""
+
+    # ===== DIFFUSION =====
+    @abstractmethod
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        """Diffuse un message JSON aux abonnés de `channel` (tous workers)"""
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> AsyncIterator[Dict[str, Any]]:
+        """Messages publiés sur `channel` après l'abonnement"""
+
+    def close(self):
+        pass
+
+
+def _expires(ttl: Optional[float]) -> Optional[float]:
+    return time.time() + ttl if ttl else None
+
+
+def _alive(expires: Optional[float]) -> bool:
+    return expires is None or expires > time.time()
+
+
+class InMemoryBackend(SharedStateBackend):
+    """
+    Backend en process (un seul worker)
+
+    Les valeurs passent par JSON comme pour les autres backends: l'appelant
+    reçoit une copie, jamais l'objet stocké.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Dict[str, Tuple[str, Optional[float]]]] = defaultdict(
+            dict
+        )
+        self._members: Dict[Tuple[str, str], Dict[str, Optional[float]]] = defaultdict(
+            dict
+        )
+        self._subscribers: Dict[str, List[asyncio.Queue]] = defaultdict(list)
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        item = self._values[namespace].get(key)
+        if item is None:
+            return None
+        if not _alive(item[1]):
+            del self._values[namespace][key]
+            return None
+        return json.loads(item[0])
+
+    async def set(
+        self, namespace: str, key: str, value: Any, ttl: Optional[float] = None
+    ):
+        self._values[namespace][key] = (json.dumps(value), _expires(ttl))
+
+    async def delete(self, namespace: str, key: str):
+        self._values[namespace].pop(key, None)
+
+    async def keys(self, namespace: str) -> List[str]:
+        values = self._values[namespace]
+        for key in [k for k, (_, expires) in values.items() if not _alive(expires)]:
+            del values[key]
+        return list(values)
+
+    async def add_member(
+        self, namespace: str, key: str, member: str, ttl: Optional[float] = None
+    ):
+        self._members[(namespace, key)][member] = _expires(ttl)
+
+    async def remove_member(self, namespace: str, key: str, member: str):
+        members = self._members.get((namespace, key))
+        if members is not None:
+            members.pop(member, None)
+            if not members:
+                del self._members[(namespace, key)]
+
+    async def members(self, namespace: str, key: str) -> Set[str]:
+        members = self._members.get((namespace, key), {})
+        return {member for member, expires in members.items() if _alive(expires)}
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        payload = json.dumps(message)
+        for queue in self._subscribers[channel]:
+            queue.put_nowait(payload)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[Dict[str, Any]]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[channel].append(queue)
+        try:
+            while True:
+                yield json.loads(await queue.get())
+        finally:
+            self._subscribers[channel].remove(queue)
+
+
+class SQLiteBackend(SharedStateBackend):
+    """
+    Backend SQLite partagé par les workers d'une même machine
+
+    Le canal de diffusion est une table de messages lue par scrutation
+    (`poll_interval`); les messages de plus de `message_ttl` secondes sont
+    purgés à la publication.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "shared_state.db",
+        poll_interval: float = 0.05,
+        message_ttl: float = 60.0,
+    ):
+        self.engine = get_engine(db_path)
+        self.poll_interval = poll_interval
+        self.message_ttl = message_ttl
+        self.init_db()
+
+    def init_db(self):
+        self.engine.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shared_values (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires REAL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self.engine.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shared_members (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                member TEXT NOT NULL,
+                expires REAL,
+                PRIMARY KEY (namespace, key, member)
+            )
+            """
+        )
+        self.engine.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shared_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                ts REAL NOT NULL
+            )
+            """
+        )
+
+    # Requêtes exécutées dans le thread I/O du moteur, hors boucle d'événements
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        return await self.engine.run(self._get, namespace, key)
+
+    async def set(
+        self, namespace: str, key: str, value: Any, ttl: Optional[float] = None
+    ):
+        await self.engine.run(self._set, namespace, key, value, ttl)
+
+    async def delete(self, namespace: str, key: str):
+        await self.engine.run(self._delete, namespace, key)
+
+    async def keys(self, namespace: str) -> List[str]:
+        return await self.engine.run(self._keys, namespace)
+
+    async def count(self, namespace: str) -> int:
+        return await self.engine.run(self._count, namespace)
+
+    async def add_member(
+        self, namespace: str, key: str, member: str, ttl: Optional[float] = None
+    ):
+        await self.engine.run(self._add_member, namespace, key, member, ttl)
+
+    async def remove_member(self, namespace: str, key: str, member: str):
+        await self.engine.run(self._remove_member, namespace, key, member)
+
+    async def members(self, namespace: str, key: str) -> Set[str]:
+        return await self.engine.run(self._members, namespace, key)
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        await self.engine.run(self._publish, channel, message)
+
+    def _get(self, namespace: str, key: str) -> Optional[Any]:
+        row = self.engine.fetchone(
+            "SELECT value FROM shared_values WHERE namespace = ? AND key = ? "
+            "AND (expires IS NULL OR expires > ?)",
+            (namespace, key, time.time()),
+        )
+        return json.loads(row[0]) if row else None
+
+    def _set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        self.engine.execute(
+            "INSERT OR REPLACE INTO shared_values (namespace, key, value, expires) "
+            "VALUES (?, ?, ?, ?)",
+            (namespace, key, json.dumps(value), _expires(ttl)),
+        )
+
+    def _delete(self, namespace: str, key: str):
+        self.engine.execute(
+            "DELETE FROM shared_values WHERE namespace = ? AND key = ?",
+            (namespace, key),
+        )
+
+    def _keys(self, namespace: str) -> List[str]:
+        rows = self.engine.fetchall(
+            "SELECT key FROM shared_values WHERE namespace = ? "
+            "AND (expires IS NULL OR expires > ?)",
+            (namespace, time.time()),
+        )
+        return [row[0] for row in rows]
+
+    def _count(self, namespace: str) -> int:
+        row = self.engine.fetchone(
+            "SELECT COUNT(*) FROM shared_values WHERE namespace = ? "
+            "AND (expires IS NULL OR expires > ?)",
+            (namespace, time.time()),
+        )
+        return row[0]
+
+    def _add_member(
+        self, namespace: str, key: str, member: str, ttl: Optional[float] = None
+    ):
+        self.engine.execute(
+            "INSERT OR REPLACE INTO shared_members (namespace, key, member, expires) "
+            "VALUES (?, ?, ?, ?)",
+            (namespace, key, member, _expires(ttl)),
+        )
+
+    def _remove_member(self, namespace: str, key: str, member: str):
+        self.engine.execute(
+            "DELETE FROM shared_members WHERE namespace = ? AND key = ? AND member = ?",
+            (namespace, key, member),
+        )
+
+    def _members(self, namespace: str, key: str) -> Set[str]:
+        rows = self.engine.fetchall(
+            "SELECT member FROM shared_members WHERE namespace = ? AND key = ? "
+            "AND (expires IS NULL OR expires > ?)",
+            (namespace, key, time.time()),
+        )
+        return {row[0] for row in rows}
+
+    def _publish(self, channel: str, message: Dict[str, Any]):
+        now = time.time()
+        self.engine.execute(
+            "INSERT INTO shared_messages (channel, payload, ts) VALUES (?, ?, ?)",
+            (channel, json.dumps(message), now),
+        )
+        self.engine.execute(
+            "DELETE FROM shared_messages WHERE ts < ?", (now - self.message_ttl,)
+        )
+
+    async def subscribe(self, channel: str) -> AsyncIterator[Dict[str, Any]]:
+        row = await self.engine.run(
+            self.engine.fetchone, "SELECT MAX(id) FROM shared_messages"
+        )
+        last_id = row[0] or 0
+        while True:
+            rows = await self.engine.run(self._poll, channel, last_id)
+            for message_id, payload in rows:
+                last_id = message_id
+                yield json.loads(payload)
+            if not rows:
+                await asyncio.sleep(self.poll_interval)
+
+    def _poll(self, channel: str, last_id: int) -> List[Tuple[int, str]]:
+        return self.engine.fetchall(
+            "SELECT id, payload FROM shared_messages "
+            "WHERE channel = ? AND id > ? ORDER BY id",
+            (channel, last_id),
+        )
+
+
+BACKENDS = {"memory": InMemoryBackend, "sqlite": SQLiteBackend}
+
+
+def create_backend(name: str = "memory", **options) -> SharedStateBackend:
+    """Instancie un backend par nom ("memory", "sqlite")"""
+    if name not in BACKENDS:
+        raise ValueError(f"Backend d'état partagé inconnu: {name}")
+    return BACKENDS[name](**options)
+
+
+# Singleton
+_backend_instance: Optional[SharedStateBackend] = None
+
+
+def get_shared_state() -> SharedStateBackend:
+    """Backend configuré (`shared_state.backend` dans config.yaml)"""
+    global _backend_instance
+    if _backend_instance is None:
+        options = dict(config.get("shared_state", {}))
+        _backend_instance = create_backend(options.pop("backend", "memory"), **options)
+    return _backend_instance
+
+
+def reset_shared_state():
+    """Reset pour tests"""
+    global _backend_instance
+    if _backend_instance is not None:
+        _backend_instance.close()
+    _backend_instance = None
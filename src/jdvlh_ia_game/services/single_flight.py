@@ -0,0 +1,101 @@
+"""
+Regroupement des requêtes identiques en cours (single-flight)
+
+Plusieurs appels concurrents avec la même clé partagent une seule
+exécution; le résultat peut en plus être gardé quelques secondes
+(cache TTL borné, éviction LRU) pour les appels qui suivent.
+
+Si tous les appelants abandonnent (annulation), l'exécution partagée est
+annulée elle aussi.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Usage:
+        flights = SingleFlight(cache_ttl=30)
+        result = await flights.do(key, lambda: fetch(...), cache=True)
+    """
+
+    def __init__(self, cache_ttl: float = 0.0, max_entries: int = 256):
+        self.cache_ttl = cache_ttl
+        self.max_entries = max_entries
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._results: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.stats = {"calls": 0, "coalesced": 0, "cache_hits": 0}
+
+    async def do(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        cache: bool = False,
+    ) -> Any:
+        """
+        Exécute `factory()` une seule fois pour tous les appels concurrents
+        de même clé
+
+        Args:
+            cache: garder le résultat `cache_ttl` secondes (si cache_ttl > 0)
+        """
+        self.stats["calls"] += 1
+        if cache:
+            cached = self._cached(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                return cached
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._landed(key, flight, cache))
+        else:
+            self.stats["coalesced"] += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                flight.task.cancel()
+
+    def _landed(self, key: Hashable, flight: _Flight, cache: bool):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        task = flight.task
+        if cache and self.cache_ttl > 0 and not task.cancelled():
+            if task.exception() is None:
+                self._results[key] = (time.monotonic() + self.cache_ttl, task.result())
+                self._results.move_to_end(key)
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+
+    def _cached(self, key: Hashable) -> Any:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= time.monotonic():
+            del self._results[key]
+            return None
+        self._results.move_to_end(key)
+        return value
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "in_flight": len(self._flights),
+            "cached": len(self._results),
+        }
@@ -1,32 +1,119 @@
 import asyncio
 import json
-import sqlite3
 import time
-from typing import Any, Dict
-from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
-import yaml
+from ..config import get_config
+from .persistence import get_engine
+from .shared_state import WORKER_ID, get_shared_state
 
-# Chemin absolu vers config.yaml
-BASE_DIR = Path(__file__).parent.parent
-CONFIG_PATH = BASE_DIR / "config" / "config.yaml"
-with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-    config = yaml.safe_load(f)
+config = get_config()
 
 DB_PATH = "game.db"
 
+SELECT_STATE = "SELECT state_json FROM game_states WHERE player_id = ?"
+UPSERT_STATE = (
+    "INSERT OR REPLACE INTO game_states (player_id, state_json, last_activity) "
+    "VALUES (?, ?, ?)"
+)
+# Canal de l'état partagé: joueurs dont l'état vient d'être écrit en base
+INVALIDATION_CHANNEL = "game_states"
+
+DELETE_INACTIVE = "DELETE FROM game_states WHERE last_activity < ?"
+COUNT_ACTIVE = "SELECT COUNT(*) FROM game_states WHERE last_activity > ?"
+SELECT_ACTIVE = (
+    "SELECT player_id, last_activity FROM game_states WHERE last_activity > ?"
+)
+
+
+class WriteBehindCache:
+    """
+    États joueurs en mémoire avec écriture différée
+
+    Tous les services (WebSocket, SessionManager, ParentalControl...) partagent
+    le même objet d'état par joueur. `save_state` ne fait que marquer l'état
+    comme modifié; les états modifiés sont écrits ensemble, en une transaction,
+    à chaque flush (périodique, déconnexion, arrêt serveur).
+
+    Plusieurs workers: chaque flush est annoncé sur l'état partagé et les
+    autres workers oublient leur copie propre du joueur (relue en base au
+    prochain accès). Deux workers modifiant le même joueur entre deux flushs
+    restent en conflit (dernier écrit gagnant), signalé dans `conflicts`.
+    """
 
-class StateManager:
     def __init__(self):
-        self.db_path = DB_PATH
+        self.states: Dict[str, Dict[str, Any]] = {}
+        self.last_access: Dict[str, float] = {}
+        self.dirty: Set[str] = set()
+        # Écrits en base par un flush synchrone, pas encore annoncés
+        self.unannounced: Set[str] = set()
+        self.conflicts = 0
+
+    def get(self, player_id: str) -> Optional[Dict[str, Any]]:
+        state = self.states.get(player_id)
+        if state is not None:
+            self.last_access[player_id] = time.time()
+        return state
+
+    def put(self, player_id: str, state: Dict[str, Any], dirty: bool = True):
+        self.states[player_id] = state
+        self.last_access[player_id] = time.time()
+        if dirty:
+            self.dirty.add(player_id)
+
+    def take_dirty(
+        self, player_ids: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, str, float]]:
+        """Sérialise les états modifiés et les marque propres"""
+        targets = self.dirty if player_ids is None else self.dirty & set(player_ids)
+        rows = [
+            (pid, json.dumps(self.states[pid]), self.last_access[pid])
+            for pid in targets
+        ]
+        self.dirty -= {row[0] for row in rows}
+        return rows
+
+    def invalidate(self, player_id: str) -> bool:
+        """Oublie la copie d'un joueur écrite par un autre worker"""
+        if player_id in self.dirty:
+            self.conflicts += 1
+            return False
+        self.states.pop(player_id, None)
+        self.last_access.pop(player_id, None)
+        return True
+
+    def evict_idle(self, cutoff: float) -> int:
+        """Retire les états propres non utilisés depuis `cutoff`"""
+        idle = [
+            pid
+            for pid, last in self.last_access.items()
+            if last < cutoff and pid not in self.dirty
+        ]
+        for pid in idle:
+            del self.states[pid]
+            del self.last_access[pid]
+        return len(idle)
+
+
+# Un cache par fichier de base, partagé par toutes les instances StateManager
+_caches: Dict[str, WriteBehindCache] = {}
+
+
+class StateManager:
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self.engine = get_engine(db_path)
+        self.cache = _caches.setdefault(db_path, WriteBehindCache())
+        self.shared = get_shared_state()
         self.session_ttl = config["server"]["session_ttl"]
         self.max_players = config["server"]["max_players"]
+        persistence_config = config.get("persistence", {})
+        self.write_behind = persistence_config.get("write_behind", True)
+        self.flush_interval = persistence_config.get("flush_interval", 1.0)
         self.init_db()
 
     def init_db(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
+        self.engine.execute(
             """
             CREATE TABLE IF NOT EXISTS game_states (
                 player_id TEXT PRIMARY KEY,
@@ -35,17 +122,43 @@ class StateManager:
             )
         """
         )
-        conn.commit()
-        conn.close()
+        self.engine.execute(
+            "CREATE INDEX IF NOT EXISTS idx_game_states_last_activity "
+            "ON game_states (last_activity)"
+        )
 
     def load_state(self, player_id: str) -> Dict[str, Any]:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT state_json FROM game_states WHERE player_id = ?", (player_id,)
-        )
-        row = cursor.fetchone()
-        conn.close()
+        state = self.cache.get(player_id)
+        if state is None:
+            state = self._read_state(player_id)
+            self.cache.put(player_id, state, dirty=False)
+        return state
+
+    def save_state(self, player_id: str, state: Dict[str, Any]):
+        self.cache.put(player_id, state)
+        if not self.write_behind:
+            self.flush([player_id])
+
+    def flush(self, player_ids: Optional[Iterable[str]] = None) -> int:
+        """Écrit les états modifiés (tous ou ceux de `player_ids`)"""
+        rows = self.cache.take_dirty(player_ids)
+        if rows:
+            try:
+                self.engine.executemany(UPSERT_STATE, rows)
+            except Exception:
+                self.cache.dirty.update(row[0] for row in rows)
+                raise
+            # Annoncé au prochain flush async (hors boucle ici)
+            self.cache.unannounced.update(row[0] for row in rows)
+        return len(rows)
+
+    def get_active_count(self) -> int:
+        self.flush()
+        row = self.engine.fetchone(COUNT_ACTIVE, (time.time() - self.session_ttl,))
+        return row[0]
+
+    def _read_state(self, player_id: str) -> Dict[str, Any]:
+        row = self.engine.fetchone(SELECT_STATE, (player_id,))
         if row:
             return json.loads(row[0])
         return {
@@ -54,39 +167,85 @@ class StateManager:
             "current_location": "la Comté",
         }
 
-    def save_state(self, player_id: str, state: Dict[str, Any]):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT OR REPLACE INTO game_states (player_id, state_json, last_activity) "
-            "VALUES (?, ?, ?)",
-            (player_id, json.dumps(state), time.time()),
+    # ===== API async (thread I/O dédié, ne bloque pas la boucle) =====
+    async def load_state_async(self, player_id: str) -> Dict[str, Any]:
+        state = self.cache.get(player_id)
+        if state is None:
+            loaded = await self.engine.run(self._read_state, player_id)
+            # Un autre service a pu charger le joueur pendant la lecture
+            state = self.cache.get(player_id)
+            if state is None:
+                state = loaded
+                self.cache.put(player_id, state, dirty=False)
+        return state
+
+    async def save_state_async(self, player_id: str, state: Dict[str, Any]):
+        self.cache.put(player_id, state)
+        if not self.write_behind:
+            await self.flush_async([player_id])
+
+    async def flush_async(self, player_ids: Optional[Iterable[str]] = None) -> int:
+        # Sérialisation sur la boucle (les états y sont modifiés), écriture en thread
+        rows = self.cache.take_dirty(player_ids)
+        if rows:
+            try:
+                await self.engine.run(self.engine.executemany, UPSERT_STATE, rows)
+            except Exception:
+                self.cache.dirty.update(row[0] for row in rows)
+                raise
+        await self._announce({row[0] for row in rows})
+        return len(rows)
+
+    async def _announce(self, player_ids: Set[str]):
+        """Signale aux autres workers les joueurs écrits en base"""
+        player_ids = player_ids | self.cache.unannounced
+        if not player_ids:
+            return
+        self.cache.unannounced.clear()
+        await self.shared.publish(
+            INVALIDATION_CHANNEL,
+            {"origin": WORKER_ID, "player_ids": sorted(player_ids)},
         )
-        conn.commit()
-        conn.close()
+
+    async def run_invalidation_listener(self):
+        """Oublie les états écrits par les autres workers (relus en base)"""
+        async for message in self.shared.subscribe(INVALIDATION_CHANNEL):
+            if message.get("origin") == WORKER_ID:
+                continue
+            for player_id in message.get("player_ids", []):
+                if not self.cache.invalidate(player_id):
+                    print(f"[!] État {player_id} modifié par deux workers")
+
+    async def get_active_count_async(self) -> int:
+        await self.flush_async()
+        return await self.engine.run(
+            lambda: self.engine.fetchone(
+                COUNT_ACTIVE, (time.time() - self.session_ttl,)
+            )[0]
+        )
+
+    async def get_active_players_async(self) -> List[Tuple[str, float]]:
+        """(player_id, last_activity) des joueurs actifs (scan d'index)"""
+        await self.flush_async()
+        return await self.engine.run(
+            self.engine.fetchall, SELECT_ACTIVE, (time.time() - self.session_ttl,)
+        )
+
+    async def run_flusher(self):
+        """Flush périodique des états modifiés (une transaction par intervalle)"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush_async()
+            except Exception as e:
+                print(f"[!] Flush états échoué: {e}")
 
     async def cleanup_inactive(self):
         while True:
             await asyncio.sleep(60)
-            now = time.time()
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(
-                "DELETE FROM game_states WHERE last_activity < ?",
-                (now - self.session_ttl,),
+            cutoff = time.time() - self.session_ttl
+            self.cache.evict_idle(cutoff)
+            cursor = await self.engine.run(
+                self.engine.execute, DELETE_INACTIVE, (cutoff,)
             )
-            deleted = cursor.rowcount
-            conn.commit()
-            conn.close()
-            print(f"Nettoyé {deleted} sessions inactives DB.")
-
-    def get_active_count(self) -> int:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT COUNT(*) FROM game_states WHERE last_activity > ?",
-            (time.time() - self.session_ttl,),
-        )
-        count = cursor.fetchone()[0]
-        conn.close()
-        return count
+            print(f"Nettoyé {cursor.rowcount} sessions inactives DB.")
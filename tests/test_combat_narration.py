@@ -0,0 +1,167 @@
+"""
+Tests for template-first combat narration
+"""
+
+import asyncio
+import random
+import time
+
+import pytest
+
+from jdvlh_ia_game.core import game_server
+from jdvlh_ia_game.models.game_entities import (
+    CharacterClass,
+    CombatAction,
+    Enemy,
+    EnemyType,
+    Player,
+    Race,
+)
+from jdvlh_ia_game.services.combat_engine import CombatEngine
+from jdvlh_ia_game.services.combat_narration import CombatNarrator, damage_band
+from jdvlh_ia_game.services.shared_state import reset_shared_state
+
+
+def make_player() -> Player:
+    return Player(
+        player_id="p1",
+        name="Aragorn",
+        race=Race.HUMAIN,
+        class_type=CharacterClass.GUERRIER,
+        level=1,
+        xp=0,
+        hp=100,
+        max_hp=100,
+        mana=50,
+        max_mana=50,
+        strength=10,
+        intelligence=10,
+    )
+
+
+def make_orc(hp: int = 50) -> Enemy:
+    return Enemy(
+        enemy_id="orc_01",
+        name="Orc des plaines",
+        type=EnemyType.ORC,
+        level=1,
+        hp=hp,
+        max_hp=50,
+        damage=1,
+        armor=0,
+        strength=1,
+    )
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def generate(self, **kwargs):
+        self.prompts.append(kwargs["prompt"])
+        return {"response": " Un moment épique ! "}
+
+
+@pytest.fixture
+def engine():
+    reset_shared_state()
+    engine = CombatEngine()
+    engine.llm = FakeLLM()
+    yield engine
+    reset_shared_state()
+
+
+def test_damage_bands():
+    assert damage_band(5, 50) == "light"
+    assert damage_band(10, 50) == "solid"
+    assert damage_band(40, 50) == "heavy"
+
+
+def test_phrase_bank_renders_fast_and_complete():
+    narrator = CombatNarrator(random.Random(1))
+    player, orc = make_player(), make_orc()
+
+    started = time.perf_counter()
+    lines = [narrator.attack(player, orc, 12, crit=i % 10 == 0) for i in range(1000)]
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.5  # well under a millisecond per line
+    assert all("$" not in line and "12" in line for line in lines)
+    assert any("ses poings" in line for line in lines)
+
+    orc.hp = 0
+    assert "s'effondre" in narrator.attack(player, orc, 12, weapon="Épée")
+    assert "boule de feu" in narrator.spell(player, make_orc(), "fireball", 30)
+
+
+def test_routine_turn_makes_no_llm_call(engine, monkeypatch):
+    monkeypatch.setattr(engine, "_calculate_damage", lambda **kwargs: (5, False))
+
+    async def scenario():
+        state = await engine.start_combat(make_player(), [make_orc()], "Bree")
+        engine._highlights.clear()
+        return await engine.execute_turn(state, CombatAction(action_type="attack"))
+
+    result = asyncio.run(scenario())
+    assert engine.llm.prompts == []
+    assert "Orc des plaines" in result.narrative or "orc" in result.narrative
+
+
+def test_key_moments_narrated_as_follow_up(engine, monkeypatch):
+    monkeypatch.setattr(engine, "_calculate_damage", lambda **kwargs: (60, True))
+
+    async def scenario():
+        state = await engine.start_combat(make_player(), [make_orc()], "Bree")
+        assert state.intro_text and engine.llm.prompts == []  # template intro
+        intro = await engine.narrate_highlights(state)
+
+        result = await engine.execute_turn(state, CombatAction(action_type="attack"))
+        assert engine.has_highlights(state)
+        follow_up = await engine.narrate_highlights(state)
+        return intro, result, follow_up
+
+    intro, result, follow_up = asyncio.run(scenario())
+    assert intro == follow_up == "Un moment épique !"
+    assert result.is_victory
+    assert len(engine.llm.prompts) == 2
+    last_prompt = engine.llm.prompts[-1]
+    assert "Coup critique" in last_prompt and "terrasse" in last_prompt
+    assert "remporte le combat" in last_prompt
+
+
+def test_inline_mode_waits_for_key_moment(engine, monkeypatch):
+    engine.follow_up = False
+    monkeypatch.setattr(engine, "_calculate_damage", lambda **kwargs: (60, True))
+
+    async def scenario():
+        state = await engine.start_combat(make_player(), [make_orc()], "Bree")
+        result = await engine.execute_turn(state, CombatAction(action_type="attack"))
+        return state, result
+
+    state, result = asyncio.run(scenario())
+    assert state.intro_text == "Un moment épique !"
+    assert result.narrative.endswith("Un moment épique !")
+    assert not engine.has_highlights(state)
+
+
+def test_follow_up_task_is_tracked_until_sent(engine):
+    class FakeSocket:
+        def __init__(self):
+            self.sent = []
+
+        async def send_json(self, payload):
+            self.sent.append(payload)
+
+    socket = FakeSocket()
+
+    async def scenario():
+        state = await engine.start_combat(make_player(), [make_orc()], "Bree")
+        game_server._follow_up_combat_narration(socket, engine, state)
+        pending = set(game_server._background_tasks)
+        await asyncio.gather(*pending)
+        return pending
+
+    pending = asyncio.run(scenario())
+    assert len(pending) == 1
+    assert not game_server._background_tasks
+    assert socket.sent[0]["type"] == "combat_narration"
@@ -0,0 +1,120 @@
+"""
+Tests du magasin de contenu généré (SQLite, espaces de noms, TTL, éviction)
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from jdvlh_ia_game.services.content_store import ContentStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ContentStore(str(tmp_path / "content.db"), max_bytes=10_000)
+
+
+def test_namespaces_are_separate(store):
+    store.put("locations", "Absalom", {"description": "Cité"})
+    store.put("quests", "Absalom", {"title": "Livraison"})
+
+    assert store.get("locations", "Absalom") == {"description": "Cité"}
+    assert store.get("quests", "Absalom") == {"title": "Livraison"}
+    assert store.count("quests") == 1
+    store.delete("quests", "Absalom")
+    assert store.get("quests", "Absalom") is None
+    assert store.count() == 1
+
+
+def test_expired_entry_still_readable_as_stale(store):
+    store.put("locations", "Sandpoint", {"description": "Ancienne"}, ttl=-1)
+
+    assert store.get("locations", "Sandpoint") is None
+    value, expires = store.get_entry("locations", "Sandpoint")
+    assert value == {"description": "Ancienne"}
+    assert expires < time.time()
+    assert store.get_stats()["stale_hits"] == 2
+
+
+def test_put_many_without_replace_keeps_existing(store):
+    store.put("locations", "Korvosa", "récent")
+    written = store.put_many(
+        "locations",
+        [("Korvosa", "ancien", None), ("Magnimar", "ancien", None)],
+        replace=False,
+    )
+
+    assert written == 2
+    assert store.get("locations", "Korvosa") == "récent"
+    assert store.get("locations", "Magnimar") == "ancien"
+
+
+def test_size_bound_evicts_least_recently_read(store):
+    store.touch_interval = 0
+    payload = "x" * 3000
+    for key in ("a", "b", "c"):
+        store.put("quests", key, payload)
+        time.sleep(0.01)
+    store.get("quests", "a")  # "b" devient la moins récemment lue
+    time.sleep(0.01)
+    store.put("quests", "d", payload)
+
+    assert store.get("quests", "b") is None
+    assert store.get("quests", "a") == payload
+    assert store.size() <= store.max_bytes
+    assert store.get_stats()["evictions"] == 1
+
+
+def test_long_expired_entries_purged_first_then_compacted(store):
+    store.stale_grace = 0
+    store.put("locations", "old", "x" * 4000, ttl=-10)
+    store.put("locations", "fresh", "y" * 4000)
+    store.put("locations", "new", "z" * 4000)
+
+    assert store.get_entry("locations", "old") is None
+    assert store.get("locations", "fresh") is not None
+    stats = store.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["compactions"] == 1
+
+
+def test_async_put(store):
+    asyncio.run(store.aput("quests", "Bree", {"title": "Poney"}, ttl=60))
+    assert store.get("quests", "Bree") == {"title": "Poney"}
+
+
+def test_reads_within_touch_interval_do_not_write(store):
+    store.put("locations", "Absalom", "Cité")
+    written = store.engine.fetchone("SELECT last_access FROM content")[0]
+    time.sleep(0.01)
+    store.get("locations", "Absalom")
+    assert store.engine.fetchone("SELECT last_access FROM content")[0] == written
+
+    store.touch_interval = 0
+    store.get("locations", "Absalom")
+    assert store.engine.fetchone("SELECT last_access FROM content")[0] > written
+
+
+def test_running_size_matches_table(store):
+    store.put("quests", "a", "x" * 100)
+    store.put("quests", "a", "x" * 40)  # remplacement
+    store.put_many(
+        "quests", [("a", "y" * 500, None), ("b", "z" * 10, None)], replace=False
+    )
+    store.delete("quests", "b")
+    store.put("quests", "c", "w" * 7)
+
+    assert store.size() == store._table_size()
+    assert store.size() == len('"' + "x" * 40 + '"') + len('"' + "w" * 7 + '"')
+
+
+def test_size_resynced_with_other_workers_writes(tmp_path):
+    path = str(tmp_path / "shared.db")
+    first = ContentStore(path, max_bytes=10_000, resync_every=2)
+    second = ContentStore(path, max_bytes=10_000)
+    second.put("quests", "autre", "x" * 100)
+    first.put("quests", "a", "y")
+    assert first.size() < first._table_size()
+    first.put("quests", "b", "z")
+    assert first.size() == first._table_size()
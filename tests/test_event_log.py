@@ -0,0 +1,177 @@
+"""
+Tests du journal d'événements parental (append-only)
+"""
+
+import asyncio
+import datetime
+import time
+
+import pytest
+
+from jdvlh_ia_game.services.event_log import EventLog
+from jdvlh_ia_game.services.parental_control import ParentalControl
+from jdvlh_ia_game.services.persistence import close_engines
+from jdvlh_ia_game.services.shared_state import reset_shared_state
+from jdvlh_ia_game.services.state_manager import _caches
+
+
+@pytest.fixture
+def event_log(tmp_path):
+    log = EventLog(str(tmp_path / "game.db"), batch_size=3)
+    yield log
+    close_engines()
+
+
+@pytest.fixture
+def parental(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    reset_shared_state()
+    control = ParentalControl()
+    yield control
+    close_engines()
+    _caches.clear()
+    reset_shared_state()
+
+
+class TestEventLog:
+    def count_rows(self, event_log):
+        return event_log.engine.fetchone("SELECT COUNT(*) FROM parental_events")[0]
+
+    def test_events_are_batched(self, event_log):
+        event_log.append("p1", "connect")
+        event_log.append("p1", "choice", {"choice": "Explorer"})
+        assert self.count_rows(event_log) == 0
+
+        event_log.append("p1", "ai_response")
+        assert self.count_rows(event_log) == 3
+        assert event_log.pending == []
+
+    def test_get_events_flushes_and_orders(self, event_log):
+        event_log.append("p1", "connect", timestamp=100.0)
+        event_log.append("p2", "connect", timestamp=150.0)
+        event_log.append("p1", "choice", {"choice": "Fuir"}, timestamp=200.0)
+
+        events = event_log.get_events("p1")
+        assert [e["event"] for e in events] == ["connect", "choice"]
+        assert events[1]["details"] == {"choice": "Fuir"}
+
+    def test_time_range_and_limit(self, event_log):
+        for ts in range(10):
+            event_log.append("p1", f"e{ts}", timestamp=float(ts))
+
+        assert [e["event"] for e in event_log.get_events("p1", since=7)] == [
+            "e7",
+            "e8",
+            "e9",
+        ]
+        assert [e["event"] for e in event_log.get_events("p1", until=1)] == [
+            "e0",
+            "e1",
+        ]
+        assert [e["event"] for e in event_log.get_events("p1", limit=2)] == [
+            "e8",
+            "e9",
+        ]
+
+    def test_retention_by_count_and_age(self, event_log):
+        event_log.max_events_per_player = 2
+        now = time.time()
+        event_log.append("p1", "old", timestamp=now - 40 * 86400)
+        for i in range(4):
+            event_log.append("p1", f"e{i}", timestamp=now + i)
+        event_log.append("p2", "other", timestamp=now)
+        event_log.flush()
+
+        assert event_log.apply_retention() == 3
+        assert [e["event"] for e in event_log.get_events("p1")] == ["e2", "e3"]
+        assert len(event_log.get_events("p2")) == 1
+
+
+class TestParentalLogs:
+    def test_log_event_does_not_touch_game_state(self, parental):
+        asyncio.run(parental.log_event("p1", "choice", {"choice": "Explorer"}))
+        state = parental.state_manager.load_state("p1")
+
+        assert "logs" not in state.get("parental", {})
+        logs = asyncio.run(parental.get_session_logs("p1"))
+        assert logs[-1]["event"] == "choice"
+
+    def test_legacy_logs_are_migrated(self, parental):
+        state = parental.state_manager.load_state("p1")
+        state["parental"] = {
+            "logs": [
+                {
+                    "timestamp": datetime.datetime(2024, 1, 1, 15).isoformat(),
+                    "event": "session_end",
+                    "details": {},
+                }
+            ]
+        }
+        parental.state_manager.save_state("p1", state)
+
+        logs = asyncio.run(parental.get_session_logs("p1"))
+        assert [log["event"] for log in logs] == ["session_end"]
+        assert "logs" not in state["parental"]
+
+    def test_session_start_time_is_serializable(self, parental):
+        asyncio.run(parental.start_session("p1"))
+        assert parental.state_manager.flush() == 1
+
+    def test_update_settings_is_persisted(self, parental):
+        asyncio.run(parental.set_pin("kid", "4321"))
+        assert asyncio.run(
+            parental.update_settings("kid", {"max_session_time": 5}, "4321")
+        )
+        assert (
+            asyncio.run(parental.get_or_create_session("kid")).settings[
+                "max_session_time"
+            ]
+            == 5
+        )
+        state = parental.state_manager.load_state("kid")
+        assert state["parental"]["settings"]["max_session_time"] == 5
+        assert not asyncio.run(
+            parental.update_settings("kid", {"max_session_time": 9}, "0000")
+        )
+
+    def test_log_event_reads_shared_state_once(self, parental):
+        reads = []
+        get = parental.shared.get
+
+        async def counting_get(namespace, key):
+            reads.append(key)
+            return await get(namespace, key)
+
+        parental.shared.get = counting_get
+
+        async def play():
+            for i in range(5):
+                await parental.log_event("p1", "choice", {"turn": i})
+
+        asyncio.run(play())
+        assert reads == ["p1"]
+
+    def test_other_worker_update_drops_local_copy(self, parental):
+        async def scenario():
+            await parental.get_or_create_session("p1")
+            listener = asyncio.create_task(parental.run_invalidation_listener())
+            await asyncio.sleep(0)
+            # Notre propre annonce ne vide pas la copie
+            await parental.set_pin("p1", "1234")
+            await asyncio.sleep(0)
+            kept = "p1" in parental.sessions
+            await parental.shared.publish(
+                "parental", {"origin": "other-worker", "player_id": "p1"}
+            )
+            await asyncio.sleep(0)
+            listener.cancel()
+            return kept
+
+        assert asyncio.run(scenario())
+        assert "p1" not in parental.sessions
+
+    def test_session_logs_are_read_off_the_event_loop(self, parental):
+        asyncio.run(parental.log_event("p1", "choice"))
+        parental.event_log.get_events = None  # chemin synchrone inutilisé
+        logs = asyncio.run(parental.get_session_logs("p1"))
+        assert [log["event"] for log in logs] == ["choice"]
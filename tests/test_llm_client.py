@@ -0,0 +1,96 @@
+"""Tests pour le client LLM asynchrone"""
+
+import asyncio
+
+import pytest
+
+from jdvlh_ia_game.core.game_server import _run_until_disconnect
+from jdvlh_ia_game.services.llm_client import LLMClient, LLMTimeoutError
+
+
+class FakeAsyncClient:
+    """Remplace ollama.AsyncClient: répond après `delay` secondes"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.cancelled = False
+
+    async def generate(self, **kwargs):
+        self.calls.append(kwargs)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return {"response": f"ok:{kwargs['prompt']}"}
+
+
+@pytest.fixture
+def make_client():
+    def _make(delay: float = 0.0, timeout: float = 1.0):
+        client = LLMClient(timeout=timeout)
+        client._client = FakeAsyncClient(delay)
+        return client
+
+    return _make
+
+
+def test_generate_returns_response(make_client):
+    client = make_client()
+    resp = asyncio.run(client.generate("mistral", "bonjour", {"temperature": 0.5}))
+    assert resp["response"] == "ok:bonjour"
+    assert client._client.calls[0]["options"] == {"temperature": 0.5}
+
+
+def test_generate_timeout(make_client):
+    client = make_client(delay=1.0)
+    with pytest.raises(LLMTimeoutError):
+        asyncio.run(client.generate("mistral", "lent", timeout=0.05))
+    assert client._client.cancelled
+
+
+def test_concurrent_calls_do_not_serialize(make_client):
+    """N appels concurrents durent ~1 appel, pas N appels"""
+    client = make_client(delay=0.1)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(client.generate("mistral", str(i)) for i in range(5)))
+        return loop.time() - start
+
+    assert asyncio.run(run()) < 0.4
+
+
+def test_generation_cancelled_on_disconnect(make_client):
+    from fastapi import WebSocketDisconnect
+
+    client = make_client(delay=5.0)
+
+    async def run():
+        reader = asyncio.create_task(asyncio.sleep(0.05))  # socket fermée vite
+        await _run_until_disconnect(client.generate("mistral", "long"), reader)
+
+    with pytest.raises(WebSocketDisconnect):
+        asyncio.run(run())
+    assert client._client.cancelled
+
+
+def test_close_releases_owned_connection_pool():
+    client = LLMClient()
+    first = client._ollama()
+    transport = client._transport
+    closed = []
+    aclose = transport.aclose
+
+    async def recording_aclose():
+        closed.append(True)
+        await aclose()
+
+    transport.aclose = recording_aclose
+    asyncio.run(client.close())
+
+    assert closed == [True]
+    assert client._ollama() is not first
+    asyncio.run(client.close())
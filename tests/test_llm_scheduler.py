@@ -0,0 +1,130 @@
+"""
+Tests de l'ordonnanceur des requêtes LLM
+"""
+
+import asyncio
+
+import pytest
+
+from jdvlh_ia_game.services.llm_client import LLMClient
+from jdvlh_ia_game.services.llm_scheduler import (
+    LLMOverloadedError,
+    LLMScheduler,
+    Priority,
+)
+
+
+async def run_jobs(scheduler, jobs, hold=0.01):
+    """Lance les jobs (nom, priorité, joueur) derrière une place occupée"""
+    order = []
+
+    async def job(name, priority, player_id):
+        async with scheduler.slot("mistral", priority, player_id):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async with scheduler.slot("mistral"):
+        tasks = [asyncio.create_task(job(*spec)) for spec in jobs]
+        await asyncio.sleep(0.01)
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_higher_priority_served_first():
+    scheduler = LLMScheduler(max_in_flight=1)
+    jobs = [
+        ("pregen", Priority.PREGENERATION, None),
+        ("quest", Priority.QUEST, "p1"),
+        ("turn", Priority.INTERACTIVE, "p2"),
+        ("combat", Priority.COMBAT, "p3"),
+    ]
+    assert asyncio.run(run_jobs(scheduler, jobs)) == [
+        "turn",
+        "combat",
+        "quest",
+        "pregen",
+    ]
+
+
+def test_players_served_round_robin():
+    scheduler = LLMScheduler(max_in_flight=1)
+    jobs = [
+        ("a1", Priority.INTERACTIVE, "a"),
+        ("a2", Priority.INTERACTIVE, "a"),
+        ("a3", Priority.INTERACTIVE, "a"),
+        ("b1", Priority.INTERACTIVE, "b"),
+    ]
+    assert asyncio.run(run_jobs(scheduler, jobs)) == ["a1", "b1", "a2", "a3"]
+
+
+def test_in_flight_limit_per_model():
+    scheduler = LLMScheduler(max_in_flight=2)
+    peak = 0
+
+    async def job(model):
+        nonlocal peak
+        async with scheduler.slot(model):
+            peak = max(peak, scheduler.get_stats()["models"]["mistral"]["in_flight"])
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        await asyncio.gather(*(job("mistral") for _ in range(6)), job("gemma"))
+
+    asyncio.run(scenario())
+    assert peak == 2
+    assert scheduler.get_stats()["granted"]["interactive"] == 7
+
+
+def test_wait_over_budget_is_shed():
+    scheduler = LLMScheduler(max_in_flight=1, max_wait={"combat": 0.02})
+
+    async def scenario():
+        async with scheduler.slot("mistral"):
+            with pytest.raises(LLMOverloadedError):
+                async with scheduler.slot("mistral", Priority.COMBAT):
+                    pass
+        # La place est libre et la file vide après le délestage
+        async with scheduler.slot("mistral", Priority.COMBAT):
+            pass
+
+    asyncio.run(scenario())
+    stats = scheduler.get_stats()
+    assert stats["shed"] == {"combat": 1}
+    assert stats["models"]["mistral"] == {"in_flight": 0, "queued": 0}
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    scheduler = LLMScheduler(max_in_flight=1)
+
+    async def scenario():
+        async with scheduler.slot("mistral"):
+            waiter = asyncio.create_task(
+                scheduler._acquire("mistral", Priority.QUEST, "")
+            )
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+        await asyncio.wait_for(scheduler._acquire("mistral", Priority.QUEST, ""), 0.1)
+
+    asyncio.run(scenario())
+    assert scheduler.get_stats()["models"]["mistral"] == {"in_flight": 1, "queued": 0}
+
+
+def test_client_generations_go_through_scheduler():
+    class SlowClient:
+        async def generate(self, **kwargs):
+            await asyncio.sleep(0.05)
+            return {"response": "ok"}
+
+    client = LLMClient(timeout=1.0)
+    client.scheduler = LLMScheduler(max_in_flight=1)
+    client._client = SlowClient()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await asyncio.gather(*(client.generate("mistral", str(i)) for i in range(3)))
+        return loop.time() - start
+
+    assert asyncio.run(scenario()) >= 0.15
+    assert client.scheduler.get_stats()["granted"]["interactive"] == 3
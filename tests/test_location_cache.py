@@ -0,0 +1,210 @@
+"""
+Tests du cache de lieux à deux niveaux (mémoire + magasin de contenu)
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from jdvlh_ia_game.services import cache as cache_module
+from jdvlh_ia_game.services.cache import DEFAULT_LOCATION, NAMESPACE, CacheService
+from jdvlh_ia_game.services.content_store import ContentStore
+
+
+class FakeLLM:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    async def generate(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise ConnectionError("ollama indisponible")
+        return {"response": f" Description {self.calls} "}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ContentStore(str(tmp_path / "content.db"))
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch, store):
+    monkeypatch.setattr(cache_module, "CACHE_DIR", str(tmp_path / "cache"))
+    cache = CacheService(store=store)
+    cache.llm = FakeLLM()
+    cache.retry_backoff = 0
+    return cache
+
+
+def write_location(store, name, description, age=0.0):
+    store.put(NAMESPACE, name, {"description": description}, ttl=7200 - age)
+
+
+def test_disk_read_once_then_memory(service, store, monkeypatch):
+    write_location(store, "Absalom", "La cité au centre du monde")
+
+    assert service.get_location_data("Absalom")["description"].startswith("La cité")
+    monkeypatch.setattr(store, "get_entry", None)  # plus de disque
+    for _ in range(5):
+        service.get_location_data("Absalom")
+
+    stats = service.get_stats()
+    assert stats["disk_reads"] == 1
+    assert stats["hits"] == 6
+
+
+def test_stale_entry_served_while_refreshing(service, store):
+    write_location(store, "Sandpoint", "Ancienne", age=service.ttl + 10)
+
+    async def scenario():
+        first = service.get_location_data("Sandpoint")
+        second = service.get_location_data("Sandpoint")
+        await asyncio.gather(*service._refreshing.values())
+        return first, second, service.get_location_data("Sandpoint")
+
+    first, second, after = asyncio.run(scenario())
+    assert first["description"] == second["description"] == "Ancienne"
+    assert after["description"] == "Description 1"
+    assert service.llm.calls == 1  # une seule régénération en vol
+    assert store.get(NAMESPACE, "Sandpoint")["description"] == "Description 1"
+    stats = service.get_stats()
+    assert stats["stale_hits"] == 2 and stats["refreshes"] == 1
+
+
+def test_failed_refresh_keeps_stale_entry(service, store):
+    service.llm = FakeLLM(fail=True)
+    write_location(store, "Magnimar", "Ancienne", age=service.ttl + 10)
+
+    async def scenario():
+        service.get_location_data("Magnimar")
+        await asyncio.gather(*service._refreshing.values())
+        return service.get_location_data("Magnimar")
+
+    assert asyncio.run(scenario())["description"] == "Ancienne"
+    stats = service.get_stats()
+    assert stats["refresh_errors"] == service.max_attempts
+    assert stats["pregeneration"]["failed"] == 1
+    assert stats["hits"] == 1  # nouvel essai différé (retry_after)
+
+
+def test_missing_location_defaults_then_generated(service):
+    async def scenario():
+        first = service.get_location_data("Korvosa")
+        await asyncio.gather(*service._refreshing.values())
+        return first, service.get_location_data("Korvosa")
+
+    first, second = asyncio.run(scenario())
+    assert first == DEFAULT_LOCATION
+    assert second["description"] == "Description 1"
+
+
+def test_unresolved_model_text_never_queues_generation(service):
+    async def scenario():
+        for text in ("Kintargo", "une grotte humide", "???"):
+            assert service.get_location_data(text) == DEFAULT_LOCATION
+        return len(service._refreshing)
+
+    assert asyncio.run(scenario()) == 0
+    assert service.llm.calls == 0
+
+
+def test_lru_bound(service):
+    service.max_entries = 2
+    for name in ("A", "B", "C"):
+        service.get_location_data(name)
+    assert service.get_stats()["entries"] == 2
+    assert service.get_stats()["evictions"] == 1
+
+
+def test_pregeneration_bounded_and_resumable(service, store):
+    in_flight = []
+    peak = []
+
+    class SlowLLM(FakeLLM):
+        async def generate(self, **kwargs):
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            try:
+                return await super().generate(**kwargs)
+            finally:
+                in_flight.pop()
+
+    service.llm = SlowLLM()
+    service.concurrency = 2
+    write_location(store, "la_Comte", "Déjà là")
+    locations = ["la Comté", "Bree", "Fondcombe", "Moria", "Isengard"]
+
+    asyncio.run(service.pregenerate(locations))
+    assert service.llm.calls == 4  # entrée fraîche sautée
+    assert max(peak) == 2
+    assert service.get_stats()["pregeneration"] == {
+        "total": 4,
+        "done": 4,
+        "failed": 0,
+        "skipped": 1,
+    }
+
+    asyncio.run(service.pregenerate(locations))  # reprise: tout est frais
+    assert service.llm.calls == 4
+
+
+def test_pregeneration_retries_then_succeeds(service):
+    class FlakyLLM(FakeLLM):
+        async def generate(self, **kwargs):
+            self.fail = self.calls < 1
+            return await super().generate(**kwargs)
+
+    service.llm = FlakyLLM()
+    asyncio.run(service.pregenerate(["Bree"]))
+    assert service.get_location_data("Bree")["description"] == "Description 2"
+    assert service.get_stats()["refresh_errors"] == 1
+
+
+def test_model_locations_hit_canonical_entry(service, store):
+    write_location(store, "Absalom", "La cité au centre du monde")
+    for text in ("Absalom, quartier des docks", "Absalom|Sandpoint", "absalom"):
+        assert service.get_location_data(text)["description"].startswith("La cité")
+    assert service.get_stats()["hits"] == 3
+
+
+def test_legacy_json_files_imported(tmp_path, monkeypatch, store):
+    legacy = tmp_path / "cache"
+    legacy.mkdir()
+    (legacy / "Korvosa.json").write_text(
+        json.dumps({"description": "Ancien fichier"}), encoding="utf-8"
+    )
+    (legacy / "Osirion.json").write_text(
+        json.dumps({"description": "Périmé"}), encoding="utf-8"
+    )
+    old = time.time() - 3 * 7200
+    os.utime(legacy / "Osirion.json", (old, old))
+    store.put(NAMESPACE, "Korvosa", {"description": "Déjà dans le magasin"}, ttl=60)
+    monkeypatch.setattr(cache_module, "CACHE_DIR", str(legacy))
+
+    service = CacheService(store=store)
+    assert service.get_location_data("Korvosa")["description"] == (
+        "Déjà dans le magasin"
+    )
+    assert service.get_location_data("Osirion")["description"] == "Périmé"
+    assert service.get_stats()["stale_hits"] == 1
+
+
+def test_store_write_failure_is_logged_and_not_left_refreshing(service, monkeypatch):
+    async def broken_put(*args, **kwargs):
+        raise OSError("disque plein")
+
+    monkeypatch.setattr(service.store, "aput", broken_put)
+
+    async def scenario():
+        service.get_location_data("Sandpoint")
+        await asyncio.gather(*service._refreshing.values())
+        return service.get_location_data("Sandpoint")
+
+    assert asyncio.run(scenario())["description"] == "Description 1"
+    assert service.get_stats()["write_errors"] == 1
+    assert not service._refreshing
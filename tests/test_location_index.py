@@ -0,0 +1,56 @@
+"""
+Tests de l'index des lieux (texte libre du modèle -> lieu canonique)
+"""
+
+import time
+
+import pytest
+
+from jdvlh_ia_game.config import get_config
+from jdvlh_ia_game.services.location_index import LocationIndex
+
+
+@pytest.fixture(scope="module")
+def index():
+    return LocationIndex(get_config()["locations"])
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Absalom", "Absalom"),
+        ("absalom", "Absalom"),
+        ("Absalom, quartier des docks", "Absalom"),
+        ("Sandpoint|Magnimar", "Sandpoint"),
+        ("Absalom|Sandpoint|Magnimar|...", "Absalom"),
+        ("Varisia", "la Varisie"),
+        ("la Foret de Sombrelune", "la forêt de Sombrelune"),
+        ("Les Monts Kodar (col nord)", "les monts Kodar"),
+        ("Korvosa - Old Korvosa", "Korvosa"),
+        ("Magnimarr", "Magnimar"),
+        ("Mer interieur", "la mer Intérieure"),
+    ],
+)
+def test_resolves_free_form_locations(index, text, expected):
+    assert index.resolve(text) == expected
+
+
+def test_unknown_location(index):
+    assert index.resolve("Taverne du Dragon Rouillé") is None
+    assert index.resolve("") is None
+
+
+def test_resolution_is_fast_and_memoized(index):
+    started = time.perf_counter()
+    for i in range(200):
+        index.resolve(f"Absalom, rue {i}")
+    assert (time.perf_counter() - started) / 200 < 0.001
+
+    lookups = index.get_stats()["contained"]
+    index.resolve("Absalom, rue 1")
+    assert index.get_stats()["contained"] == lookups  # servi par le mémo
+
+
+def test_custom_aliases():
+    index = LocationIndex(["Otari"], aliases={"Otari": ["village côtier"]})
+    assert index.resolve("Le village cotier") == "Otari"
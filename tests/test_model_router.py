@@ -0,0 +1,185 @@
+"""
+Tests for latency/error-aware model routing
+"""
+
+import asyncio
+
+import pytest
+
+from jdvlh_ia_game.services.llm_client import LLMClient
+from jdvlh_ia_game.services.model_router import (
+    ModelConfig,
+    ModelHealth,
+    ModelRouter,
+    TaskType,
+)
+
+
+def model(name: str) -> ModelConfig:
+    return ModelConfig(
+        name=name,
+        specialties=["general", "narrative"],
+        priority=1,
+        max_tokens=150,
+        temperature=0.7,
+        speed_rating=3,
+    )
+
+
+@pytest.fixture
+def router():
+    router = ModelRouter(failure_threshold=2, cooldown=60)
+    # "mistral" wins on static score (dialogue boost), "llama3" is the runner-up
+    router._available_models = {"mistral": model("mistral"), "llama3": model("llama3")}
+    return router
+
+
+def select(router):
+    return router.select_model("", task_type=TaskType.DIALOGUE)[0]
+
+
+def test_static_choice_without_measurements(router):
+    assert select(router) == "mistral"
+    assert router.last_decision["scores"]["mistral"]["latency_penalty"] == 0
+
+
+def test_slow_model_loses_to_fast_one(router):
+    for _ in range(5):
+        router.record_result(
+            "mistral", 14.0, True, eval_count=100, eval_duration=10**10
+        )
+        router.record_result("llama3", 1.0, True)
+
+    assert select(router) == "llama3"
+    stats = router.get_stats()
+    assert stats["models"]["mistral"]["tokens_per_second"] == 10.0
+    assert stats["models"]["mistral"]["latency_p50"] == 16
+    assert stats["last_decision"]["scores"]["mistral"]["latency_penalty"] > 0
+
+
+def test_circuit_opens_then_probes_after_cooldown(router):
+    router.record_result("mistral:latest", 0.1, False)
+    router.record_result("mistral", 0.1, False)
+
+    assert select(router) == "llama3"
+    assert router.last_decision["circuit_open"] == ["mistral"]
+
+    health = router.health["mistral"]
+    health.opened_at -= 61
+    assert select(router) == "mistral"  # one probe goes through
+    assert select(router) == "llama3"  # while the probe is in flight
+
+    router.record_result("mistral", 0.5, True)
+    assert health.state == "closed"
+    # error rate still remembered: 2 failures out of the last 3 calls
+    assert router.get_stats()["models"]["mistral"]["error_rate"] == pytest.approx(0.667)
+
+
+def test_all_circuits_open_still_routes(router):
+    for name in ("mistral", "llama3"):
+        for _ in range(2):
+            router.record_result(name, 0.1, False)
+    assert select(router) in ("mistral", "llama3")
+
+
+def test_failed_probe_reopens():
+    health = ModelHealth(failure_threshold=3, cooldown=0)
+    for _ in range(3):
+        health.record(1.0, False)
+    assert health.available() and health.state == "half_open"
+    health.record(1.0, False)
+    assert health.state == "open"
+
+
+def test_llm_client_reports_results(router):
+    class FakeOllama:
+        fail = False
+
+        async def generate(self, **kwargs):
+            if self.fail:
+                raise ConnectionError("ollama down")
+            return {"response": "ok", "eval_count": 20, "eval_duration": 10**9}
+
+    client = LLMClient(timeout=1.0)
+    client._client = FakeOllama()
+    client.router = router
+
+    async def scenario():
+        await client.generate("mistral", "bonjour")
+        client._client.fail = True
+        with pytest.raises(ConnectionError):
+            await client.generate("mistral", "bonjour")
+
+    asyncio.run(scenario())
+    stats = router.get_stats()["models"]["mistral"]
+    assert stats["requests"] == 2 and stats["errors"] == 1
+    assert stats["tokens_per_second"] == 20.0
+
+
+class FakeOllamaServer:
+    """ollama.AsyncClient stand-in: list(), and generate() for warm-ups"""
+
+    def __init__(self, models):
+        self.models = models
+        self.up = True
+        self.warmed = []
+        self.broken = set()
+
+    async def list(self):
+        if not self.up:
+            raise ConnectionError("connection refused")
+        return {"models": [{"name": name} for name in self.models]}
+
+    async def generate(self, model, prompt, keep_alive=None):
+        if model in self.broken:
+            raise RuntimeError("model failed to load")
+        self.warmed.append((model, keep_alive))
+        return {"response": "", "done": True}
+
+
+def test_discovery_publishes_only_warmed_models():
+    server = FakeOllamaServer(["mistral:latest", "gemma2:9b"])
+    server.broken.add("gemma2:9b")
+    router = ModelRouter(keep_alive="30m")
+    router._discovering = True
+
+    assert list(router.available_models) == ["mistral"]  # fallback, no blocking call
+    asyncio.run(router.discover(server))
+
+    assert list(router.available_models) == ["mistral"]
+    assert server.warmed == [("mistral:latest", "30m")]
+
+    server.broken.clear()
+    asyncio.run(router.discover(server))
+    assert sorted(router.available_models) == ["gemma2", "mistral"]
+    assert len(server.warmed) == 2  # mistral not warmed twice
+
+
+def test_models_warmed_again_after_server_restart():
+    server = FakeOllamaServer(["mistral:latest"])
+    router = ModelRouter()
+    asyncio.run(router.discover(server))
+
+    server.up = False
+    asyncio.run(router.discover(server))
+    assert router.get_stats()["discovery"]["server_up"] is False
+    assert list(router.available_models) == ["mistral"]  # previous set kept
+
+    server.up = True
+    server.models.append("phi3:mini")
+    asyncio.run(router.discover(server))
+    assert [model for model, _ in server.warmed] == [
+        "mistral:latest",
+        "mistral:latest",
+        "phi3:mini",
+    ]
+    assert sorted(router.available_models) == ["mistral", "phi3"]
+
+
+def test_removed_model_is_swapped_out():
+    server = FakeOllamaServer(["mistral:latest", "phi3:mini"])
+    router = ModelRouter()
+    asyncio.run(router.discover(server))
+    server.models.remove("phi3:mini")
+    asyncio.run(router.discover(server))
+    assert list(router.available_models) == ["mistral"]
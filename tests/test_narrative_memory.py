@@ -0,0 +1,74 @@
+"""Tests pour la mémoire narrative par joueur"""
+
+import pytest
+
+from jdvlh_ia_game.services.narrative_memory import (
+    PlayerMemoryRegistry,
+    SmartHistoryManager,
+)
+
+
+@pytest.fixture
+def registry():
+    return PlayerMemoryRegistry(max_players=2, idle_ttl=60)
+
+
+class TestPlayerMemoryRegistry:
+    def test_players_are_isolated(self, registry):
+        alice = registry.get("alice")
+        alice.memory.update_entities("Un dragon garde le trésor")
+        alice.history.add_interaction("Explorer", "Tu trouves une épée")
+
+        bob = registry.get("bob")
+        assert bob.memory.entities == {}
+        assert bob.history.raw_history == []
+        assert registry.get("alice") is alice
+
+    def test_lru_eviction(self, registry):
+        registry.get("alice")
+        registry.get("bob")
+        registry.get("alice")  # alice devient la plus récente
+        registry.get("carol")
+
+        assert "bob" not in registry
+        assert "alice" in registry
+        assert len(registry) == 2
+
+    def test_rehydration_from_snapshot(self, registry):
+        alice = registry.get("alice")
+        alice.memory.advance_turn()
+        alice.memory.update_location("Sandpoint")
+        alice.history.add_interaction("Explorer", "Le port est calme")
+        saved = registry.snapshot("alice")
+
+        registry.discard("alice")
+        restored = registry.get("alice", saved)
+
+        assert restored is not alice
+        assert restored.memory.current_turn == 1
+        assert restored.memory.current_location == "Sandpoint"
+        assert restored.history.raw_history == alice.history.raw_history
+
+    def test_saved_snapshot_ignored_when_loaded(self, registry):
+        alice = registry.get("alice")
+        alice.memory.advance_turn()
+        assert registry.get("alice", {"memory": {"current_turn": 42}}) is alice
+
+    def test_idle_eviction(self, registry):
+        registry.get("alice")
+        registry.get("bob")
+        registry.get("alice").last_access -= 120
+
+        assert registry.evict_idle() == 1
+        assert "alice" not in registry
+        assert "bob" in registry
+
+
+def test_history_roundtrip_truncates():
+    history = SmartHistoryManager.from_dict(
+        {"raw_history": [str(i) for i in range(50)]}
+    )
+    assert len(history.raw_history) == history.max_raw_history
+    assert SmartHistoryManager.from_dict(history.to_dict()).raw_history == (
+        history.raw_history
+    )
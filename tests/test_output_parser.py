@@ -0,0 +1,149 @@
+"""Tests pour le décodage incrémental de la sortie modèle"""
+
+import asyncio
+import json
+
+import pytest
+
+from jdvlh_ia_game.services.narrative import NarrativeService
+from jdvlh_ia_game.services.output_parser import (
+    NARRATIVE_SCHEMA,
+    ModelOutputError,
+    NarrativeFieldStream,
+    parse_model_output,
+    repair_json,
+)
+
+RESPONSE = json.dumps(
+    {
+        "narrative": 'Le garde crie "Halte !"\nUn dragon 🐉 surgit.',
+        "choices": ["Fuir", "Combattre", "Parler"],
+        "location": "Absalom",
+    }
+)
+
+
+def feed_by(chunk_size: int) -> NarrativeFieldStream:
+    stream = NarrativeFieldStream()
+    for i in range(0, len(RESPONSE), chunk_size):
+        stream.feed(RESPONSE[i : i + chunk_size])
+    return stream
+
+
+def test_decodes_field_whatever_the_chunking():
+    expected = json.loads(RESPONSE)["narrative"]
+    for size in (1, 2, 3, 7, 50, len(RESPONSE)):
+        stream = feed_by(size)
+        assert stream.value == expected, f"chunk size {size}"
+        assert stream.done
+
+
+def test_deltas_are_incremental():
+    stream = NarrativeFieldStream()
+    assert stream.feed('{"narrative": "Il ') == "Il "
+    assert stream.feed("était une") == "était une"
+    assert stream.feed(' fois", "choices": []}') == " fois"
+    assert stream.feed("trailing") == ""
+    assert json.loads(stream.raw.replace("trailing", ""))["choices"] == []
+
+
+def test_escape_split_across_chunks():
+    stream = NarrativeFieldStream()
+    assert stream.feed('{"narrative": "a\\') == "a"
+    assert stream.feed("u00e9") == "é"
+    assert stream.feed("\\ud83d") == ""
+    assert stream.feed('\\udc09"}') == "🐉"
+
+
+def test_field_not_first():
+    stream = NarrativeFieldStream()
+    stream.feed('{"location": "Sandpoint", "narrative": "Ok"}')
+    assert stream.value == "Ok"
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        (RESPONSE, json.loads(RESPONSE)),
+        ("```json\n" + RESPONSE + "\n```", json.loads(RESPONSE)),
+        ('Voici: {"narrative": "Ok"} Bonne partie !', {"narrative": "Ok"}),
+        ('{"narrative": "Il était', {"narrative": "Il était"}),
+        (
+            '{"narrative": "Ok", "choices": ["Fuir", "Comb',
+            {"narrative": "Ok", "choices": ["Fuir"]},
+        ),
+        ('{"narrative": "Ok", "choices": ["Fuir"], "loc', None),
+        ('{"narrative": "Ok", "choices": ["Fuir"], "location":', None),
+        ('{"narrative": "Ok", "choices": ["Fuir",', None),
+    ],
+)
+def test_parse_repairs_instead_of_failing(raw, expected):
+    data, repaired = parse_model_output(raw)
+    assert repaired == (raw != RESPONSE)
+    if expected is not None:
+        assert data == expected
+    assert data["narrative"]
+    assert all(isinstance(c, str) for c in data.get("choices", []))
+
+
+def test_repair_keeps_braces_inside_strings():
+    raw = '{"narrative": "Un coffre {scellé} [vide]"} puis {"autre": 1}'
+    assert json.loads(repair_json(raw)) == {"narrative": "Un coffre {scellé} [vide]"}
+
+
+@pytest.mark.parametrize(
+    "raw", ["", "Désolé, je ne peux pas.", '{"choices": []}', "[1]"]
+)
+def test_unusable_output_raises(raw):
+    with pytest.raises(ModelOutputError):
+        parse_model_output(raw)
+
+
+def test_narrative_service_repairs_without_regenerating():
+    class FakeLLM:
+        def __init__(self, outputs):
+            self.outputs = list(outputs)
+            self.calls = []
+
+        async def generate(self, **kwargs):
+            self.calls.append(kwargs)
+            return {"response": self.outputs.pop(0), "eval_count": 40}
+
+    service = NarrativeService()
+    service.contexts = None
+    service.response_cache = None
+    service._pf2e = None
+    service.llm = FakeLLM(["Réponse:", RESPONSE[:60]])
+
+    result = asyncio.run(service.generate("", [], "Avancer", [], player_id="p"))
+
+    assert len(service.llm.calls) == 2
+    assert service.llm.calls[0]["format"] == NARRATIVE_SCHEMA
+    assert result["narrative"].startswith("Le garde crie")
+    stats = service.output_stats
+    assert stats["malformed"] == 1 and stats["wasted_tokens"] == 40
+    assert stats["regenerations"] == 1 and stats["repaired"] == 1
+    assert stats["fallbacks"] == 0
+
+
+def test_truncated_reply_is_completed_for_the_game_server():
+    class FakeLLM:
+        async def generate(self, **kwargs):
+            return {
+                "response": '{"narrative": "Le pont tremble.", "choices": ["Courir", "Par'
+            }
+
+    service = NarrativeService()
+    service.contexts = None
+    service.response_cache = None
+    service._pf2e = None
+    service.llm = FakeLLM()
+    state = {}
+    result = asyncio.run(
+        service.generate("", [], "Avancer", [], player_id="trunc", state=state)
+    )
+
+    assert result["narrative"] == "Le pont tremble."
+    assert result["choices"] == ["Courir"]
+    assert result["location"] == service.memories.get("trunc").memory.current_location
+    assert result["animation_trigger"] == "none" and result["sfx"] == "ambient"
@@ -95,3 +95,13 @@ def test_mvp_spell_count():
     assert len(mvp_spells) < 1000, f"Trop de sorts MVP: {len(mvp_spells)}"
 
     print(f"[+] {len(mvp_spells)} sorts MVP dans la plage attendue")
+
+
+def test_items_and_monsters_loaded(pf2e_content):
+    """Objets et monstres chargés depuis data/pf2e/translated/fr"""
+    assert len(pf2e_content.get_all_items()) > 0, "Aucun objet chargé"
+    assert len(pf2e_content.get_all_monsters()) > 0, "Aucun monstre chargé"
+
+    monster = pf2e_content.get_monster_by_name("brontosaure")
+    assert monster is not None and monster.id == "brontosaurus"
+    assert pf2e_content.search_monsters("dragon rouge", limit=1)
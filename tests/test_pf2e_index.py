@@ -0,0 +1,77 @@
+"""Tests unitaires pour l'index de contenu PF2e"""
+
+import pytest
+
+from jdvlh_ia_game.services.pf2e_index import ContentIndex, fold, tokenize
+
+
+@pytest.fixture
+def index():
+    index = ContentIndex()
+    index.add(
+        "fireball",
+        "fireball",
+        names=["Boule de feu", "Fireball"],
+        text="Un brasier rugissant inflige des dégâts de feu.",
+        level=3,
+        traits=["evocation", "fire"],
+        traditions=["arcane", "primal"],
+    )
+    index.add(
+        "heal",
+        "heal",
+        names=["Guérison", "Heal"],
+        text="Vous canalisez de l'énergie positive pour soigner.",
+        level=1,
+        traits=["healing"],
+        traditions=["divine"],
+    )
+    index.add(
+        "fire-shield",
+        "fire-shield",
+        names=["Bouclier de feu"],
+        text="Des flammes vous entourent et protègent des feux.",
+        level=4,
+        traits=["fire"],
+        traditions=["arcane"],
+    )
+    return index
+
+
+def test_fold_removes_accents_and_case():
+    assert fold("  Guérison  Ÿ-Élan ") == "guerison y elan"
+    assert tokenize("L’Épée de feu") == ["epee", "feu"]
+
+
+def test_lookup_by_any_name(index):
+    assert index.get_by_name("BOULE DE FEU") == "fireball"
+    assert index.get_by_name("fireball") == "fireball"
+    assert index.get_by_name("guerison") == "heal"
+    assert index.get_by_name("fire shield") == "fire-shield"
+    assert index.get_by_name("inconnu") is None
+
+
+def test_search_is_ranked(index):
+    results = index.search("feu")
+    assert set(results[:2]) == {"fireball", "fire-shield"}
+    assert "heal" not in results
+    # Le nom compte plus que la description
+    assert index.search("bouclier")[0] == "fire-shield"
+
+
+def test_search_matches_prefixes(index):
+    assert index.search("soign") == ["heal"]
+
+
+def test_secondary_indexes(index):
+    assert index.filter(max_level=3) == ["fireball", "heal"]
+    assert index.filter(tradition="Arcane", trait="fire") == ["fireball", "fire-shield"]
+    assert index.filter(level=1, trait="fire") == []
+
+
+def test_replacing_an_entry(index):
+    index.add("heal", "heal-v2", names=["Soins"], level=2)
+    assert index.get_by_name("guérison") is None
+    assert index.get_by_name("soins") == "heal-v2"
+    assert index.filter(level=1) == []
+    assert len(index) == 3
@@ -0,0 +1,103 @@
+"""Tests du snapshot binaire du contenu PF2e"""
+
+import json
+
+import pytest
+
+from jdvlh_ia_game.services import pf2e_snapshot
+from jdvlh_ia_game.services.pf2e_content import PF2eContent
+from jdvlh_ia_game.services.pf2e_snapshot import LazyEntries
+
+SPELLS = {
+    "fireball": {
+        "name_en": "Fireball",
+        "name_fr": "Boule de feu",
+        "description_fr": "Un brasier infligeant 6d6 dégâts de feu.",
+        "traits_fr": ["evocation", "fire"],
+        "level": 3,
+    },
+    "heal": {
+        "name_en": "Heal",
+        "name_fr": "Guérison",
+        "description_fr": "Vous soignez une créature.",
+        "traits_fr": ["healing"],
+        "level": 1,
+    },
+}
+MONSTERS = {
+    "goblin-warrior": {
+        "name_en": "Goblin Warrior",
+        "name_fr": "Guerrier gobelin (Gobelin)",
+        "description_fr": "Un petit guerrier rusé.",
+        "level": -1,
+    }
+}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    fr_dir = tmp_path / "translated" / "fr"
+    fr_dir.mkdir(parents=True)
+    (fr_dir / "spells.json").write_text(json.dumps(SPELLS), encoding="utf-8")
+    (fr_dir / "monsters.json").write_text(json.dumps(MONSTERS), encoding="utf-8")
+    return tmp_path
+
+
+def test_snapshot_is_built_then_reused(data_dir):
+    built = PF2eContent(data_dir=data_dir)
+    assert built._snapshot is None
+    assert (data_dir / "snapshot" / "fr.bin").exists()
+
+    loaded = PF2eContent(data_dir=data_dir)
+    assert loaded._snapshot is not None
+    assert isinstance(loaded._spells, LazyEntries)
+    assert len(loaded.get_all_spells()) == 2
+
+
+def test_entries_are_decoded_on_first_access(data_dir):
+    PF2eContent(data_dir=data_dir)
+    content = PF2eContent(data_dir=data_dir)
+    assert content._spells.decoded_count == 0
+
+    spell = content.get_spell_by_name("boule de feu")
+    assert spell.id == "fireball"
+    assert spell.damage == "6d6"
+    assert content._spells.decoded_count == 1
+    assert content.get_spell("fireball") is spell
+
+
+def test_snapshot_matches_json_load(data_dir):
+    from_json = PF2eContent(data_dir=data_dir, use_snapshot=False)
+    PF2eContent(data_dir=data_dir)
+    from_snapshot = PF2eContent(data_dir=data_dir)
+
+    assert from_snapshot.get_spell("heal") == from_json.get_spell("heal")
+    assert [s.id for s in from_snapshot.search_spells("feu")] == [
+        s.id for s in from_json.search_spells("feu")
+    ]
+    assert [s.id for s in from_snapshot.get_all_spells(trait="fire")] == ["fireball"]
+    assert from_snapshot.get_monster_by_name("guerrier gobelin").level == -1
+
+
+def test_changed_source_triggers_rebuild(data_dir):
+    PF2eContent(data_dir=data_dir)
+    spells = dict(SPELLS)
+    spells["shield"] = {"name_en": "Shield", "name_fr": "Bouclier", "level": 0}
+    (data_dir / "translated" / "fr" / "spells.json").write_text(
+        json.dumps(spells), encoding="utf-8"
+    )
+
+    content = PF2eContent(data_dir=data_dir)
+    assert content._snapshot is None
+    assert content.get_spell_by_name("bouclier") is not None
+    assert PF2eContent(data_dir=data_dir)._snapshot is not None
+
+
+def test_other_interpreter_triggers_rebuild(data_dir, monkeypatch):
+    PF2eContent(data_dir=data_dir)
+    monkeypatch.setattr(pf2e_snapshot, "INTERPRETER", (2, 7, 2))
+
+    content = PF2eContent(data_dir=data_dir)
+    assert content._snapshot is None
+    assert content.get_spell_by_name("boule de feu") is not None
+    assert PF2eContent(data_dir=data_dir)._snapshot is not None
@@ -0,0 +1,109 @@
+"""
+Tests de la réutilisation du contexte Ollama entre les tours
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from jdvlh_ia_game.services.narrative import NarrativeService
+from jdvlh_ia_game.services.prompt_context import PromptContextStore
+
+RESPONSE = {
+    "narrative": "La porte de la taverne grince, un nain vous salue.",
+    "choices": ["Saluer", "Commander", "Sortir"],
+    "location": "Sandpoint",
+    "animation_trigger": "none",
+    "sfx": "tavern",
+}
+
+
+class FakeLLM:
+    """Renvoie un contexte qui grandit à chaque tour, comme Ollama"""
+
+    def __init__(self, fail_on=()):
+        self.calls = []
+        self.fail_on = fail_on
+
+    async def generate(self, **kwargs):
+        self.calls.append(kwargs)
+        if len(self.calls) in self.fail_on:
+            raise RuntimeError("contexte invalide")
+        previous = kwargs.get("context") or []
+        new_tokens = len(kwargs["prompt"]) + len(kwargs.get("system", ""))
+        return {
+            "response": json.dumps(RESPONSE),
+            "context": previous + [1] * 10,
+            "prompt_eval_count": new_tokens,
+        }
+
+
+@pytest.fixture
+def service():
+    narrative = NarrativeService()
+    narrative.llm = FakeLLM()
+    narrative.contexts = PromptContextStore(max_tokens=15)
+    narrative.response_cache = None
+    narrative._pf2e = None
+    return narrative
+
+
+def play(service, turns, player_id="p1"):
+    async def scenario():
+        for choice in turns:
+            await service.generate("", [], choice, [], player_id=player_id)
+
+    asyncio.run(scenario())
+    return service.llm.calls
+
+
+def test_second_turn_reuses_context_without_system_prompt(service):
+    first, second = play(service, ["Entrer", "Saluer le nain"])
+
+    assert first["system"] == service.system_prompt
+    assert "JSON STRICT" in first["system"]
+    assert "context" not in first
+    assert "system" not in second
+    assert second["context"] == [1] * 10
+    assert "Saluer le nain" in second["prompt"]
+    assert "Récemment" not in second["prompt"]
+
+    stats = service.contexts.get_stats()
+    assert stats["reused"] == 1
+    avg = stats["avg_prompt_eval_tokens"]
+    assert avg["reused"] < avg["fresh"]
+
+
+def test_context_too_long_starts_fresh(service):
+    calls = play(service, ["Entrer", "Saluer", "Commander"])
+    assert "context" in calls[1]
+    # 10 tokens puis 20 > max_tokens: le troisième tour repart du système
+    assert "context" not in calls[2] and "system" in calls[2]
+
+
+def test_error_discards_context(service):
+    service.llm = FakeLLM(fail_on=(2,))
+    service.max_retries = 2
+    calls = play(service, ["Entrer", "Saluer"])
+
+    assert "context" in calls[1]
+    assert "context" not in calls[2] and "system" in calls[2]
+    assert service.contexts.get_stats()["invalidated"] == 1
+
+
+def test_model_change_or_expiry_invalidates():
+    store = PromptContextStore(ttl=60)
+    store.put("p1", "mistral", [1, 2, 3])
+    assert store.get("p1", "llama3") is None
+    assert store.get("p1", "mistral") is None
+
+    store.put("p1", "mistral", [1, 2, 3])
+    store.ttl = -1
+    assert store.get("p1", "mistral") is None
+
+
+def test_contexts_are_per_player(service):
+    play(service, ["Entrer"], player_id="p1")
+    calls = play(service, ["Entrer"], player_id="p2")
+    assert "context" not in calls[1]
@@ -0,0 +1,110 @@
+"""
+Tests du cache de réponses des tours narratifs
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from jdvlh_ia_game.services.narrative import NarrativeService
+from jdvlh_ia_game.services.narrative_memory import NarrativeMemory
+from jdvlh_ia_game.services.response_cache import ResponseCache, memory_fingerprint
+
+RESPONSE = {
+    "narrative": "Vous décidez d'Explorer Absalom: les ruelles grouillent de marchands.",
+    "choices": ["Suivre le marchand", "Entrer dans la taverne", "Rester"],
+    "location": "Absalom",
+    "animation_trigger": "none",
+    "sfx": "ambient",
+    "filter_result": {"is_safe": True},
+}
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache(ttl=60, max_entries=4, variants=2)
+
+
+class TestResponseCache:
+    def test_exact_and_similar_choices_hit(self, cache):
+        cache.store("Absalom", "Explorer", "fp", RESPONSE)
+
+        assert cache.lookup("Absalom", "explorer !", "fp")["location"] == "Absalom"
+        assert cache.lookup("Absalom", "Explorer les alentours", "fp") is None
+        assert cache.lookup("Absalom", "Explorez", "fp") is not None
+        assert cache.get_stats()["similar_hits"] == 1
+
+    def test_other_location_or_memory_misses(self, cache):
+        cache.store("Absalom", "Explorer", "fp", RESPONSE)
+        assert cache.lookup("Sandpoint", "Explorer", "fp") is None
+        assert cache.lookup("Absalom", "Explorer", "autre") is None
+        assert cache.get_stats()["misses"] == 2
+
+    def test_template_renders_current_choice(self, cache):
+        cache.store("Absalom", "Explorer", "fp", RESPONSE)
+        response = cache.lookup("Absalom", "explorer", "fp")
+
+        assert response["narrative"].startswith("Vous décidez d'explorer Absalom")
+        assert sorted(response["choices"]) == sorted(RESPONSE["choices"])
+        assert "filter_result" not in response
+
+    def test_variants_rotate(self, cache):
+        cache.store("Absalom", "Observer", "fp", {**RESPONSE, "narrative": "A"})
+        cache.store("Absalom", "Observer", "fp", {**RESPONSE, "narrative": "B"})
+        cache.store("Absalom", "Observer", "fp", {**RESPONSE, "narrative": "C"})
+
+        served = [
+            cache.lookup("Absalom", "Observer", "fp")["narrative"] for _ in range(3)
+        ]
+        assert served == ["A", "B", "A"]
+
+    def test_long_choices_and_spells_not_cached(self, cache):
+        assert not cache.cacheable("Je fouille minutieusement la bibliothèque du mage")
+        assert not cache.cacheable("spell: fireball")
+        cache.store("Absalom", "spell: fireball", "fp", RESPONSE)
+        assert cache.get_stats()["entries"] == 0
+
+    def test_ttl_and_lru_eviction(self, cache):
+        cache.ttl = -1
+        cache.store("Absalom", "Explorer", "fp", RESPONSE)
+        assert cache.lookup("Absalom", "Explorer", "fp") is None
+
+        cache.ttl = 60
+        for i in range(6):
+            cache.store(f"Lieu {i}", "Explorer", "fp", RESPONSE)
+        assert cache.get_stats()["entries"] == 4
+        assert cache.lookup("Lieu 0", "Explorer", "fp") is None
+        assert cache.lookup("Lieu 5", "Explorer", "fp") is not None
+
+    def test_fingerprint_ignores_turn_counter(self):
+        memory = NarrativeMemory()
+        before = memory_fingerprint(memory)
+        memory.advance_turn()
+        assert memory_fingerprint(memory) == before
+        memory.update_location("Magnimar")
+        assert memory_fingerprint(memory) != before
+
+
+def test_narrative_turn_served_from_cache(monkeypatch):
+    class FakeLLM:
+        calls = 0
+
+        async def generate(self, **kwargs):
+            FakeLLM.calls += 1
+            return {"response": json.dumps(RESPONSE)}
+
+    service = NarrativeService()
+    service.llm = FakeLLM()
+    service.response_cache = ResponseCache()
+    service._pf2e = None
+
+    async def scenario():
+        first = await service.generate("", [], "Explorer", [], player_id="a")
+        second = await service.generate("", [], "Explorer", [], player_id="b")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert FakeLLM.calls == 1
+    assert second["narrative"] == first["narrative"]
+    assert second["filter_result"]["is_safe"]
@@ -0,0 +1,56 @@
+"""
+Tests du compteur de joueurs actifs du SessionManager
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from jdvlh_ia_game.services.persistence import close_engines
+from jdvlh_ia_game.services.session_manager import SessionManager
+from jdvlh_ia_game.services.shared_state import reset_shared_state
+from jdvlh_ia_game.services.state_manager import _caches
+
+
+@pytest.fixture
+def session_manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    reset_shared_state()
+    manager = SessionManager()
+    yield manager
+    close_engines()
+    _caches.clear()
+    reset_shared_state()
+
+
+class TestActiveCount:
+    def test_connect_counts_player_once(self, session_manager):
+        asyncio.run(session_manager.create_session("p1", {}))
+        asyncio.run(session_manager.create_session("p1", {}))
+        asyncio.run(session_manager.create_session("p2", {}))
+        assert session_manager.get_active_count() == 2
+
+    def test_expired_players_are_dropped(self, session_manager):
+        session_manager.touch("p1")
+        session_manager.touch("p2")
+        session_manager.last_seen["p1"] = time.time() - 3600
+        session_manager.last_seen.move_to_end("p2")
+
+        assert session_manager.get_active_count() == 1
+        assert "p1" not in session_manager.last_seen
+
+    def test_reconcile_with_store(self, session_manager):
+        state_manager = session_manager.state_manager
+        state_manager.save_state("from_db", {"history": []})
+        state_manager.flush()
+        session_manager.touch("in_memory")
+
+        assert asyncio.run(session_manager.reconcile()) == 2
+        assert list(session_manager.last_seen) == ["from_db", "in_memory"]
+
+    def test_last_activity_index_exists(self, session_manager):
+        rows = session_manager.state_manager.engine.fetchall(
+            "PRAGMA index_list(game_states)"
+        )
+        assert "idx_game_states_last_activity" in [row[1] for row in rows]
@@ -0,0 +1,152 @@
+"""
+Tests de l'état partagé entre workers (backends memory et sqlite)
+"""
+
+import asyncio
+
+import pytest
+
+from jdvlh_ia_game.services import session_manager as session_module
+from jdvlh_ia_game.services.persistence import close_engines
+from jdvlh_ia_game.services.session_manager import SessionManager
+from jdvlh_ia_game.services.shared_state import (
+    InMemoryBackend,
+    SharedStateBackend,
+    SQLiteBackend,
+    create_backend,
+)
+from jdvlh_ia_game.services.state_manager import _caches
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        yield InMemoryBackend()
+    else:
+        yield SQLiteBackend(str(tmp_path / "shared.db"), poll_interval=0.01)
+        close_engines()
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, payload):
+        self.sent.append(payload)
+
+    async def close(self, code=None, reason=None):
+        self.closed = code
+
+
+class TestBackend:
+    def test_values_roundtrip_as_copies(self, backend):
+        async def scenario():
+            value = {"worker": "w1", "devices": [1, 2]}
+            await backend.set("sessions", "p1", value)
+            value["devices"].append(3)
+
+            assert await backend.get("sessions", "p1") == {
+                "worker": "w1",
+                "devices": [1, 2],
+            }
+            assert await backend.keys("sessions") == ["p1"]
+            await backend.delete("sessions", "p1")
+            assert await backend.get("sessions", "p1") is None
+
+        asyncio.run(scenario())
+
+    def test_expired_values_are_ignored(self, backend):
+        async def scenario():
+            await backend.set("sessions", "old", 1, ttl=-1)
+            await backend.set("sessions", "new", 2, ttl=60)
+            assert await backend.count("sessions") == 1
+            assert await backend.get("sessions", "old") is None
+
+        asyncio.run(scenario())
+
+    def test_members(self, backend):
+        async def scenario():
+            await backend.add_member("sockets", "p1", "w1:1")
+            await backend.add_member("sockets", "p1", "w2:1")
+            await backend.add_member("sockets", "p1", "w3:1", ttl=-1)
+            await backend.remove_member("sockets", "p1", "w1:1")
+            return await backend.members("sockets", "p1")
+
+        assert asyncio.run(scenario()) == {"w2:1"}
+
+    def test_publish_reaches_subscribers(self, backend):
+        async def scenario():
+            subscription = backend.subscribe("broadcast")
+            receive = asyncio.ensure_future(subscription.__anext__())
+            await asyncio.sleep(0.05)
+            await backend.publish("broadcast", {"event": "narrative"})
+            return await asyncio.wait_for(receive, timeout=1)
+
+        assert asyncio.run(scenario()) == {"event": "narrative"}
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        SharedStateBackend()
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        create_backend("etcd")
+
+
+class TestTwoWorkers:
+    """Deux SessionManager sur le même backend sqlite, comme deux workers"""
+
+    @pytest.fixture
+    def workers(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        managers = []
+        for worker_id in ("w1", "w2"):
+            manager = SessionManager()
+            manager.shared = SQLiteBackend("shared.db", poll_interval=0.01)
+            managers.append((worker_id, manager))
+        yield managers
+        close_engines()
+        _caches.clear()
+
+    def test_device_limit_counts_all_workers(self, workers, monkeypatch):
+        (w1, first), (w2, second) = workers
+        first.max_devices_per_player = 2
+        second.max_devices_per_player = 2
+
+        async def scenario():
+            monkeypatch.setattr(session_module, "WORKER_ID", w1)
+            assert await first.add_socket("p1", FakeSocket())
+            monkeypatch.setattr(session_module, "WORKER_ID", w2)
+            assert await second.add_socket("p1", FakeSocket())
+            added = await second.add_socket("p1", FakeSocket())
+            return added, await first.device_count("p1")
+
+        assert asyncio.run(scenario()) == (False, 2)
+
+    def test_broadcast_relayed_to_other_worker(self, workers, monkeypatch):
+        (w1, first), (w2, second) = workers
+        local, remote = FakeSocket(), FakeSocket()
+
+        async def scenario():
+            monkeypatch.setattr(session_module, "WORKER_ID", w2)
+            await second.add_socket("p1", remote)
+            listener = asyncio.create_task(second.run_broadcast_listener())
+            await asyncio.sleep(0.05)
+
+            monkeypatch.setattr(session_module, "WORKER_ID", w1)
+            await first.add_socket("p1", local)
+            await first.broadcast("p1", "narrative", {"narrative": "Bonjour"})
+            # Le listener de w2 ignore ses propres messages, pas ceux de w1
+            monkeypatch.setattr(session_module, "WORKER_ID", w2)
+            for _ in range(100):
+                if remote.sent:
+                    break
+                await asyncio.sleep(0.01)
+            listener.cancel()
+
+        asyncio.run(scenario())
+        expected = {"event": "narrative", "data": {"narrative": "Bonjour"}}
+        assert local.sent == [expected]
+        assert remote.sent == [expected]
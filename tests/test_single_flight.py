@@ -0,0 +1,127 @@
+"""
+Tests du regroupement des requêtes identiques (single-flight)
+"""
+
+import asyncio
+
+import pytest
+
+from jdvlh_ia_game.services.llm_client import LLMClient
+from jdvlh_ia_game.services.single_flight import SingleFlight
+
+
+class CountingClient:
+    """Remplace ollama.AsyncClient: compte les générations réelles"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+
+    async def generate(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"response": f"ok:{kwargs['prompt']}"}
+
+
+@pytest.fixture
+def client():
+    llm = LLMClient(timeout=1.0)
+    llm._client = CountingClient()
+    llm.single_flight = SingleFlight(cache_ttl=30)
+    return llm
+
+
+def test_concurrent_identical_requests_share_one_call(client):
+    async def scenario():
+        return await asyncio.gather(
+            client.generate("mistral", "Décris  Fondcombe", coalesce=True),
+            client.generate("mistral", "Décris Fondcombe\n", coalesce=True),
+            client.generate("mistral", "Décris la Moria", coalesce=True),
+        )
+
+    first, second, other = asyncio.run(scenario())
+    assert client._client.calls == 2
+    assert first == second and first is not second
+    assert other != first
+    assert client.single_flight.get_stats()["coalesced"] == 1
+
+
+def test_low_temperature_results_are_cached(client):
+    cold = {"temperature": 0.3}
+    hot = {"temperature": 0.8}
+
+    async def scenario():
+        await client.generate("mistral", "lieu", cold, coalesce=True)
+        await client.generate("mistral", "lieu", cold, coalesce=True)
+        await client.generate("mistral", "lieu", hot, coalesce=True)
+        await client.generate("mistral", "lieu", hot, coalesce=True)
+
+    asyncio.run(scenario())
+    assert client._client.calls == 3
+    assert client.single_flight.get_stats()["cache_hits"] == 1
+
+
+def test_without_coalesce_each_call_generates(client):
+    async def scenario():
+        await asyncio.gather(*(client.generate("mistral", "lieu") for _ in range(3)))
+
+    asyncio.run(scenario())
+    assert client._client.calls == 3
+
+
+def test_one_caller_cancelled_others_still_served():
+    flights = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        first = asyncio.create_task(flights.do("k", work))
+        second = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
+    assert runs == [1]
+
+
+def test_shared_work_cancelled_when_all_callers_leave():
+    flights = SingleFlight()
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def scenario():
+        caller = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert cancelled == [True]
+    assert flights.get_stats()["in_flight"] == 0
+
+
+def test_errors_are_shared_not_cached():
+    flights = SingleFlight(cache_ttl=30)
+
+    async def failing():
+        raise RuntimeError("ollama indisponible")
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await flights.do("k", failing, cache=True)
+
+    asyncio.run(scenario())
+    assert flights.get_stats()["cached"] == 0
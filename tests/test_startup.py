@@ -0,0 +1,52 @@
+"""
+Tests du démarrage paresseux (config partagée, services construits au premier usage)
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import ollama
+
+from jdvlh_ia_game.config import get_config
+from jdvlh_ia_game.services.model_router import ModelRouter
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_config_loaded_once():
+    assert get_config() is get_config()
+
+
+def test_router_detects_models_on_first_access(monkeypatch):
+    calls = []
+
+    def fake_list():
+        calls.append(1)
+        return {"models": [{"name": "mistral:latest"}]}
+
+    monkeypatch.setattr(ollama, "list", fake_list)
+    router = ModelRouter()
+    assert calls == []
+
+    assert list(router.available_models) == ["mistral"]
+    router.select_model("Que fais-tu ?")
+    assert calls == [1]
+
+
+def test_import_game_server_stays_light():
+    code = (
+        "import sys; sys.path.insert(0, 'src');"
+        "import jdvlh_ia_game.core.game_server;"
+        "print(sorted(m for m in ('bs4', 'ollama', 'httpx',"
+        " 'jdvlh_ia_game.services.narrative', 'jdvlh_ia_game.services.translation"
+        ".pf2e_translator') if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,152 @@
+"""Tests pour StateManager et le moteur de persistance"""
+
+import asyncio
+import json
+
+import pytest
+
+from jdvlh_ia_game.services import state_manager as state_module
+from jdvlh_ia_game.services.persistence import close_engines
+from jdvlh_ia_game.services.shared_state import SQLiteBackend
+from jdvlh_ia_game.services.state_manager import (
+    StateManager,
+    WriteBehindCache,
+    _caches,
+)
+
+
+@pytest.fixture
+def state_manager(tmp_path):
+    manager = StateManager(db_path=str(tmp_path / "game.db"))
+    yield manager
+    close_engines()
+    _caches.clear()
+
+
+class TestStateManager:
+    def test_default_state_for_new_player(self, state_manager):
+        state = state_manager.load_state("nouveau")
+        assert state["history"] == []
+        assert "context" in state
+
+    def test_save_and_load_roundtrip(self, state_manager):
+        state_manager.save_state("p1", {"history": ["Joueur: Explorer"], "x": 1})
+        assert state_manager.load_state("p1") == {
+            "history": ["Joueur: Explorer"],
+            "x": 1,
+        }
+
+    def test_wal_mode(self, state_manager):
+        mode = state_manager.engine.fetchone("PRAGMA journal_mode")[0]
+        assert mode.lower() == "wal"
+
+    def test_connection_is_shared(self, state_manager):
+        other = StateManager(db_path=state_manager.db_path)
+        assert other.engine is state_manager.engine
+
+    def test_async_api(self, state_manager):
+        async def run():
+            state = {"history": [], "current_location": "Absalom"}
+            await state_manager.save_state_async("p2", state)
+            await state_manager.flush_async()
+            loaded = await state_manager.load_state_async("p2")
+            count = await state_manager.get_active_count_async()
+            return loaded, count
+
+        loaded, count = asyncio.run(run())
+        assert loaded["current_location"] == "Absalom"
+        assert count == 1
+
+
+class TestWriteBehind:
+    """Les sauvegardes sont regroupées en une écriture par flush"""
+
+    @staticmethod
+    def stored(state_manager, player_id):
+        row = state_manager.engine.fetchone(
+            "SELECT state_json FROM game_states WHERE player_id = ?", (player_id,)
+        )
+        return json.loads(row[0]) if row else None
+
+    def test_saves_are_deferred_until_flush(self, state_manager):
+        state = state_manager.load_state("p1")
+        for turn in range(5):
+            state["turn"] = turn
+            state_manager.save_state("p1", state)
+
+        assert self.stored(state_manager, "p1") is None
+        assert state_manager.flush() == 1
+        assert self.stored(state_manager, "p1")["turn"] == 4
+        assert state_manager.flush() == 0
+
+    def test_services_share_the_same_state(self, state_manager):
+        other = StateManager(db_path=state_manager.db_path)
+        state = state_manager.load_state("p1")
+        parental_view = other.load_state("p1")
+        parental_view["parental"] = {"pin_hash": "x"}
+        other.save_state("p1", parental_view)
+
+        state["history"].append("Joueur: Explorer")
+        state_manager.save_state("p1", state)
+        state_manager.flush()
+
+        stored = self.stored(state_manager, "p1")
+        assert stored["parental"] == {"pin_hash": "x"}
+        assert stored["history"] == ["Joueur: Explorer"]
+
+    def test_flush_single_player(self, state_manager):
+        state_manager.save_state("p1", {"a": 1})
+        state_manager.save_state("p2", {"b": 2})
+
+        assert state_manager.flush(["p1"]) == 1
+        assert self.stored(state_manager, "p2") is None
+
+    def test_write_through_when_disabled(self, state_manager):
+        state_manager.write_behind = False
+        state_manager.save_state("p1", {"a": 1})
+        assert self.stored(state_manager, "p1") == {"a": 1}
+
+
+class TestTwoWorkers:
+    """Deux StateManager avec leur propre cache, comme deux workers"""
+
+    def test_flush_invalidates_other_worker_copy(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "game.db")
+        shared = SQLiteBackend(str(tmp_path / "shared.db"), poll_interval=0.01)
+        first, second = StateManager(db_path), StateManager(db_path)
+        second.cache = WriteBehindCache()
+        first.shared = second.shared = shared
+
+        async def scenario():
+            monkeypatch.setattr(state_module, "WORKER_ID", "w2")
+            stale = await second.load_state_async("p1")
+            listener = asyncio.create_task(second.run_invalidation_listener())
+            await asyncio.sleep(0.05)
+
+            monkeypatch.setattr(state_module, "WORKER_ID", "w1")
+            state = await first.load_state_async("p1")
+            state["history"].append("Joueur: Explorer")
+            await first.save_state_async("p1", state)
+            await first.flush_async()
+
+            monkeypatch.setattr(state_module, "WORKER_ID", "w2")
+            for _ in range(100):
+                if "p1" not in second.cache.states:
+                    break
+                await asyncio.sleep(0.01)
+            listener.cancel()
+            return stale, await second.load_state_async("p1")
+
+        try:
+            stale, fresh = asyncio.run(scenario())
+        finally:
+            close_engines()
+            _caches.clear()
+        assert stale["history"] == []
+        assert fresh["history"] == ["Joueur: Explorer"]
+
+    def test_dirty_copy_is_kept_and_reported(self):
+        cache = WriteBehindCache()
+        cache.put("p1", {"a": 1})
+        assert not cache.invalidate("p1")
+        assert cache.states["p1"] == {"a": 1} and cache.conflicts == 1